@@ -3,6 +3,17 @@
 # For the full list of built-in configuration values, see the documentation:
 # https://www.sphinx-doc.org/en/master/usage/configuration.html
 
+import os
+import sys
+
+from docutils import nodes
+from sphinx.locale import _
+from sphinx.util.math import get_node_equation_number
+
+# El conversor de LaTeX a MathML compartido con la app vive en utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils'))
+from render_cache import render_math
+
 # -- Project information -----------------------------------------------------
 # https://www.sphinx-doc.org/en/master/usage/configuration.html#project-information
 
@@ -16,7 +27,6 @@ release = '1.0'
 
 extensions = [
     'myst_parser',
-    'sphinx.ext.mathjax',
 ]
 
 
@@ -46,3 +56,33 @@ myst_enable_extensions = [
     "amsmath",
     "dollarmath",  # Habilita la sintaxis $...$ y $$...$$
 ]
+
+
+# -- Math renderizada en el servidor -------------------------------------------
+# En lugar de MathJax, las ecuaciones se convierten a MathML al escribir el HTML
+# (render_math de utils/render_cache.py, el mismo conversor que usa la app). Las
+# páginas llegan con la math ya armada y no cargan ni ejecutan JavaScript para
+# tipografiarla. Como la conversión ocurre en la escritura, un build incremental
+# solo convierte las ecuaciones de los documentos que cambiaron.
+
+html_math_renderer = 'mathml'
+
+
+def _visit_math(self, node):
+    self.body.append(render_math(node.astext(), display_mode=False))
+    raise nodes.SkipNode
+
+
+def _visit_math_block(self, node):
+    self.body.append(self.starttag(node, 'div', CLASS='math notranslate nohighlight'))
+    if node.get('number'):
+        self.body.append('<span class="eqno">(%s)' % get_node_equation_number(self, node))
+        self.add_permalink_ref(node, _('Link to this equation'))
+        self.body.append('</span>')
+    self.body.append(render_math(node.astext(), display_mode=True))
+    self.body.append('</div>\n')
+    raise nodes.SkipNode
+
+
+def setup(app):
+    app.add_html_math_renderer('mathml', (_visit_math, None), (_visit_math_block, None))
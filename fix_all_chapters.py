@@ -1,10 +1,16 @@
-import fileinput
 import sys
 import glob
 import os
 
+# El motor de reemplazos compartido vive en utils/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'utils'))
+from rewrite_engine import rewrite_files
+
 # --- 1. CONFIGURACIÓN DE CORRECCIÓN ---
 # **¡IMPORTANTE!** USTED DEBE COMPLETAR ESTE DICCIONARIO CON SUS ERRORES MÁS COMUNES.
+# Las reglas se aplican en una sola pasada (ver utils/rewrite_engine.py): el texto que
+# produce un reemplazo no vuelve a pasar por las demás reglas. Por ejemplo, el '\vec{' de la
+# corrección de vectores queda como está; antes la regla '\vec{' lo convertía en '$$$\\vec{'.
 SINTAXIS_ROTA = {
     # Su corrección de unidades, asegurando \mathrm{} (más robusto) y el signo $
     '1\\text{cm}': r'$1 \mathrm{cm}$',
@@ -20,40 +26,32 @@ SINTAXIS_ROTA = {
 # --- 2. RUTAS Y LÓGICA DE PROCESAMIENTO ---
 DIRECTORIOS_A_PROCESAR = ['docs/capitulos_guia', 'docs/clases_teoria']
 
-def aplicar_correcciones(archivo_a_corregir):
-    """Aplica las correcciones definidas en SINTAXIS_ROTA a un archivo."""
-    corregido = False
-    try:
-        with fileinput.FileInput(archivo_a_corregir, inplace=True, encoding='utf-8') as archivo:
-            for linea in archivo:
-                linea_corregida = linea
-                for rota, correcta in SINTAXIS_ROTA.items():
-                    if rota in linea_corregida:
-                        linea_corregida = linea_corregida.replace(rota, correcta)
-                        corregido = True
-
-                sys.stdout.write(linea_corregida)
-
-        return "✅ Corregido" if corregido else "☑️ Sin cambios"
-
-    except Exception as e:
-        return f"❌ ERROR al procesar: {e}"
+def aplicar_correcciones(archivos_a_corregir):
+    """
+    Aplica las correcciones definidas en SINTAXIS_ROTA a varios archivos en paralelo.
+    Todas las reglas se aplican en una sola pasada por archivo y solo se reescriben
+    los archivos en los que hubo algún reemplazo.
+    """
+    for archivo, reemplazos, error in rewrite_files(SINTAXIS_ROTA, archivos_a_corregir):
+        if error:
+            yield archivo, f"❌ ERROR al procesar: {error}"
+        else:
+            yield archivo, f"✅ Corregido ({reemplazos} reemplazos)" if reemplazos else "☑️ Sin cambios"
 
 if __name__ == "__main__":
     print("--- ⚙️ Iniciando Corrección Masiva de LaTeX ---")
 
     for directorio in DIRECTORIOS_A_PROCESAR:
         patron_busqueda = os.path.join(directorio, '*.myst')
-        archivos_a_procesar = glob.glob(patron_busqueda)
+        archivos_a_procesar = sorted(glob.glob(patron_busqueda))
 
         if not archivos_a_procesar:
             print(f"⚠️ Advertencia: No se encontraron archivos en '{directorio}'.")
             continue
 
         print(f"\nProcesando {len(archivos_a_procesar)} archivos en: {directorio}")
-        for archivo in archivos_a_procesar:
+        for archivo, resultado in aplicar_correcciones(archivos_a_procesar):
             nombre_archivo = os.path.basename(archivo)
-            resultado = aplicar_correcciones(archivo)
             print(f"[{nombre_archivo:25}] {resultado}")
 
     print("--- Proceso completado. ---")
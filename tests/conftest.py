@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Los módulos de utils/ se importan entre sí por nombre (como al correrlos como scripts)
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (os.path.join(REPO_DIR, 'utils'), REPO_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,151 @@
+import copy
+import json
+import os
+import shutil
+
+from chapter_bundle import (DEFAULT_LIBRO, DEFAULT_VOLUMEN, PARTE_CON_ERRORES, ChapterBundle, build_bundle,
+                            build_catalog, open_bundle, split_chapter)
+from content_cache import BundleTier, MemoryLRU, TieredCache
+
+CHAPTERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'json_capitulos')
+
+
+def _input_dir(tmp_path, chapters=('capitulo_01', 'capitulo_05')):
+    input_dir = tmp_path / 'json_capitulos'
+    input_dir.mkdir()
+    for chapter in chapters:
+        shutil.copy(os.path.join(CHAPTERS_DIR, f'{chapter}.json'), input_dir)
+    return input_dir
+
+
+def _load(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def test_bundle_round_trip(tmp_path):
+    input_dir = _input_dir(tmp_path)
+    (input_dir / 'capitulo_09.json').write_text('{"capitulo_id": 9,', encoding='utf-8')
+    bundle_path = str(tmp_path / 'capitulos.bundle')
+    build_bundle(str(input_dir), bundle_path)
+
+    bundle = ChapterBundle(bundle_path)
+    try:
+        for chapter in ('capitulo_01', 'capitulo_05'):
+            skeleton, bodies = split_chapter(chapter, _load(input_dir / f'{chapter}.json'))
+            assert bundle.get(chapter) == (skeleton, None)
+            assert all(bundle.get(key) == body for key, body in bodies)
+        data, error = bundle.get('capitulo_09')
+        assert data is None and error.startswith("Error de formato JSON en el Capítulo 9")
+        assert bundle.get('capitulo_99') is None
+        assert not bundle.is_stale(str(input_dir))
+    finally:
+        bundle.close()
+
+
+def test_stale_bundle_is_rebuilt(tmp_path):
+    input_dir = _input_dir(tmp_path)
+    bundle_path = str(tmp_path / 'capitulos.bundle')
+    open_bundle(str(input_dir), bundle_path).close()
+
+    # Mismo contenido con otro mtime (git checkout): no hace falta recompilar
+    path = input_dir / 'capitulo_01.json'
+    os.utime(path, ns=(0, 0))
+    bundle = ChapterBundle(bundle_path)
+    assert not bundle.is_stale(str(input_dir))
+    bundle.close()
+
+    data = _load(path)
+    data['titulo'] = 'Título editado'
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    bundle = open_bundle(str(input_dir), bundle_path)
+    assert bundle.get('capitulo_01')[0]['titulo'] == 'Título editado'
+    bundle.close()
+
+    # Un capítulo nuevo también cuenta como cambio
+    shutil.copy(os.path.join(CHAPTERS_DIR, 'capitulo_02.json'), input_dir)
+    bundle = open_bundle(str(input_dir), bundle_path)
+    assert 'capitulo_02' in bundle
+    bundle.close()
+
+
+def test_incompatible_bundle_is_rebuilt(tmp_path):
+    input_dir = _input_dir(tmp_path)
+    bundle_path = tmp_path / 'capitulos.bundle'
+    bundle_path.write_bytes(b'no es un paquete')
+
+    bundle = open_bundle(str(input_dir), str(bundle_path))
+    assert 'capitulo_05' in bundle
+    bundle.close()
+
+
+def test_split_chapter_moves_solutions_out_of_the_skeleton():
+    data = {'capitulo_id': 3, 'secciones': [
+        {'tipo': 'teoria', 'contenido_markdown': 'Teoría'},
+        {'tipo': 'ejercicios', 'ejercicios': [{'enunciado': 'A', 'solucion_markdown': 'a'}, {'enunciado': 'B'}]},
+        {'tipo': 'ejercicios', 'ejercicios': [{'enunciado': 'C', 'solucion_markdown': 'c'}]},
+    ]}
+    original = copy.deepcopy(data)
+
+    skeleton, bodies = split_chapter('capitulo_03', data)
+
+    assert data == original
+    assert skeleton['secciones'][0] == data['secciones'][0]
+    assert [e for s in skeleton['secciones'][1:] for e in s['ejercicios']] == [
+        {'enunciado': 'A', 'solucion_ref': 'capitulo_03/ejercicio_000'},
+        {'enunciado': 'B', 'solucion_ref': 'capitulo_03/ejercicio_001'},
+        {'enunciado': 'C', 'solucion_ref': 'capitulo_03/ejercicio_002'},
+    ]
+    assert bodies == [
+        ('capitulo_03/ejercicio_000', {'solucion_markdown': 'a'}),
+        ('capitulo_03/ejercicio_001', {'solucion_markdown': ''}),
+        ('capitulo_03/ejercicio_002', {'solucion_markdown': 'c'}),
+    ]
+
+
+def test_solutions_load_only_when_opened(tmp_path):
+    input_dir = _input_dir(tmp_path, chapters=('capitulo_05',))
+    bundle = open_bundle(str(input_dir), str(tmp_path / 'capitulos.bundle'))
+    memory = MemoryLRU(max_bytes=1 << 20)
+    cache = TieredCache(BundleTier(bundle), memory)
+    try:
+        skeleton, error = cache.get('capitulo_05')
+        assert error is None
+        refs = [e['solucion_ref'] for s in skeleton['secciones'] for e in s.get('ejercicios', [])]
+        assert refs and memory.stats()['entradas'] == 1
+
+        original = _load(input_dir / 'capitulo_05.json')
+        solutions = [e['solucion_markdown'] for s in original['secciones'] for e in s.get('ejercicios', [])]
+        assert cache.lookup(refs[0]) == ({'solucion_markdown': solutions[0]}, 'compartido')
+        assert cache.lookup(refs[0])[1] == 'memoria'
+        assert memory.stats()['entradas'] == 2
+    finally:
+        bundle.close()
+
+
+def test_catalog_groups_chapters_by_book_and_part():
+    def chapter(chapter_id, parte, **extra):
+        return f'capitulo_{chapter_id:02d}', {'capitulo_id': chapter_id, 'titulo': f'T{chapter_id}', 'parte': parte, **extra}, None
+
+    catalog = build_catalog([
+        chapter(1, 'Mecánica'),
+        ('capitulo_02', None, 'Error de formato JSON'),
+        chapter(15, 'Oscilaciones'),
+        chapter(3, 'Mecánica'),
+        chapter(20, 'Termodinámica', libro='Otro libro', volumen=2),
+        chapter(14, 'Oscilaciones'),
+        ('capitulo_anexo', {'capitulo_id': 'A', 'parte': 'Mecánica'}, None),
+    ])
+
+    assert [(book['libro'], book['volumen']) for book in catalog] == [(DEFAULT_LIBRO, DEFAULT_VOLUMEN), ('Otro libro', 2)]
+    partes = {parte['nombre']: [c['key'] for c in parte['capitulos']] for parte in catalog[0]['partes']}
+    # Las partes van en el orden de su primer capítulo y la de errores al final
+    assert list(partes) == ['Mecánica', 'Oscilaciones', PARTE_CON_ERRORES]
+    assert partes == {
+        'Mecánica': ['capitulo_01', 'capitulo_03', 'capitulo_anexo'],
+        'Oscilaciones': ['capitulo_14', 'capitulo_15'],
+        PARTE_CON_ERRORES: ['capitulo_02'],
+    }
+    assert catalog[0]['partes'][-1]['capitulos'] == [
+        {'key': 'capitulo_02', 'capitulo_id': 2, 'titulo': 'capitulo_02 (no se pudo leer)'}]
+    assert catalog[0]['partes'][0]['capitulos'][2]['titulo'] == 'capitulo_anexo'
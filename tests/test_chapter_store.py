@@ -0,0 +1,71 @@
+import errno
+import json
+import os
+
+import pytest
+
+import chapter_store
+from chapter_store import ChapterStore
+
+CHAPTERS = ('capitulo_01.json', 'capitulo_02.json', 'capitulo_03.json')
+
+
+@pytest.fixture
+def store(tmp_path):
+    for i, filename in enumerate(CHAPTERS, start=1):
+        (tmp_path / filename).write_text(json.dumps({'capitulo_id': i, 'titulo': f'T{i}'}, indent=2) + '\n',
+                                         encoding='utf-8')
+    return ChapterStore(str(tmp_path))
+
+
+def _retitle(data):
+    data['titulo'] += ' (corregido)'
+    return True
+
+
+def _snapshot(tmp_path):
+    return {path.name: path.read_bytes() for path in tmp_path.iterdir()}
+
+
+def test_commit_writes_only_changed_chapters(store, tmp_path):
+    store.apply(lambda data: data['capitulo_id'] == 2 and _retitle(data))
+    store.apply(lambda data: True, ['capitulo_03.json'])  # marcado, pero sin cambios
+
+    assert store.commit() == ['capitulo_02.json']
+    assert json.loads((tmp_path / 'capitulo_02.json').read_text(encoding='utf-8'))['titulo'] == 'T2 (corregido)'
+    assert (tmp_path / 'capitulo_02.json').read_text(encoding='utf-8').endswith('}\n')
+    assert store.commit() == []
+
+
+def test_conflicting_edit_aborts_the_whole_batch(store, tmp_path):
+    store.apply(_retitle)
+    # Otro proceso edita un capítulo después de que el store lo leyó
+    (tmp_path / 'capitulo_03.json').write_text('{"capitulo_id": 3, "titulo": "editado a mano"}', encoding='utf-8')
+    before = _snapshot(tmp_path)
+
+    with pytest.raises(RuntimeError, match='capitulo_03.json'):
+        store.commit()
+    assert _snapshot(tmp_path) == before
+
+
+def test_failed_write_leaves_no_partial_batch(store, tmp_path, monkeypatch):
+    store.apply(_retitle)
+    before = _snapshot(tmp_path)
+    writes = []
+
+    def failing_open(path, mode='r', *args, **kwargs):
+        if 'w' in mode:
+            writes.append(path)
+            if len(writes) == 2:
+                raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC), path)
+        return open(path, mode, *args, **kwargs)
+
+    monkeypatch.setattr(chapter_store, 'open', failing_open, raising=False)
+    with pytest.raises(OSError):
+        store.commit()
+
+    # Ni capítulos a medias ni temporales olvidados
+    assert _snapshot(tmp_path) == before
+
+    monkeypatch.undo()
+    assert store.commit() == list(CHAPTERS)
@@ -0,0 +1,42 @@
+import os
+import shutil
+
+from chapter_bundle import open_bundle
+from chapter_watcher import LiveChapters
+
+CHAPTERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'json_capitulos')
+
+
+def _live_chapters(tmp_path):
+    input_dir = tmp_path / 'json_capitulos'
+    input_dir.mkdir()
+    shutil.copy(os.path.join(CHAPTERS_DIR, 'capitulo_05.json'), input_dir)
+    bundle = open_bundle(str(input_dir), str(tmp_path / 'capitulos.bundle'))
+    return LiveChapters(bundle, str(input_dir), poll_interval=0), input_dir / 'capitulo_05.json'
+
+
+def test_restored_file_clears_deletion_warning(tmp_path):
+    live, path = _live_chapters(tmp_path)
+    content = path.read_bytes()
+
+    path.unlink()
+    assert live.poll(force=True) == []
+    assert 'capitulo_05.json' in live.rejected
+
+    # Mismo contenido de vuelta (git checkout, mv): el aviso desaparece sin recargar nada
+    path.write_bytes(content)
+    assert live.poll(force=True) == []
+    assert live.rejected == {}
+
+
+def test_restored_file_clears_rejected_edit(tmp_path):
+    live, path = _live_chapters(tmp_path)
+    content = path.read_bytes()
+
+    path.write_text('{"capitulo_id": 5', encoding='utf-8')
+    live.poll(force=True)
+    assert 'capitulo_05.json' in live.rejected
+
+    path.write_bytes(content)
+    live.poll(force=True)
+    assert live.rejected == {}
@@ -0,0 +1,36 @@
+import io
+import os
+
+import pytest
+
+from chapter_writer import ChapterWriter
+from migrate_to_myst import process_chapter
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+
+
+@pytest.mark.parametrize('chapter', ['capitulo_01', 'capitulo_05'])
+def test_myst_matches_concatenated_output(chapter):
+    # Los .myst son la salida de process_chapter cuando armaba el documento concatenando
+    # cadenas (antes de ChapterWriter); el streaming tiene que dar los mismos bytes
+    with open(os.path.join(FIXTURES, f'{chapter}.myst'), encoding='utf-8', newline='') as f:
+        expected = f.read()
+    sink = io.StringIO(newline='')
+    assert process_chapter(os.path.join(FIXTURES, f'{chapter}.json'), sink)
+    assert sink.getvalue() == expected
+
+
+def test_writer_without_a_format_cannot_be_created():
+    class SinEjercicios(ChapterWriter):
+        def begin_chapter(self, data):
+            pass
+
+        def section(self, title):
+            pass
+
+        def markdown(self, markdown_text):
+            pass
+
+    with pytest.raises(TypeError):
+        SinEjercicios(io.StringIO())
+
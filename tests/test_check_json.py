@@ -0,0 +1,120 @@
+import copy
+import json
+
+import pytest
+
+from check_json import LineIndex, check_file, check_files, locate_paths
+
+VALID = {
+    'capitulo_id': 7,
+    'titulo': 'Trabajo y energía',
+    'parte': 'Mecánica',
+    'fecha_generacion': '2025-12-16',
+    'secciones': [
+        {'tipo': 'teoria', 'titulo': 'Trabajo', 'contenido_markdown': '$W = Fd$'},
+        {'tipo': 'ejercicios', 'titulo': 'Ejercicios', 'ejercicios': [
+            {'ejercicio_id': 1, 'enunciado': 'Calcule W.', 'solucion_markdown': '$W = 10$ J',
+             'verificacion': [{'formula': 'F * d', 'datos': {'F': '5 N', 'd': '2 m'}, 'resultado': '10 J'}]},
+        ]},
+    ],
+}
+
+
+def _write(tmp_path, data, name='capitulo_07.json'):
+    path = tmp_path / name
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+    return str(path)
+
+
+def _broken(change):
+    data = copy.deepcopy(VALID)
+    change(data)
+    return data
+
+
+def test_valid_chapter_has_no_errors(tmp_path):
+    assert check_file(_write(tmp_path, VALID)) == []
+
+
+@pytest.mark.parametrize('change, message', [
+    # type
+    (lambda d: d.update(capitulo_id='7'), "capitulo_id: se esperaba integer, se encontró str"),
+    # minimum
+    (lambda d: d['secciones'][1]['ejercicios'][0].update(ejercicio_id=0),
+     "secciones[1].ejercicios[0].ejercicio_id: debe ser mayor o igual que 1"),
+    # enum
+    (lambda d: d['secciones'][0].update(tipo='resumen'),
+     "secciones[0].tipo: valor 'resumen' no permitido (opciones: 'teoria', 'ejercicios')"),
+    # minLength
+    (lambda d: d.update(titulo=''), "titulo: no puede estar vacío"),
+    # pattern
+    (lambda d: d.update(fecha_generacion='16/12/2025'),
+     "fecha_generacion: '16/12/2025' no tiene el formato esperado (^\\d{4}-\\d{2}-\\d{2}$)"),
+    # required
+    (lambda d: d.pop('parte'), "(raíz): falta el campo obligatorio 'parte'"),
+    # additionalProperties
+    (lambda d: d.update(autor='X'), "autor: campo no reconocido 'autor'"),
+    # minItems
+    (lambda d: d.update(secciones=[]), "secciones: debe tener al menos 1 elemento(s)"),
+    # if/then: una sección de teoría necesita su contenido
+    (lambda d: d['secciones'][0].pop('contenido_markdown'),
+     "secciones[0]: falta el campo obligatorio 'contenido_markdown'"),
+    # additionalProperties con esquema
+    (lambda d: d['secciones'][1]['ejercicios'][0]['verificacion'][0]['datos'].update(m=''),
+     "secciones[1].ejercicios[0].verificacion[0].datos.m: no puede estar vacío"),
+])
+def test_each_schema_error_is_reported(tmp_path, change, message):
+    assert [m for _, _, m in check_file(_write(tmp_path, _broken(change)))] == [message]
+
+
+def test_errors_point_at_the_value(tmp_path):
+    path = tmp_path / 'capitulo_07.json'
+    content = json.dumps(_broken(lambda d: d['secciones'][1]['ejercicios'][0].update(ejercicio_id=0)), indent=2)
+    path.write_text(content, encoding='utf-8')
+    [(line, col, _)] = check_file(str(path))
+    assert content.splitlines()[line - 1][:col - 1].endswith('"ejercicio_id": ')
+
+
+def test_missing_field_points_at_its_object(tmp_path):
+    content = '{\n  "capitulo_id": 7,\n  "titulo": "T",\n  "secciones": [\n    {"tipo": "teoria", "titulo": "S"}\n  ]\n}'
+    path = tmp_path / 'capitulo_07.json'
+    path.write_text(content, encoding='utf-8')
+    assert check_file(str(path)) == [
+        (1, 1, "(raíz): falta el campo obligatorio 'parte'"),
+        (5, 5, "secciones[0]: falta el campo obligatorio 'contenido_markdown'"),
+    ]
+
+
+def test_locate_paths():
+    content = '{"a": [1, {"b" : "x\\"y"}],\n "c":\n\t null}'
+    positions = locate_paths(content)
+    lines = LineIndex(content)
+    assert {path: lines.line_col(offset) for path, offset in positions.items()} == {
+        (): (1, 1), ('a',): (1, 7), ('a', 0): (1, 8), ('a', 1): (1, 11), ('a', 1, 'b'): (1, 18), ('c',): (3, 3),
+    }
+
+
+def test_syntax_and_encoding_errors(tmp_path):
+    broken = tmp_path / 'capitulo_07.json'
+    broken.write_text('{\n  "titulo": "T",\n}', encoding='utf-8')
+    not_utf8 = tmp_path / 'capitulo_08.json'
+    not_utf8.write_bytes(b'{"titulo": "\xe9"}')
+
+    assert check_file(str(broken)) == [(3, 1, "sintaxis JSON: Expecting property name enclosed in double quotes")]
+    [(line, col, message)] = check_file(str(not_utf8))
+    assert (line, col) == (0, 0) and message.startswith("el archivo no es UTF-8 válido")
+    assert check_file(str(tmp_path / 'capitulo_09.json')) == [(0, 0, "archivo no encontrado")]
+
+
+def test_chapter_id_must_match_the_filename(tmp_path):
+    errors = check_file(_write(tmp_path, VALID, name='capitulo_08.json'))
+    assert errors == [(2, 18, "capitulo_id: capitulo_id 7 no coincide con el archivo (8)")]
+    # Un nombre sin número no se compara
+    assert check_file(_write(tmp_path, VALID, name='capitulo_borrador.json')) == []
+
+
+def test_pool_reports_the_same_errors(tmp_path):
+    paths = [_write(tmp_path, VALID, name=f'capitulo_{i:02d}.json') for i in (7, 8)]
+    serial = list(check_files(paths, jobs=1))
+    assert list(check_files(paths, jobs=2)) == serial
+    assert [bool(errors) for _, errors in serial] == [False, True]
@@ -0,0 +1,69 @@
+import sys
+
+from content_cache import MemoryLRU, TieredCache, object_size
+
+
+class DictTier:
+    """Nivel compartido de prueba: informa como tamaño la longitud del valor."""
+
+    def __init__(self, values, version=''):
+        self.values = values
+        self.current_version = version
+
+    def version(self, key):
+        return self.current_version
+
+    def get(self, key):
+        value = self.values.get(key)
+        return None if value is None else (value, len(value))
+
+
+def test_eviction_keeps_within_the_byte_budget():
+    lru = MemoryLRU(max_bytes=100)
+    lru.put('a', 'A', 40)
+    lru.put('b', 'B', 40)
+    assert lru.get('a') == ('A', 40)  # 'b' pasa a ser la menos usada
+
+    lru.put('c', 'C', 40)
+    assert lru.get('b') is None
+    assert lru.get('a') is not None and lru.get('c') is not None
+    assert lru.stats()['bytes'] == 80
+
+    # Reemplazar una clave descuenta su tamaño anterior
+    lru.put('a', 'A2', 60)
+    assert lru.stats()['bytes'] == 100 and lru.stats()['entradas'] == 2
+
+    # Lo que no entra en todo el presupuesto no desaloja nada
+    lru.put('enorme', 'X', 101)
+    assert lru.get('enorme') is None and lru.stats()['entradas'] == 2
+
+
+def test_invalidate_drops_every_version_and_exercise():
+    lru = MemoryLRU(max_bytes=1000)
+    for key in ('capitulo_05@v1', 'capitulo_05@v2', 'capitulo_05/ejercicio_000@v2', 'capitulo_50@v1'):
+        lru.put(key, key, 10)
+
+    lru.invalidate('capitulo_05')
+
+    assert lru.stats()['entradas'] == 1 and lru.stats()['bytes'] == 10
+    assert lru.get('capitulo_50@v1') is not None
+
+
+def test_memory_is_charged_with_the_object_size():
+    value = {'titulo': 'Energía', 'secciones': [{'contenido_markdown': 'x' * 500}]}
+    memory = MemoryLRU(max_bytes=10 ** 6)
+    cache = TieredCache(DictTier({'capitulo_05': value}), memory)
+
+    assert cache.lookup('capitulo_05') == (value, 'compartido')
+    assert cache.lookup('capitulo_05') == (value, 'memoria')
+    assert memory.stats()['bytes'] == object_size(value) > sys.getsizeof('x' * 500)
+
+
+def test_new_version_is_read_from_the_shared_tier():
+    shared = DictTier({'capitulo_05': 'viejo'}, version='v1')
+    cache = TieredCache(shared, MemoryLRU(max_bytes=1000))
+    cache.get('capitulo_05')
+
+    shared.values['capitulo_05'] = 'nuevo'
+    shared.current_version = 'v2'
+    assert cache.lookup('capitulo_05') == ('nuevo', 'compartido')
@@ -0,0 +1,40 @@
+import pytest
+
+from fix_latex import fix_latex_delimiters_in_string as fix
+
+
+@pytest.mark.parametrize('text, expected', [
+    # Comandos pegados: un solo '$...$', no '$a$$b$' (que se lee como '$$')
+    (r'F = ma \vec{F}\vec{a}', r'F = ma $\vec{F}\vec{a}$'),
+    (r'\text{m}\text{s}', r'$\text{m}\text{s}$'),
+    (r'\\frac{m}{s}\\cdot t', r'$\frac{m}{s}\cdot$ t'),
+    # El exponente queda dentro de la math
+    (r'$$\\text$${m}^2', r'$\text{m}^2$'),
+    (r'la fuerza \vec{F}_{net} actúa', r'la fuerza $\vec{F}_{net}$ actúa'),
+    # Los code spans no se tocan
+    (r'use `\vec{F}` en el código', r'use `\vec{F}` en el código'),
+    (r'``\text{m}`` y \text{m}', r'``\text{m}`` y $\text{m}$'),
+    # Una ecuación vacía que se borra no deja un comando nuevo entre sus vecinos
+    (r'\n$$$$mol', '\nmol'),
+    (r'\$\alpha', r'\$$\alpha$'),
+])
+def test_repair(text, expected):
+    assert fix(text) == expected
+
+
+@pytest.mark.parametrize('text', [
+    r'F = ma \vec{F}\vec{a}',
+    r'\text{m}\text{s}',
+    r'\\frac{m}{s}\\cdot t',
+    r'$$\\text$${m}^2',
+    r'use `\vec{F}` y `\text{m}`',
+    r'`a` \vec{x}`b`\cdot',
+    r'\`x`\cdot2`m',
+    r'$\\\n$$_x',
+    r'\n$$$$mol$$\$',
+    r'\text{m}_xtextm',
+    '| Unidades SI |\n| m |\n| kg |',
+])
+def test_idempotent(text):
+    once = fix(text)
+    assert fix(once) == once
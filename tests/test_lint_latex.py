@@ -0,0 +1,44 @@
+import json
+
+import pytest
+
+from lint_latex import lint_file, lint_markdown
+
+
+def test_unreadable_chapters_are_findings(tmp_path):
+    not_utf8 = tmp_path / 'capitulo_01.json'
+    not_utf8.write_bytes(b'\xff\xfe{')
+    not_object = tmp_path / 'capitulo_02.json'
+    not_object.write_text('[1, 2]', encoding='utf-8')
+
+    assert [code for _, _, code, _ in lint_file(str(not_utf8))] == ['L000']
+    assert [code for _, _, code, _ in lint_file(str(not_object))] == ['L000']
+
+
+def test_math_command_outside_math(tmp_path):
+    chapter = tmp_path / 'capitulo_03.json'
+    chapter.write_text('{"secciones": [{"tipo": "teoria", "titulo": "T", "contenido_markdown": "v = 3 \\\\text{m}"}]}',
+                       encoding='utf-8')
+    assert [code for _, _, code, _ in lint_file(str(chapter))] == ['L002']
+
+
+def test_exercises_that_are_not_a_list(tmp_path):
+    chapter = tmp_path / 'capitulo_04.json'
+    chapter.write_text(json.dumps({'secciones': [{'tipo': 'ejercicios', 'titulo': 'E', 'ejercicios': 3}]}),
+                       encoding='utf-8')
+    [(_, _, code, message)] = lint_file(str(chapter))
+    assert code == 'L000' and message.startswith('secciones.0.ejercicios no es una lista')
+
+
+@pytest.mark.parametrize('markdown, expected', [
+    ('La fuerza $F = ma', [(10, 'L001', "'$' sin cerrar")]),
+    ('$$E = mc^2$ y sigue', [(0, 'L001', "'$$' sin cerrar")]),
+    (r'$\\frac{1}{2}$', [(1, 'L003', "doble escape en '\\\\frac' (debería ser '\\frac')")]),
+    ('| a | b |\n|---|---|\n| 1 |', [(20, 'L004', "la fila tiene 1 celdas y el encabezado 2")]),
+    ('| a | b |\n|---|---|\n| $|x|$ | 2 |',
+     [(20, 'L004', "la fila tiene 4 celdas y el encabezado 2"),
+      (22, 'L004', "una ecuación contiene '|' y corta la celda (use \\vert o \\mid)")]),
+    ('| a | b |\n|---|---|\n| $\\vert x \\vert$ | 2 |', []),
+])
+def test_lint_markdown_rules(markdown, expected):
+    assert lint_markdown(markdown) == expected
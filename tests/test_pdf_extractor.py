@@ -0,0 +1,85 @@
+import pytest
+
+pytest.importorskip('pdfplumber')
+
+from pdf_extractor import extract_directory
+
+TEXT_LAYER = "La segunda ley de Newton relaciona la fuerza neta con la aceleracion del cuerpo."
+
+
+def _write_pdf(path, page_texts):
+    """
+    PDF mínimo: una página por texto. None es una página sin capa de texto, como un
+    escaneo: solo un rectángulo dibujado, en otra posición en cada página.
+    """
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for index, text in enumerate(page_texts):
+        if text:
+            stream = f"BT /F1 11 Tf 40 700 Td ({text}) Tj ET".encode('latin-1')
+        else:
+            stream = f"0 g {40 + 60 * index} 600 50 50 re f".encode('ascii')
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % len(objects))
+        kids.append(f"{len(objects)} 0 R")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode('ascii')
+
+    data = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(data))
+        data += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(data)
+    data += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    data += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    data += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    path.write_bytes(data)
+
+
+def _extract(tmp_path, pdf_path, **options):
+    extract_directory([str(pdf_path)], backend_name='fake', jobs=1, resolution=72,
+                      output_dir=str(tmp_path / 'salida'), cache_dir=str(tmp_path / 'cache'), **options)
+    return (tmp_path / 'salida' / f"{pdf_path.stem}_ocr.myst").read_text(encoding='utf-8')
+
+
+def test_text_layer_and_ocr_pages(tmp_path, capsys):
+    pdf_path = tmp_path / 'capitulo_05.pdf'
+    _write_pdf(pdf_path, [TEXT_LAYER, None])
+
+    output = _extract(tmp_path, pdf_path)
+    assert output.startswith("# Capitulo 05\n\n")
+    assert TEXT_LAYER in output
+    # La página sin capa de texto se rasteriza a 72 DPI (612x792 pt) y pasa por el OCR falso
+    assert "Texto simulado de una página de 612x792 px (spa)." in output
+    assert "1 páginas por capa de texto, 1 por OCR, 0 desde el caché de OCR" in capsys.readouterr().out
+
+
+def test_ocr_cache_hit_on_second_run(tmp_path, capsys):
+    pdf_path = tmp_path / 'capitulo_05.pdf'
+    _write_pdf(pdf_path, [TEXT_LAYER, None, None])
+
+    first = _extract(tmp_path, pdf_path)
+    assert "1 páginas por capa de texto, 2 por OCR, 0 desde el caché de OCR" in capsys.readouterr().out
+
+    second = _extract(tmp_path, pdf_path)
+    assert "1 páginas por capa de texto, 0 por OCR, 2 desde el caché de OCR" in capsys.readouterr().out
+    assert second == first
+
+
+def test_force_ocr_ignores_text_layer(tmp_path, capsys):
+    pdf_path = tmp_path / 'capitulo_05.pdf'
+    _write_pdf(pdf_path, [TEXT_LAYER])
+
+    output = _extract(tmp_path, pdf_path, force_ocr=True)
+    assert TEXT_LAYER not in output
+    assert "0 páginas por capa de texto, 1 por OCR" in capsys.readouterr().out
+
+
+def test_uppercase_extension(tmp_path):
+    pdf_path = tmp_path / 'capitulo_07.PDF'
+    _write_pdf(pdf_path, [TEXT_LAYER])
+
+    _extract(tmp_path, pdf_path)
+    assert (tmp_path / 'salida' / 'capitulo_07_ocr.myst').exists()
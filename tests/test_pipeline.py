@@ -0,0 +1,55 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from pipeline import MYST_DIR, run_pipeline
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHAPTERS = ['capitulo_01', 'capitulo_02', 'capitulo_03']
+PER_CHAPTER = ['fix_latex', 'check_json', 'migrate_to_myst']
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    chapters_dir = tmp_path / 'json_capitulos'
+    chapters_dir.mkdir()
+    for chapter in CHAPTERS:
+        shutil.copy(os.path.join(REPO_DIR, 'json_capitulos', f'{chapter}.json'), chapters_dir)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def _run(tree):
+    summary = run_pipeline(['myst_index'], jobs=1, state_path=str(tree / 'cache' / 'pipeline.json'))
+    return {name: stage_summary['estados'] for name, stage_summary in summary.items() if name != 'total'}
+
+
+def test_second_run_is_up_to_date(tree):
+    first = _run(tree)
+    assert all(first[name] == {'ejecutada': len(CHAPTERS)} for name in PER_CHAPTER)
+    assert first['myst_index'] == {'ejecutada': 1}
+
+    second = _run(tree)
+    assert all(second[name] == {'al día': len(CHAPTERS)} for name in PER_CHAPTER)
+    assert second['myst_index'] == {'al día': 1}
+
+
+def test_edited_chapter_reruns_only_its_units(tree):
+    _run(tree)
+    untouched = {name: os.stat(os.path.join(MYST_DIR, f'{name}.myst')).st_mtime_ns
+                 for name in CHAPTERS + ['index'] if name != 'capitulo_02'}
+
+    path = tree / 'json_capitulos' / 'capitulo_02.json'
+    data = json.loads(path.read_text(encoding='utf-8'))
+    data['titulo'] += ' (revisado)'
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding='utf-8')
+
+    estados = _run(tree)
+    assert all(estados[name] == {'ejecutada': 1, 'al día': len(CHAPTERS) - 1} for name in PER_CHAPTER)
+    assert '(revisado)' in (tree / MYST_DIR / 'capitulo_02.myst').read_text(encoding='utf-8')
+    # El índice se rearma porque cambió uno de sus capítulos, pero solo los lista: no se reescribe
+    assert estados['myst_index'] == {'ejecutada': 1}
+    assert all(os.stat(os.path.join(MYST_DIR, f'{name}.myst')).st_mtime_ns == mtime
+               for name, mtime in untouched.items())
@@ -0,0 +1,35 @@
+from fix_all_chapters import SINTAXIS_ROTA
+from rewrite_engine import RewriteEngine
+
+
+def test_longest_key_wins():
+    engine = RewriteEngine({'ab': 'X', 'abc': 'Y', 'b': 'Z'})
+    assert engine.apply('abc ab b') == ('Y X Z', 3)
+
+
+def test_replacements_are_not_rescanned():
+    # Con reemplazos en cadena (el str.replace secuencial de antes) el '\vec{' producido por
+    # la corrección de vectores volvía a pasar por la regla '\vec{' y quedaba '$$$\\vec{V}...'
+    assert RewriteEngine(SINTAXIS_ROTA).apply('V = (V ,V ,V ),') == (r'$\vec{V} = (V_x, V_y, V_z)$', 1)
+
+
+def test_fix_all_chapters_table():
+    text = '\\vec{a} y \\frac{1}{2} con 10\\text{kg} y 1\\text{cm}'
+    assert RewriteEngine(SINTAXIS_ROTA).apply(text) == (
+        r'$$\\vec{a} y $$\\frac{1}{2} con $10 \mathrm{kg}$ y $1 \mathrm{cm}$', 4)
+
+
+def test_rewrite_file_only_writes_when_changed(tmp_path):
+    engine = RewriteEngine({'\\frac{': '$$\\\\frac{'})
+    untouched = tmp_path / 'sin_cambios.myst'
+    untouched.write_text('Nada que corregir\n', encoding='utf-8')
+    mtime = untouched.stat().st_mtime_ns
+
+    assert engine.rewrite_file(str(untouched)) == 0
+    assert untouched.stat().st_mtime_ns == mtime
+
+    fixed = tmp_path / 'capitulo.myst'
+    fixed.write_text('\\frac{1}{2}\r\n', encoding='utf-8')
+    assert engine.rewrite_file(str(fixed)) == 1
+    # Los finales de línea del archivo se conservan
+    assert fixed.read_bytes() == b'$$\\\\frac{1}{2}\r\n'
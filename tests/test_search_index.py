@@ -0,0 +1,71 @@
+import json
+import math
+
+import pytest
+
+from search_index import BM25_B, BM25_K1, FIELD_WEIGHTS, build_search_index, open_search_index, query_terms
+
+
+def _chapter(chapter_id, titulo, teoria, ejercicios=()):
+    return {
+        'capitulo_id': chapter_id, 'titulo': titulo, 'parte': 'Mecánica',
+        'secciones': [
+            {'tipo': 'teoria', 'titulo': 'Conceptos', 'contenido_markdown': teoria},
+            {'tipo': 'ejercicios', 'titulo': 'Ejercicios', 'ejercicios': [
+                {'ejercicio_id': i + 1, 'enunciado': enunciado, 'solucion_markdown': solucion}
+                for i, (enunciado, solucion) in enumerate(ejercicios)
+            ]},
+        ],
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    input_dir = tmp_path / 'json_capitulos'
+    input_dir.mkdir()
+    chapters = {
+        'capitulo_07': _chapter(7, 'Energía cinética', 'La energía cinética es $K = \\frac{1}{2}mv^2$.', [
+            ('Calcule la energía cinética de un auto.', '$K = \\dfrac{1}{2} m \\cdot v^{2} = 10$ J'),
+        ]),
+        'capitulo_08': _chapter(8, 'Energía potencial', 'La energía potencial gravitatoria es $U = mgh$.'),
+        'capitulo_09': _chapter(9, 'Presión', 'La presión hidrostática es $P = \\rho g h$.'),
+    }
+    for key, data in chapters.items():
+        (input_dir / f'{key}.json').write_text(json.dumps(data, ensure_ascii=False), encoding='utf-8')
+    index = open_search_index(str(input_dir), str(tmp_path / 'busqueda.index'))
+    yield index
+    index.close()
+
+
+def _results(index, query):
+    return [(document['key'], document['tipo']) for _, document in index.search(query)]
+
+
+def test_accents_case_and_plurals_are_folded():
+    assert query_terms('Energías CINÉTICAS') == query_terms('energia cinetica') == ['energia', 'cinetica']
+    assert query_terms('presiones de los fluidos') == ['presion', 'fluido']
+
+
+def test_ranking_ignores_accents(index):
+    results = _results(index, 'energía cinética')
+    assert results == _results(index, 'ENERGIA CINETICA')
+    # Las dos palabras y el título pesan más que una sola palabra en el texto
+    assert results[:2] == [('capitulo_07', 'teoria'), ('capitulo_07', 'ejercicio')]
+    assert ('capitulo_08', 'teoria') in results
+    assert all(key != 'capitulo_09' for key, _ in results)
+
+
+def test_equivalent_formulas_find_the_same_documents(index):
+    assert _results(index, '\\frac{1}{2}mv^2')[:2] == _results(index, '$\\dfrac{1}{2} m \\cdot v^{2}$')[:2]
+    assert _results(index, 'P = \\rho g h')[0] == ('capitulo_09', 'teoria')
+
+
+def test_bm25_score(index):
+    [(score, document)] = index.search('hidrostática')
+    assert document['key'] == 'capitulo_09'
+    total = len(index)
+    length = index._data[index.documents.index(document)]
+    frequency = FIELD_WEIGHTS['contenido_markdown']
+    idf = math.log(1 + (total - 1 + 0.5) / (1 + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / index.avgdl)
+    assert score == pytest.approx(idf * frequency * (BM25_K1 + 1) / (frequency + norm))
@@ -0,0 +1,42 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+from verify_solutions import extract_checks, verify
+
+
+def _findings(markdown):
+    checks, findings = [], []
+    extract_checks('capitulo_99.json', markdown, checks, findings)
+    assert checks, f"no se extrajo ninguna igualdad de {markdown!r}"
+    return [finding.message for finding in findings + verify(checks)]
+
+
+@pytest.mark.parametrize('markdown', [
+    # El ^\circ es del argumento: sin(30°), no sin(30)°
+    r"$$F = 10 \sin 30^\circ = 5$$",
+    r"$$F = 10\,\text{N} \cos 60^{\circ} = 5\,\text{N}$$",
+    r"$$x = 2 \sin(30^\circ) = 1$$",
+    r"$$v = \frac{100\,\text{km}}{2\,\text{h}} = 50\,\text{km/h}$$",
+    r"$$v = \frac{100\,\text{km}}{2\,\text{h}} = 13.9\,\text{m/s}$$",
+    r"$$A = (20.0\,\text{m})(15.0\,\text{m}) = 3.00 \times 10^6\,\text{cm}^2$$",
+])
+def test_correct_results_pass(markdown):
+    assert _findings(markdown) == []
+
+
+@pytest.mark.parametrize('markdown, message', [
+    (r"$$F = 10\,\text{N} \cos 60^{\circ} = 7\,\text{N}$$", "la cuenta da 5, no 7"),
+    (r"$$v = \frac{100\,\text{km}}{2\,\text{h}} = 60\,\text{km/h}$$", "la cuenta da 50, no 60"),
+    (r"$$A = (20.0\,\text{m})(15.0\,\text{m}) = 3.00 \times 10^5\,\text{cm}^2$$", "la cuenta da 3e+06, no 300000"),
+    # El resultado redondeado a su última cifra, no a la cifra siguiente
+    (r"$$x = 4 \times 2 = 9$$", "la cuenta da 8, no 9"),
+    (r"$$W = (3)(4) = 13 \text{ J}$$", "la cuenta da 12, no 13"),
+    (r"$$x = 10 / 4 = 3$$", "la cuenta da 2.5, no 3"),
+])
+def test_wrong_results_are_reported(markdown, message):
+    assert _findings(markdown) == [message]
+
+
+def test_mismatched_units_are_reported():
+    assert _findings(r"$$v = \frac{100\,\text{km}}{2\,\text{h}} = 50\,\text{km}$$") == ["dimensiones distintas: m s^-1 y m"]
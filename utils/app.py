@@ -1,7 +1,14 @@
 import streamlit as st
-import json
 import os
 
+from chapter_bundle import BUNDLE_PATH, open_bundle
+from chapter_watcher import LiveChapters
+from content_cache import TieredCache, process_memory
+from image_assets import AssetTier, ImageAssets, static_url
+from metrics import DEBUG_PANEL, METRICS_PORT, REGISTRY, RerunTimer, start_http_endpoint, write_textfile
+from render_cache import lookup_rendered_html
+from search_index import SEARCH_INDEX_PATH, open_search_index
+
 # --- 1. CONFIGURACIÓN DE PÁGINA (Tema Moderno y Ancho Completo) ---
 st.set_page_config(
     page_title="Guía de Física: Serway & Jewett",
@@ -10,84 +17,235 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
+# Mediciones de esta ejecución del script (ver utils/metrics.py)
+rerun = RerunTimer()
+
 # --- 2. CONSTANTES Y CONFIGURACIÓN DE ARCHIVOS ---
 BASE_PATH = "json_capitulos"
 
-# Estructura del libro Serway Vol. 1 para la navegación
-CAPITULO_GRUPOS = {
-    "📚 PARTE 1: Mecánica (Caps. 1-14)": list(range(1, 15)),
-    "🌊 PARTE 2: Oscilaciones y Ondas Mecánicas (Caps. 15-18)": list(range(15, 19)),
-    "🔥 PARTE 3: Termodinámica (Caps. 19-22)": list(range(19, 23))
+# Íconos de la barra lateral por parte del libro (el resto usa el ícono por defecto)
+ICONOS_PARTES = {
+    "Mecánica": "📚",
+    "Oscilaciones y Ondas Mecánicas": "🌊",
+    "Termodinámica": "🔥",
 }
+ICONO_PARTE_DEFAULT = "📘"
 
-# Diccionario de títulos para la barra lateral
-TITULOS_CAPITULOS = {
-    1: "Capítulo 1: Medición y Vectores", 2: "Capítulo 2: Movimiento en Una Dimensión",
-    3: "Capítulo 3: Vectores y Movimiento en Dos Dimensiones", 4: "Capítulo 4: Dinámica: Leyes de Newton",
-    5: "Capítulo 5: Aplicaciones de las Leyes de Newton", 6: "Capítulo 6: Trabajo y Energía Cinética",
-    7: "Capítulo 7: Energía Potencial y Conservación", 8: "Capítulo 8: Momentum Lineal y Colisiones",
-    9: "Capítulo 9: Rotación de Cuerpos Rígidos", 10: "Capítulo 10: Momento Angular",
-    11: "Capítulo 11: Equilibrio Estático y Elasticidad", 12: "Capítulo 12: Gravitación Universal",
-    13: "Capítulo 13: Mecánica de Fluidos", 14: "Capítulo 14: Movimiento Oscilatorio",
-    15: "Capítulo 15: Movimiento Ondulatorio", 16: "Capítulo 16: Ondas Sonoras",
-    17: "Capítulo 17: Sobreposición y Ondas Estacionarias", 18: "Capítulo 18: Temperatura, Calor y 1ra Ley",
-    19: "Capítulo 19: Teoría Cinética de Gases", 20: "Capítulo 20: Máquinas Térmicas y 2da Ley",
-    21: "Capítulo 21: Entropía", 22: "Capítulo 22: Tópicos de Termodinámica",
-}
+# Vistas del capítulo (selector del área principal)
+VISTA_TEORIA = "📘 Teoría y Conceptos Clave"
+VISTA_EJERCICIOS = "🧠 Ejercicios Resueltos"
+MAX_RESULTADOS_BUSQUEDA = 8
 
-# Diccionario de Prompts/URLs de imágenes
+# Descripción del diagrama clave de cada capítulo (por capitulo_id): es el pie de la imagen
+# y, mientras falte el archivo en diagramas/, el prompt para generarla. Las imágenes se
+# sirven desde los derivados de utils/image_assets.py.
 IMAGENES_CAPITULOS = {
     5: {
-        "url": "",
         "prompt": "Diagrama de cuerpo libre técnico de un bloque sobre un plano inclinado con fuerzas N, W, y f_k rotuladas."
     },
-    13: {
-        "url": "",
+    14: {
         "prompt": "Diagrama técnico de un tubo Venturi mostrando la Ecuación de Bernoulli: flujo de fluido más rápido en la sección estrecha (baja presión) y más lento en la sección ancha (alta presión)."
     },
-    14: {
-        "url": "",
+    15: {
         "prompt": "Gráfico de la posición vs tiempo para el Movimiento Armónico Simple (MAS) de un sistema masa-resorte, mostrando Amplitud (A), Periodo (T) y fase (phi)."
     },
 }
 
 # --- 3. FUNCIÓN DE CARGA DE DATOS ---
-@st.cache_data
-def load_chapter_data(chapter_id):
-    """Carga y parsea el archivo JSON del capítulo especificado."""
-    file_path = os.path.join(BASE_PATH, f"capitulo_{chapter_id:02d}.json")
-    if not os.path.exists(file_path):
+@st.cache_resource
+def get_chapter_bundle():
+    """Abre (y recompila si hace falta) el paquete binario de capítulos, una vez por proceso."""
+    return open_bundle(BASE_PATH, BUNDLE_PATH)
+
+@st.cache_resource
+def get_live_chapters():
+    """Paquete de capítulos más las ediciones válidas hechas en json_capitulos/ desde que se compiló."""
+    return LiveChapters(get_chapter_bundle(), BASE_PATH)
+
+@st.cache_resource
+def get_chapter_cache():
+    """
+    Caché de capítulos del proceso: un LRU con presupuesto en bytes (GUIA_CACHE_MEMORY_MB)
+    delante del paquete mapeado en memoria, que comparten todos los procesos de la réplica.
+    El contenido se trata como de solo lectura.
+    """
+    return TieredCache(get_live_chapters())
+
+def load_chapter_data(chapter_key):
+    """Obtiene el capítulo especificado (p. ej. 'capitulo_05') desde el paquete precompilado."""
+    entry, origen = get_chapter_cache().lookup(chapter_key)
+    rerun.cache_lookup('capitulos', origen)
+    if entry is None:
+        file_path = os.path.join(BASE_PATH, f"{chapter_key}.json")
         return None, f"Archivo no encontrado: {file_path}"
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data, None
-    except json.JSONDecodeError as e:
-        error_msg = f"Error de formato JSON en el Capítulo {chapter_id} (Posición: {e.pos}). Revise cuidadosamente las barras invertidas ('\\\\' para LaTeX)."
-        return None, error_msg
-    except Exception as e:
-        return None, f"Error desconocido al cargar el capítulo {chapter_id}: {e}"
-
-# --- Manejo del estado para la selección del capítulo (Inicialización) ---
-if 'selected_chapter' not in st.session_state:
-    st.session_state.selected_chapter = 1
-if 'selected_part_key' not in st.session_state:
-    # Determinar la clave de la parte inicial (Mecánica)
-    st.session_state.selected_part_key = list(CAPITULO_GRUPOS.keys())[0]
+    return entry
+
+@st.cache_resource
+def get_search_index():
+    """Abre (y recompila si hace falta) el índice de búsqueda mapeado en memoria, una vez por proceso."""
+    return open_search_index(BASE_PATH, SEARCH_INDEX_PATH)
+
+def part_label(index, parte):
+    """Etiqueta de la parte para el selector, p. ej. '🔥 PARTE 3: Termodinámica (Caps. 19-22)'."""
+    ids = [c['capitulo_id'] for c in parte['capitulos']]
+    icono = ICONOS_PARTES.get(parte['nombre'], ICONO_PARTE_DEFAULT)
+    rango = f"Caps. {ids[0]}-{ids[-1]}" if len(ids) > 1 else f"Cap. {ids[0]}"
+    return f"{icono} PARTE {index}: {parte['nombre']} ({rango})"
+
+@st.cache_resource
+def get_image_assets():
+    """Manifiesto de los diagramas derivados (se relee solo si se regeneran)."""
+    return ImageAssets()
+
+@st.cache_resource
+def get_image_cache():
+    """Bytes de los derivados en el LRU del proceso, para cuando no hay servicio de estáticos."""
+    return TieredCache(AssetTier())
+
+def show_diagram(diagrama, tamaño, caption):
+    """
+    Muestra el derivado del tamaño pedido. Con server.enableStaticServing se envía solo su
+    URL (nombre con hash: el navegador lo cachea y Streamlit no toca la imagen); si no, se
+    envían los bytes del PNG, que st.image pasa tal cual sin recodificar.
+    """
+    variantes = diagrama['variantes'][tamaño]
+    if st.get_option("server.enableStaticServing"):
+        st.image(static_url(variantes), caption=caption)
+        return
+    data, origen = get_image_cache().lookup(variantes['png']['archivo'])
+    rerun.cache_lookup('imagenes', origen)
+    if data is not None:
+        st.image(data, caption=caption, output_format="PNG")
+    else:
+        st.warning("No se encontró el diagrama derivado; ejecute `python utils/image_assets.py`.")
+
+def load_exercise_solution(solucion_ref):
+    """Obtiene el cuerpo de un ejercicio solo cuando el usuario lo abre."""
+    body, origen = get_chapter_cache().lookup(solucion_ref)
+    rerun.cache_lookup('capitulos', origen)
+    return body['solucion_markdown'] if body else None
+
+def show_markdown(markdown_text):
+    """Envía el HTML pre-renderizado si existe; si no, deja que el navegador renderice el markdown."""
+    rendered, origen = lookup_rendered_html(markdown_text)
+    rerun.cache_lookup('render', origen)
+    if rendered is not None:
+        st.markdown(rendered, unsafe_allow_html=True)
+        rerun.payload(len(rendered.encode('utf-8')))
+    else:
+        st.markdown(markdown_text)
+        rerun.payload(len(markdown_text.encode('utf-8')))
+
+@st.cache_resource
+def start_metrics_endpoint():
+    """Levanta una sola vez por proceso el endpoint /metrics, si GUIA_METRICS_PORT está definido."""
+    return start_http_endpoint() if METRICS_PORT else None
+
+def show_debug_panel(resumen):
+    """Panel opcional (GUIA_DEBUG=1 o ?debug=1) con las mediciones de esta ejecución."""
+    with st.sidebar.expander("🛠️ Métricas de esta ejecución", expanded=True):
+        st.markdown(f"**Total:** {resumen['total'] * 1000:.1f} ms · **Enviado:** {resumen['bytes'] / 1024:.1f} KB")
+        st.table({
+            "fase": [nombre for nombre, _ in resumen['fases']],
+            "ms": [f"{segundos * 1000:.1f}" for _, segundos in resumen['fases']],
+        })
+        if resumen['cache']:
+            st.markdown("**Consultas a caché:** " + ", ".join(f"{cache} → {resultado}" for cache, resultado in resumen['cache']))
+        memoria = process_memory().stats()
+        consultas = memoria['aciertos'] + memoria['fallos']
+        tasa = f"{memoria['aciertos'] / consultas:.0%}" if consultas else "—"
+        st.caption(f"LRU del proceso: {memoria['entradas']} entradas, {memoria['bytes'] / 1e6:.1f} de "
+                   f"{memoria['max_bytes'] / 1e6:.0f} MB, aciertos {tasa}")
+
+def go_to_search_result(documento):
+    """Callback de un resultado de búsqueda: abre su capítulo y, si es un ejercicio, su solución."""
+    for i, libro in enumerate(catalogo):
+        if any(c['key'] == documento['key'] for parte in libro['partes'] for c in parte['capitulos']):
+            st.session_state.book_selector = i
+    st.session_state.selected_chapter = documento['key']
+    # Se descartan los selectores de parte y capítulo para que se reconstruyan con el nuevo capítulo
+    for key in ('selected_part_key', 'part_selector', 'chapter_radio_key'):
+        st.session_state.pop(key, None)
+    if documento['tipo'] == 'ejercicio':
+        st.session_state.vista_capitulo = VISTA_EJERCICIOS
+        st.session_state[f"solucion_{documento['ref']}"] = True
+    else:
+        st.session_state.vista_capitulo = VISTA_TEORIA
+
+start_metrics_endpoint()
+
+# --- Recarga en caliente: solo se descartan los capítulos cuyo JSON cambió y es válido ---
+capitulos_vivos = get_live_chapters()
+recargados = capitulos_vivos.poll()
+for chapter_key in recargados:
+    get_chapter_cache().invalidate(chapter_key)
+if recargados:
+    # El índice se recompila al abrirse de nuevo porque sus fuentes cambiaron
+    get_search_index.clear()
+rerun.lap('recarga')
+
+# --- Catálogo de navegación (precalculado en el paquete, no se lee ningún capítulo) ---
+catalogo = capitulos_vivos.catalog
 
 # --- 4. BARRA LATERAL (NAVEGACIÓN MEJORADA) ---
 st.sidebar.title("📚 Guía de Física Serway")
+
+# 4.a. Buscador (texto o fórmula) sobre el índice precompilado
+consulta = st.sidebar.text_input(
+    "🔎 Buscar",
+    placeholder="energía cinética, \\frac{1}{2}mv^2…",
+    key='search_query'
+)
+if consulta.strip():
+    resultados = get_search_index().search(consulta, limit=MAX_RESULTADOS_BUSQUEDA)
+    if not resultados:
+        st.sidebar.caption("Sin resultados.")
+    for n, (_, documento) in enumerate(resultados):
+        destino = f"Ejercicio {documento['ejercicio_id']}" if documento['tipo'] == 'ejercicio' else "Teoría"
+        st.sidebar.button(
+            f"Cap. {documento['capitulo_id']} · {destino}: {documento['extracto']}",
+            key=f"search_hit_{n}",
+            on_click=go_to_search_result,
+            args=(documento,),
+            use_container_width=True
+        )
+
 st.sidebar.markdown("---")
 
+if not catalogo:
+    st.error(f"No se encontraron capítulos en '{BASE_PATH}'.")
+    st.stop()
+
+# 4.0. Selector de Libro/Volumen (solo si hay más de uno)
+if len(catalogo) > 1:
+    libro_index = st.sidebar.selectbox(
+        "Seleccionar **Libro**:",
+        options=range(len(catalogo)),
+        format_func=lambda i: f"{catalogo[i]['libro']}, Volumen {catalogo[i]['volumen']}",
+        key='book_selector'
+    )
+else:
+    libro_index = 0
+libro = catalogo[libro_index]
+
+# --- Manejo del estado para la selección del capítulo (Inicialización) ---
+if 'selected_chapter' not in st.session_state:
+    st.session_state.selected_chapter = libro['partes'][0]['capitulos'][0]['key']
+
 # 4.1. Selector de Parte del Libro (Selectbox)
-part_keys = list(CAPITULO_GRUPOS.keys())
+part_labels = {part_label(i, parte): parte for i, parte in enumerate(libro['partes'], start=1)}
+part_keys = list(part_labels)
+
+if st.session_state.get('selected_part_key') not in part_labels:
+    # Parte inicial: la que contiene el capítulo seleccionado (o la primera)
+    st.session_state.selected_part_key = next(
+        (label for label, parte in part_labels.items()
+         if any(c['key'] == st.session_state.selected_chapter for c in parte['capitulos'])),
+        part_keys[0]
+    )
 
 # Determinar el índice actual para la selección
-try:
-    current_part_index = part_keys.index(st.session_state.selected_part_key)
-except ValueError:
-    current_part_index = 0 # Default a la primera parte
+current_part_index = part_keys.index(st.session_state.selected_part_key)
 
 selected_part_key = st.sidebar.selectbox(
     "Seleccionar **Parte del Libro**:",
@@ -98,8 +256,9 @@ selected_part_key = st.sidebar.selectbox(
 st.session_state.selected_part_key = selected_part_key # Actualiza el estado
 
 # 4.2. Obtener Capítulos de la Parte Seleccionada
-current_chapter_ids = CAPITULO_GRUPOS[selected_part_key]
-current_options = {id: TITULOS_CAPITULOS.get(id, f"Capítulo {id} (Título no disponible)") for id in current_chapter_ids}
+current_chapters = part_labels[selected_part_key]['capitulos']
+current_chapter_ids = [c['key'] for c in current_chapters]
+current_options = {c['key']: c['titulo'] for c in current_chapters}
 
 # 4.3. Selector de Capítulo (Radio Button)
 try:
@@ -128,12 +287,18 @@ st.sidebar.radio(
 capitulo_seleccionado = st.session_state.selected_chapter
 
 st.sidebar.markdown("---")
-st.sidebar.info("⚛️ Guía de Estudio Basada en Serway & Jewett, Volumen 1.")
+for filename, errores in sorted(capitulos_vivos.rejected.items()):
+    detalle = "\n".join(f"- línea {linea}, col {columna}: {mensaje}" for linea, columna, mensaje in errores[:5])
+    st.sidebar.warning(f"**{filename}** tiene errores; se sigue mostrando la última versión válida.\n\n{detalle}")
+st.sidebar.info(f"⚛️ Guía de Estudio Basada en {libro['libro']}, Volumen {libro['volumen']}.")
+rerun.lap('barra_lateral')
 
 
 # --- 5. ÁREA PRINCIPAL (RENDERIZADO DEL CONTENIDO) ---
 if capitulo_seleccionado:
+    rerun.chapter = capitulo_seleccionado
     data, error = load_chapter_data(capitulo_seleccionado)
+    rerun.lap('carga')
 
     if error:
         st.error(error)
@@ -143,7 +308,7 @@ if capitulo_seleccionado:
         # 5.1. Título y Subtítulo (Diseño Solicitado)
 
         # Extraer el nombre de la parte (e.g., "PARTE 3: Termodinámica (Caps. 19-22)")
-        part_key_display = selected_part_key.replace("📚 ", "").replace("🌊 ", "").replace("🔥 ", "")
+        part_key_display = selected_part_key.split(" ", 1)[1]
 
         # Título Grande: Capítulo X: Título (Diseño solicitado)
         st.title(f"{data['titulo']}")
@@ -153,43 +318,76 @@ if capitulo_seleccionado:
 
         st.markdown("---")
 
-        # Implementación del Diseño Moderno con PESTAÑAS
-        tab_teoria, tab_ejercicios = st.tabs(["📘 Teoría y Conceptos Clave", "🧠 Ejercicios Resueltos"])
-
-        # --- Pestaña de Teoría ---
-        with tab_teoria:
+        # Selector de vista en lugar de st.tabs: las pestañas ejecutan y envían el contenido
+        # de todas las vistas, mientras que aquí solo se construye la vista elegida.
+        vista = st.radio(
+            "Vista:",
+            options=[VISTA_TEORIA, VISTA_EJERCICIOS],
+            horizontal=True,
+            label_visibility="collapsed",
+            key='vista_capitulo'
+        )
+
+        # --- Vista de Teoría ---
+        if vista == VISTA_TEORIA:
             if data['secciones'] and data['secciones'][0]['tipo'] == 'teoria':
                 teoria = data['secciones'][0]
                 st.header(teoria['titulo'])
 
-                st.markdown(teoria['contenido_markdown'])
+                show_markdown(teoria['contenido_markdown'])
 
-                img_data = IMAGENES_CAPITULOS.get(capitulo_seleccionado)
+                img_data = IMAGENES_CAPITULOS.get(data['capitulo_id'])
+                diagrama = get_image_assets().diagram(capitulo_seleccionado)
 
-                if img_data:
+                if diagrama or img_data:
                     st.markdown("### 🖼️ Diagrama Clave del Concepto")
-                    if img_data['url']:
-                        st.image(img_data['url'], caption=img_data['prompt'])
+                    if diagrama:
+                        # Se envía la miniatura; la versión completa solo si se pide
+                        completa = st.toggle("🔍 Ver a tamaño completo", key=f"diagrama_{capitulo_seleccionado}")
+                        show_diagram(diagrama, 'completa' if completa else 'miniatura',
+                                     img_data['prompt'] if img_data else None)
                     else:
-                        st.warning("Diagrama Faltante: Integre esta imagen para mejor visualización.")
+                        st.warning(f"Diagrama Faltante: agregue la imagen como `diagramas/{capitulo_seleccionado}.png` "
+                                   "y ejecute `python utils/image_assets.py`.")
                         st.code(f"Prompt para generación de IA: {img_data['prompt']}", language='text')
 
             else:
                 st.warning("Contenido de teoría no estructurado correctamente en el JSON.")
 
-        # --- Pestaña de Ejercicios ---
-        with tab_ejercicios:
+        # --- Vista de Ejercicios ---
+        else:
             if len(data['secciones']) > 1 and data['secciones'][1]['tipo'] == 'ejercicios':
                 ejercicios_seccion = data['secciones'][1]
                 st.header(ejercicios_seccion['titulo'])
                 ejercicios = ejercicios_seccion['ejercicios']
 
+                # st.expander siempre envía su contenido aunque esté cerrado, así que cada
+                # ejercicio muestra solo su enunciado y un interruptor; la solución se carga
+                # y se renderiza únicamente cuando el interruptor está activo.
                 for ejercicio in ejercicios:
-                    with st.expander(f"**{ejercicio['enunciado']}**"):
-                        st.markdown("---")
-                        st.markdown("#### ✅ Solución Detallada")
-                        st.markdown(ejercicio['solucion_markdown'])
-                        st.markdown("---")
+                    with st.container(border=True):
+                        st.markdown(f"**{ejercicio['enunciado']}**")
+                        rerun.payload(len(ejercicio['enunciado'].encode('utf-8')))
+                        abierto = st.toggle(
+                            "✅ Mostrar Solución Detallada",
+                            key=f"solucion_{ejercicio['solucion_ref']}"
+                        )
+                        if abierto:
+                            solucion = load_exercise_solution(ejercicio['solucion_ref'])
+                            st.markdown("---")
+                            if solucion is not None:
+                                show_markdown(solucion)
+                            else:
+                                st.warning("Solución no disponible en el paquete de capítulos.")
 
             else:
                 st.info("Este capítulo no contiene ejercicios resueltos.")
+
+        rerun.lap('teoria' if vista == VISTA_TEORIA else 'ejercicios')
+
+# --- 6. MÉTRICAS DE LA EJECUCIÓN ---
+REGISTRY.set_gauge('guia_cache_memoria_bytes', process_memory().stats()['bytes'])
+resumen = rerun.finish()
+write_textfile()
+if DEBUG_PANEL or st.query_params.get("debug") == "1":
+    show_debug_panel(resumen)
@@ -0,0 +1,344 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(UTILS_DIR)
+
+# --- CONFIGURACIÓN ---
+INPUT_DIR = "json_capitulos"
+BENCH_DIR = os.path.join("cache", "bench")
+# Una etapa es una regresión si tarda (o usa) más de esta fracción por encima de la línea base...
+DEFAULT_THRESHOLD = 0.25
+# ...y la diferencia supera estos mínimos, para no fallar por ruido en etapas de milisegundos
+MIN_REGRESSION_SECONDS = 0.05
+MIN_REGRESSION_BYTES = 1024 * 1024
+REPORT_VERSION = 1
+# ---------------------
+
+# Banco de pruebas del pipeline de contenido.
+#
+# Genera un corpus sintético de N capítulos a partir de los reales (mismas estructuras y
+# ecuaciones, con los números cambiados para que cada capítulo tenga otro hash), lo copia
+# a un directorio temporal y corre cada etapa midiendo tiempo de pared, tiempo de CPU y
+# pico de memoria Python (tracemalloc; no ve a los procesos del pool). El informe es JSON
+# y se puede guardar como línea base; al comparar contra una, cualquier etapa que empeore
+# más del umbral hace salir con código 1.
+
+_DECIMAL = re.compile(r'(?<![\w.])(\d+)\.(\d+)(?![\w.])')
+
+
+# --- 1. CORPUS SINTÉTICO ---
+def _load_templates(source_dir):
+    templates = []
+    for filename in sorted(os.listdir(source_dir)):
+        if filename.startswith('capitulo_') and filename.endswith('.json'):
+            try:
+                with open(os.path.join(source_dir, filename), 'r', encoding='utf-8') as f:
+                    templates.append(json.load(f))
+            except json.JSONDecodeError:
+                continue
+    return templates
+
+
+def _perturb(text, rng):
+    """Cambia los decimales del texto por otros del mismo formato (la estructura no cambia)."""
+    def replace(match):
+        whole = rng.randint(1, 10 ** len(match.group(1)) - 1) if len(match.group(1)) > 1 else rng.randint(0, 9)
+        return f"{whole}.{rng.randint(0, 10 ** len(match.group(2)) - 1):0{len(match.group(2))}d}"
+    return _DECIMAL.sub(replace, text)
+
+
+def generate_corpus(chapters, output_dir, source_dir=INPUT_DIR, seed=0):
+    """Escribe `chapters` capítulos sintéticos válidos en `output_dir`. Devuelve la lista de rutas."""
+    templates = _load_templates(source_dir)
+    if not templates:
+        raise ValueError(f"No hay capítulos válidos en '{source_dir}' para usar como plantilla.")
+    os.makedirs(output_dir, exist_ok=True)
+    width = max(2, len(str(chapters)))
+    paths = []
+    for number in range(1, chapters + 1):
+        rng = random.Random(seed * 1_000_003 + number)
+        data = json.loads(json.dumps(templates[(number - 1) % len(templates)]))
+        data['capitulo_id'] = number
+        data['titulo'] = re.sub(r'^Capítulo \d+', f'Capítulo {number}', data['titulo'])
+        for section in data.get('secciones', []):
+            if 'contenido_markdown' in section:
+                section['contenido_markdown'] = _perturb(section['contenido_markdown'], rng)
+            for ejercicio in section.get('ejercicios', []) or []:
+                for field in ('enunciado', 'solucion_markdown'):
+                    if field in ejercicio:
+                        ejercicio[field] = _perturb(ejercicio[field], rng)
+        path = os.path.join(output_dir, f"capitulo_{number:0{width}d}.json")
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        paths.append(path)
+    return paths
+
+
+# --- 2. ETAPAS ---
+# Cada etapa corre con el directorio de trabajo en el espacio temporal (los scripts usan
+# rutas relativas) y devuelve la cantidad de elementos que procesó.
+def _chapter_paths():
+    return sorted(glob.glob(os.path.join(INPUT_DIR, 'capitulo_*.json')))
+
+
+def stage_check_json():
+    from check_json import check_files
+    invalid = sum(1 for _, errors in check_files(_chapter_paths()) if errors)
+    if invalid:
+        raise RuntimeError(f"{invalid} capítulos sintéticos no pasan el esquema")
+    return len(_chapter_paths())
+
+
+def stage_lint_latex():
+    from lint_latex import lint_files
+    return sum(1 for _ in lint_files(_chapter_paths(), cache_path=None))
+
+
+def stage_fix_latex():
+    from chapter_store import ChapterStore
+    from fix_latex import fix_store
+    store = ChapterStore(INPUT_DIR)
+    results = fix_store(store)
+    store.commit()
+    return len(results)
+
+
+def stage_migrate_to_myst():
+    from migrate_to_myst import migrate
+    migrate()
+    return len(_chapter_paths())
+
+
+def stage_fix_all_chapters():
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+    from fix_all_chapters import aplicar_correcciones
+    from migrate_to_myst import OUTPUT_DIR
+    paths = sorted(glob.glob(os.path.join(OUTPUT_DIR, 'capitulo_*.myst')))
+    for _ in aplicar_correcciones(paths):
+        pass
+    return len(paths)
+
+
+def stage_chapter_bundle():
+    from chapter_bundle import build_bundle
+    return build_bundle(INPUT_DIR, os.path.join('cache', 'capitulos.bundle'))
+
+
+def stage_app_load():
+    """El camino de `load_chapter_data`/`load_exercise_solution` de la app, sin Streamlit."""
+    from chapter_bundle import ChapterBundle
+    from content_cache import BundleTier, MemoryLRU, TieredCache
+    bundle = ChapterBundle(os.path.join('cache', 'capitulos.bundle'))
+    cache = TieredCache(BundleTier(bundle), MemoryLRU())
+    for key in list(bundle.keys()):
+        cache.get(key)
+    loaded = len(bundle.index)
+    bundle.close()
+    return loaded
+
+
+def stage_render():
+    from chapter_bundle import load_chapter_json
+    from render_cache import iter_chapter_fragments, render_fragments
+    fragments = []
+    for path in _chapter_paths():
+        data, error = load_chapter_json(path, path)
+        if data is not None:
+            fragments.extend(iter_chapter_fragments(data))
+    render_fragments(fragments, os.path.join('cache', 'render'))
+    return len(fragments)
+
+
+def stage_search_index():
+    from search_index import SearchIndex, build_search_index
+    documents = build_search_index(INPUT_DIR, os.path.join('cache', 'busqueda.index'))
+    index = SearchIndex(os.path.join('cache', 'busqueda.index'))
+    for query in ('energía cinética', r'\frac{1}{2}mv^2', 'F = ma', 'presión hidrostática'):
+        index.search(query)
+    index.close()
+    return documents
+
+
+# En orden de pipeline: cada etapa usa lo que dejaron las anteriores
+STAGES = {
+    'check_json': stage_check_json,
+    'lint_latex': stage_lint_latex,
+    'fix_latex': stage_fix_latex,
+    'migrate_to_myst': stage_migrate_to_myst,
+    'fix_all_chapters': stage_fix_all_chapters,
+    'chapter_bundle': stage_chapter_bundle,
+    'app_load': stage_app_load,
+    'render': stage_render,
+    'search_index': stage_search_index,
+}
+# Etapas que necesitan la salida de otra; si esa no se mide, se corre antes sin medirla
+STAGE_REQUIRES = {
+    'fix_all_chapters': 'migrate_to_myst',
+    'app_load': 'chapter_bundle',
+}
+
+
+# --- 3. MEDICIÓN ---
+def measure(stage, trace_memory=True):
+    """Corre una etapa y devuelve sus métricas; la salida por consola de los scripts se descarta."""
+    if trace_memory:
+        tracemalloc.start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()):
+        items = stage()
+    result = {
+        'segundos': time.perf_counter() - wall_start,
+        'cpu_segundos': time.process_time() - cpu_start,
+        'elementos': items,
+    }
+    if trace_memory:
+        result['pico_bytes'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+
+def run_benchmark(chapters, stages=None, repeat=1, trace_memory=True, source_dir=INPUT_DIR, keep=False):
+    """
+    Genera el corpus y corre las etapas `repeat` veces (cada vez sobre un corpus nuevo);
+    por etapa se informa la repetición más rápida. Devuelve el informe.
+    """
+    names = [name for name in STAGES if stages is None or name in stages]
+    source_dir = os.path.abspath(source_dir)
+    results = {}
+    original_cwd = os.getcwd()
+    sys.path.insert(0, UTILS_DIR)
+    for _ in range(repeat):
+        workspace = tempfile.mkdtemp(prefix='bench_pipeline_')
+        try:
+            generate_corpus(chapters, os.path.join(workspace, INPUT_DIR), source_dir)
+            os.chdir(workspace)
+            for name in names:
+                required = STAGE_REQUIRES.get(name)
+                if required and required not in names:
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        STAGES[required]()
+                try:
+                    result = measure(STAGES[name], trace_memory)
+                except ImportError as e:
+                    # Dependencia opcional ausente (p. ej. markdown-it para el render)
+                    results.setdefault(name, {'omitida': f"falta una dependencia: {e.name}"})
+                    continue
+                best = results.get(name)
+                if best is None or 'omitida' in best or result['segundos'] < best['segundos']:
+                    results[name] = result
+        finally:
+            os.chdir(original_cwd)
+            if keep:
+                print(f"📁 Espacio de trabajo conservado en '{workspace}'.")
+            else:
+                shutil.rmtree(workspace, ignore_errors=True)
+
+    return {
+        'version': REPORT_VERSION,
+        'capitulos': chapters,
+        'repeticiones': repeat,
+        'memoria': trace_memory,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'etapas': results,
+    }
+
+
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Devuelve la lista de regresiones (mensajes) de `report` respecto de `baseline`."""
+    if baseline.get('capitulos') != report['capitulos']:
+        raise ValueError(f"La línea base es de {baseline.get('capitulos')} capítulos y la corrida de {report['capitulos']}.")
+    regressions = []
+    for name, current in report['etapas'].items():
+        previous = baseline.get('etapas', {}).get(name)
+        if not previous or 'omitida' in previous or 'omitida' in current:
+            continue
+        # Con tracemalloc activo los tiempos no son comparables con una corrida sin él
+        if baseline.get('memoria') == report['memoria']:
+            limit = previous['segundos'] * (1 + threshold)
+            if current['segundos'] > limit and current['segundos'] - previous['segundos'] > MIN_REGRESSION_SECONDS:
+                regressions.append(f"{name}: {current['segundos']:.3f} s contra {previous['segundos']:.3f} s de la línea base "
+                                   f"(+{(current['segundos'] / previous['segundos'] - 1) * 100:.0f}%)")
+        if 'pico_bytes' in current and 'pico_bytes' in previous:
+            limit = previous['pico_bytes'] * (1 + threshold)
+            if current['pico_bytes'] > limit and current['pico_bytes'] - previous['pico_bytes'] > MIN_REGRESSION_BYTES:
+                regressions.append(f"{name}: pico de {current['pico_bytes'] / 1e6:.1f} MB contra "
+                                   f"{previous['pico_bytes'] / 1e6:.1f} MB de la línea base")
+    return regressions
+
+
+def print_report(report):
+    print(f"📏 {report['capitulos']} capítulos, mejor de {report['repeticiones']} repeticiones")
+    print(f"{'etapa':<18} {'segundos':>9} {'cpu':>9} {'pico MB':>9} {'elementos':>10} {'ms/elem':>9}")
+    for name, result in report['etapas'].items():
+        if 'omitida' in result:
+            print(f"{name:<18} {'—':>9}  ({result['omitida']})")
+            continue
+        peak = f"{result['pico_bytes'] / 1e6:9.1f}" if 'pico_bytes' in result else f"{'—':>9}"
+        per_item = result['segundos'] * 1000 / result['elementos'] if result['elementos'] else 0.0
+        print(f"{name:<18} {result['segundos']:9.3f} {result['cpu_segundos']:9.3f} {peak} "
+              f"{result['elementos']:>10} {per_item:9.2f}")
+
+
+def default_baseline_path(chapters):
+    return os.path.join(BENCH_DIR, f"baseline_{chapters}.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mide tiempo y memoria de cada etapa del pipeline sobre un corpus sintético.")
+    parser.add_argument('--chapters', type=int, default=22, help="Cantidad de capítulos sintéticos (22 a 10000; por defecto 22).")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=None, help="Etapas a medir (por defecto, todas).")
+    parser.add_argument('--repeat', type=int, default=1, help="Repeticiones; se informa la más rápida de cada etapa.")
+    parser.add_argument('--no-memory', action='store_true', help="No usa tracemalloc (tiempos sin su sobrecosto).")
+    parser.add_argument('--json', metavar='RUTA', help="Guarda el informe en RUTA.")
+    parser.add_argument('--save-baseline', nargs='?', const='', metavar='RUTA',
+                        help=f"Guarda el informe como línea base (por defecto '{default_baseline_path('N')}').")
+    parser.add_argument('--baseline', nargs='?', const='', metavar='RUTA',
+                        help="Compara contra una línea base y sale con 1 si alguna etapa empeoró.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Fracción de empeoramiento tolerada (por defecto {DEFAULT_THRESHOLD}).")
+    parser.add_argument('--keep', action='store_true', help="Conserva el directorio temporal con el corpus y las salidas.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+        sys.exit(1)
+
+    print(f"--- ⏱️ Midiendo el pipeline con {args.chapters} capítulos sintéticos ---")
+    report = run_benchmark(args.chapters, args.stages, args.repeat, not args.no_memory, keep=args.keep)
+    print_report(report)
+
+    for path in (args.json, None if args.save_baseline is None else args.save_baseline or default_baseline_path(args.chapters)):
+        if path:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"💾 Informe guardado en '{path}'.")
+
+    if args.baseline is not None:
+        baseline_path = args.baseline or default_baseline_path(args.chapters)
+        with open(baseline_path, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            for message in regressions:
+                print(f"❌ Regresión en {message}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto de '{baseline_path}' (umbral {args.threshold:.0%}).")
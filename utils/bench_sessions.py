@@ -0,0 +1,403 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_pipeline import BENCH_DIR, DEFAULT_THRESHOLD, INPUT_DIR, MIN_REGRESSION_BYTES, generate_corpus
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(UTILS_DIR, "app.py")
+
+# --- CONFIGURACIÓN ---
+# Tiempo máximo de una ejecución del script antes de darla por colgada, en segundos
+RERUN_TIMEOUT = 120.0
+# Una latencia es regresión si supera la de la línea base en DEFAULT_THRESHOLD y en este mínimo
+MIN_REGRESSION_LATENCY = 0.01
+REPORT_VERSION = 1
+# Recorridos de navegación por defecto: listas de pasos [acción, argumento].
+#   parte N        elige la parte N del selector (módulo la cantidad de partes)
+#   capitulo N     elige el capítulo N de la parte, desplazado según el número de sesión
+#   vista V        'teoria' o 'ejercicios'
+#   solucion N     abre la solución del ejercicio N
+#   diagrama       alterna el diagrama a tamaño completo
+#   buscar TEXTO   escribe en el buscador
+#   resultado N    abre el resultado N de la búsqueda
+DEFAULT_PATHS = {
+    'teoria': [['parte', 0], ['capitulo', 0], ['diagrama'], ['capitulo', 1], ['capitulo', 2]],
+    'ejercicios': [['parte', 0], ['capitulo', 0], ['vista', 'ejercicios'], ['solucion', 0], ['capitulo', 1], ['solucion', 0]],
+    'busqueda': [['buscar', 'energía cinética'], ['resultado', 0], ['buscar', r'\frac{1}{2}mv^2'], ['resultado', 1]],
+    'repaso': [['parte', 2], ['capitulo', 1], ['parte', 1], ['capitulo', 2], ['parte', 0], ['capitulo', 4],
+               ['vista', 'ejercicios'], ['solucion', 0]],
+}
+# ---------------------
+
+# Prueba de carga de la app con sesiones simultáneas.
+#
+# Cada sesión es un `AppTest` de Streamlit (sin navegador ni red) que sigue un recorrido de
+# navegación: cada paso cambia un widget y vuelve a ejecutar el script completo, igual que
+# una interacción real. Las sesiones corren en hilos del mismo proceso, como en un servidor
+# de Streamlit, así que comparten los `st.cache_resource` (paquete, caché, índice). AppTest
+# no se puede ejecutar en paralelo (instala su runtime simulado en una variable global de
+# Streamlit), así que las ejecuciones pasan de a una por un candado: es el caso de un
+# servidor con un solo núcleo, donde el GIL también las serializa. La latencia se mide
+# desde que la sesión pide la ejecución, con la espera incluida, y el tiempo de servicio
+# sin ella. Antes de medir, una sesión de calentamiento recorre todo una vez.
+#
+# El informe trae rendimiento (ejecuciones por segundo), latencias p50/p95/p99 por paso y
+# en total, y la memoria residente que suma cada sesión abierta. Se guarda como JSON con el
+# commit, y se puede comparar contra otro informe como en bench_pipeline.py.
+#
+# La latencia incluye el armado del árbol de elementos de AppTest (no el envío al
+# navegador): sirve para comparar commits entre sí, no como tiempo absoluto de servidor.
+
+
+# --- 1. PASOS ---
+def _step_parte(at, session, index):
+    selector = at.selectbox(key='part_selector')
+    selector.select_index(index % len(selector.options))
+    return True
+
+
+def _step_capitulo(at, session, index):
+    radio = at.radio(key='chapter_radio_key')
+    radio.set_value(radio.options[(index + session) % len(radio.options)])
+    return True
+
+
+def _step_vista(at, session, vista):
+    radio = at.radio(key='vista_capitulo')
+    radio.set_value(radio.options[1 if vista == 'ejercicios' else 0])
+    return True
+
+
+def _widgets_with_prefix(elements, prefix):
+    return [element for element in elements if element.key and element.key.startswith(prefix)]
+
+
+def _step_solucion(at, session, index):
+    toggles = _widgets_with_prefix(at.toggle, 'solucion_')
+    if index >= len(toggles):
+        return False
+    toggles[index].set_value(not toggles[index].value)
+    return True
+
+
+def _step_diagrama(at, session):
+    toggles = _widgets_with_prefix(at.toggle, 'diagrama_')
+    if not toggles:
+        return False
+    toggles[0].set_value(not toggles[0].value)
+    return True
+
+
+def _step_buscar(at, session, query):
+    at.text_input(key='search_query').input(query)
+    return True
+
+
+def _step_resultado(at, session, index):
+    buttons = _widgets_with_prefix(at.button, 'search_hit_')
+    if index >= len(buttons):
+        return False
+    buttons[index].click()
+    return True
+
+
+STEPS = {
+    'parte': _step_parte,
+    'capitulo': _step_capitulo,
+    'vista': _step_vista,
+    'solucion': _step_solucion,
+    'diagrama': _step_diagrama,
+    'buscar': _step_buscar,
+    'resultado': _step_resultado,
+}
+
+
+def load_paths(path):
+    """Lee recorridos grabados ({nombre: [[acción, argumento], ...]}) y valida sus acciones."""
+    with open(path, 'r', encoding='utf-8') as f:
+        paths = json.load(f)
+    for name, steps in paths.items():
+        for step in steps:
+            if step[0] not in STEPS:
+                raise ValueError(f"Recorrido '{name}': acción desconocida '{step[0]}' (opciones: {', '.join(STEPS)})")
+    return paths
+
+
+# --- 2. SESIONES ---
+def _rss_bytes():
+    """Memoria residente actual del proceso (Linux); None si no se puede leer."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _new_session():
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT)
+
+
+_run_lock = threading.Lock()
+
+
+def _run_step(at, name, step, samples, errors):
+    """Aplica `step` (o nada) y ejecuta el script. Agrega (paso, latencia, servicio) a `samples`."""
+    requested = time.perf_counter()
+    with _run_lock:
+        started = time.perf_counter()
+        if step is not None and not step(at):
+            return
+        at.run()
+        finished = time.perf_counter()
+    samples.append((name, finished - requested, finished - started))
+    errors.extend(f"{name}: {exception.message}" for exception in at.exception)
+
+
+def run_session(at, number, steps, iterations, think_time, samples, errors):
+    """Abre la app y sigue `steps` `iterations` veces; agrega las mediciones a `samples`."""
+    _run_step(at, 'inicio', None, samples, errors)
+    for _ in range(iterations):
+        for action, *args in steps:
+            if think_time:
+                time.sleep(think_time)
+            _run_step(at, action, lambda at: STEPS[action](at, number, *args), samples, errors)
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por rango más cercano de una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(1, math.ceil(len(sorted_values) * fraction)) - 1]
+
+
+def summarize(durations):
+    durations = sorted(durations)
+    return {
+        'n': len(durations),
+        'p50': percentile(durations, 0.50),
+        'p95': percentile(durations, 0.95),
+        'p99': percentile(durations, 0.99),
+        'max': durations[-1] if durations else 0.0,
+        'media': sum(durations) / len(durations) if durations else 0.0,
+    }
+
+
+def _git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=UTILS_DIR,
+                                check=True, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=UTILS_DIR,
+                               check=True, capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return f"{commit}-modificado" if dirty else commit
+
+
+def run_load_test(sessions, iterations=1, paths=None, think_time=0.0):
+    """
+    Corre `sessions` sesiones a la vez desde el directorio actual (con json_capitulos/) y
+    devuelve el informe. La sesión i sigue el recorrido i módulo la cantidad de recorridos.
+    """
+    paths = paths or DEFAULT_PATHS
+    names = list(paths)
+    if UTILS_DIR not in sys.path:
+        sys.path.insert(0, UTILS_DIR)
+
+    # Calentamiento: abre los recursos compartidos (paquete, índice, render) una vez
+    with contextlib.redirect_stdout(io.StringIO()):
+        warmup = _new_session()
+        warmup_errors = []
+        for number, name in enumerate(names):
+            run_session(warmup, number, paths[name], 1, 0.0, [], warmup_errors)
+        del warmup
+    gc.collect()
+    rss_base = _rss_bytes()
+
+    apps = [_new_session() for _ in range(sessions)]
+    samples = [[] for _ in range(sessions)]
+    errors = [[] for _ in range(sessions)]
+    start_barrier = threading.Barrier(sessions)
+
+    def worker(number):
+        start_barrier.wait()
+        run_session(apps[number], number, paths[names[number % len(names)]], iterations, think_time,
+                    samples[number], errors[number])
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=sessions) as executor:
+        for future in [executor.submit(worker, number) for number in range(sessions)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+    # Las sesiones siguen abiertas: la diferencia de RSS es lo que ocupan N sesiones vivas
+    gc.collect()
+    rss = _rss_bytes()
+
+    all_samples = [sample for session_samples in samples for sample in session_samples]
+    by_step = {}
+    for name, latency, _ in all_samples:
+        by_step.setdefault(name, []).append(latency)
+    all_errors = warmup_errors + [error for session_errors in errors for error in session_errors]
+
+    return {
+        'version': REPORT_VERSION,
+        'commit': _git_commit(),
+        'sesiones': sessions,
+        'iteraciones': iterations,
+        'pausa_segundos': think_time,
+        'recorridos': paths,
+        'capitulos': len([f for f in os.listdir(INPUT_DIR) if f.startswith('capitulo_') and f.endswith('.json')]),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'cpus': os.cpu_count(),
+        'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'segundos': elapsed,
+        'ejecuciones': len(all_samples),
+        'ejecuciones_por_segundo': len(all_samples) / elapsed if elapsed else 0.0,
+        'latencia': summarize([latency for _, latency, _ in all_samples]),
+        'servicio': summarize([service for _, _, service in all_samples]),
+        'por_paso': {name: summarize(durations) for name, durations in by_step.items()},
+        'memoria': {
+            'rss_base_bytes': rss_base,
+            'rss_bytes': rss,
+            'por_sesion_bytes': (rss - rss_base) / sessions if rss is not None and rss_base is not None else None,
+        },
+        'errores': all_errors[:20],
+        'cantidad_errores': len(all_errors),
+    }
+
+
+def run_on_corpus(chapters, keep=False, **options):
+    """Corre la prueba sobre un corpus sintético de `chapters` capítulos en un directorio temporal."""
+    source_dir = os.path.abspath(INPUT_DIR)
+    original_cwd = os.getcwd()
+    workspace = tempfile.mkdtemp(prefix='bench_sessions_')
+    try:
+        generate_corpus(chapters, os.path.join(workspace, INPUT_DIR), source_dir)
+        os.chdir(workspace)
+        try:
+            from render_cache import render_all
+            with contextlib.redirect_stdout(io.StringIO()):
+                render_all()
+        except ImportError:
+            # Sin markdown-it la app deja el render al navegador; también se puede medir así
+            pass
+        return run_load_test(**options)
+    finally:
+        os.chdir(original_cwd)
+        if keep:
+            print(f"📁 Espacio de trabajo conservado en '{workspace}'.")
+        else:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+
+# --- 3. INFORME ---
+def compare(report, baseline, threshold=DEFAULT_THRESHOLD):
+    """Devuelve la lista de regresiones (mensajes) de `report` respecto de `baseline`."""
+    for field in ('sesiones', 'iteraciones', 'recorridos', 'capitulos'):
+        if baseline.get(field) != report[field]:
+            raise ValueError(f"La línea base no es comparable: '{field}' es distinto.")
+    regressions = []
+    # Se compara el tiempo de servicio: la latencia con espera sigue de cerca al rendimiento
+    for name in ('p50', 'p95', 'p99'):
+        current, previous = report['servicio'][name], baseline['servicio'][name]
+        if current > previous * (1 + threshold) and current - previous > MIN_REGRESSION_LATENCY:
+            regressions.append(f"servicio {name}: {current * 1000:.0f} ms contra {previous * 1000:.0f} ms de la línea base")
+    current, previous = report['ejecuciones_por_segundo'], baseline['ejecuciones_por_segundo']
+    if current < previous / (1 + threshold):
+        regressions.append(f"rendimiento: {current:.1f} ejecuciones/s contra {previous:.1f} de la línea base")
+    current, previous = report['memoria']['por_sesion_bytes'], baseline['memoria'].get('por_sesion_bytes')
+    if current is not None and previous is not None:
+        if current > previous * (1 + threshold) and current - previous > MIN_REGRESSION_BYTES:
+            regressions.append(f"memoria por sesión: {current / 1e6:.1f} MB contra {previous / 1e6:.1f} MB de la línea base")
+    return regressions
+
+
+def print_report(report):
+    print(f"📏 {report['sesiones']} sesiones × {report['iteraciones']} iteraciones sobre {report['capitulos']} capítulos "
+          f"(commit {report['commit'] or '—'})")
+    print(f"   {report['ejecuciones']} ejecuciones en {report['segundos']:.2f} s: "
+          f"{report['ejecuciones_por_segundo']:.1f} ejecuciones/s")
+    print(f"{'paso':<12} {'n':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9}")
+    for name, stats in [*report['por_paso'].items(), ('TOTAL', report['latencia']), ('servicio', report['servicio'])]:
+        print(f"{name:<12} {stats['n']:>6} {stats['p50'] * 1000:9.1f} {stats['p95'] * 1000:9.1f} "
+              f"{stats['p99'] * 1000:9.1f} {stats['max'] * 1000:9.1f}")
+    per_session = report['memoria']['por_sesion_bytes']
+    if per_session is not None:
+        print(f"🧠 Memoria residente: {report['memoria']['rss_bytes'] / 1e6:.0f} MB, "
+              f"{per_session / 1e6:.2f} MB por sesión abierta")
+    if report['cantidad_errores']:
+        print(f"⚠️ {report['cantidad_errores']} ejecuciones con excepciones; la primera: {report['errores'][0]}")
+
+
+def default_report_path(report):
+    return os.path.join(BENCH_DIR, f"sesiones_{report['sesiones']}_{report['commit'] or 'sin_git'}.json")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Prueba de carga de la app con N sesiones simultáneas (Streamlit AppTest).")
+    parser.add_argument('--sessions', type=int, default=10, help="Sesiones simultáneas (por defecto 10).")
+    parser.add_argument('--iterations', type=int, default=3, help="Veces que cada sesión repite su recorrido (por defecto 3).")
+    parser.add_argument('--paths', metavar='RUTA', help="JSON con recorridos grabados (por defecto, los de DEFAULT_PATHS).")
+    parser.add_argument('--think', type=float, default=0.0, help="Pausa entre pasos, en segundos (por defecto 0: carga máxima).")
+    parser.add_argument('--chapters', type=int, default=None,
+                        help="Usa un corpus sintético de N capítulos en lugar de json_capitulos/.")
+    parser.add_argument('--save', nargs='?', const='', metavar='RUTA',
+                        help="Guarda el informe (por defecto 'cache/bench/sesiones_N_<commit>.json').")
+    parser.add_argument('--baseline', metavar='RUTA', help="Compara contra otro informe y sale con 1 si empeoró.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Fracción de empeoramiento tolerada (por defecto {DEFAULT_THRESHOLD}).")
+    parser.add_argument('--keep', action='store_true', help="Conserva el directorio temporal del corpus sintético.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+        sys.exit(1)
+    try:
+        import streamlit.testing.v1
+    except ImportError:
+        print("❌ ERROR: La prueba de carga necesita Streamlit (incluye AppTest).")
+        sys.exit(1)
+
+    options = {
+        'sessions': args.sessions,
+        'iterations': args.iterations,
+        'paths': load_paths(args.paths) if args.paths else None,
+        'think_time': args.think,
+    }
+    print(f"--- 👥 Probando la app con {args.sessions} sesiones simultáneas ---")
+    if args.chapters:
+        report = run_on_corpus(args.chapters, keep=args.keep, **options)
+    else:
+        report = run_load_test(**options)
+    print_report(report)
+
+    if args.save is not None:
+        path = args.save or default_report_path(report)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Informe guardado en '{path}'.")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            for message in regressions:
+                print(f"❌ Regresión en {message}")
+            sys.exit(1)
+        print(f"✅ Sin regresiones respecto de '{args.baseline}' (umbral {args.threshold:.0%}).")
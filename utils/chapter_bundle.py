@@ -0,0 +1,278 @@
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import struct
+
+# --- CONFIGURACIÓN ---
+INPUT_DIR = "json_capitulos"
+BUNDLE_PATH = os.path.join("cache", "capitulos.bundle")
+
+# Cabecera fija: firma, versión del formato y longitud del índice serializado.
+# Cambiar BUNDLE_VERSION obliga a recompilar el paquete en todas las réplicas.
+BUNDLE_MAGIC = b"FISBNDL\0"
+BUNDLE_VERSION = 3
+HEADER = struct.Struct("<8sIQ")
+
+# Libro y volumen para los capítulos que no declaran `libro`/`volumen` en su JSON
+DEFAULT_LIBRO = "Serway & Jewett"
+DEFAULT_VOLUMEN = 1
+# Parte para los capítulos cuyo JSON no se pudo leer (siguen visibles para ver el error)
+PARTE_CON_ERRORES = "Capítulos con errores"
+# ---------------------
+
+
+def file_sha256(file_path):
+    """Calcula el hash SHA-256 del contenido de un archivo."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def list_chapter_files(input_dir=INPUT_DIR):
+    """Devuelve los nombres de los JSON de capítulo, ordenados."""
+    if not os.path.isdir(input_dir):
+        return []
+    return sorted(f for f in os.listdir(input_dir) if f.startswith('capitulo_') and f.endswith('.json'))
+
+
+def load_chapter_json(file_path, chapter_label):
+    """
+    Carga un JSON de capítulo y devuelve la tupla (data, error) que consume la app.
+    Los mensajes de error son los mismos que mostraba `load_chapter_data`.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        return data, None
+    except json.JSONDecodeError as e:
+        error_msg = f"Error de formato JSON en el Capítulo {chapter_label} (Posición: {e.pos}). Revise cuidadosamente las barras invertidas ('\\\\' para LaTeX)."
+        return None, error_msg
+    except Exception as e:
+        return None, f"Error desconocido al cargar el capítulo {chapter_label}: {e}"
+
+
+def _chapter_label(filename):
+    """'capitulo_05.json' -> 5 (o el nombre base si no es numérico)."""
+    stem = filename[len('capitulo_'):-len('.json')]
+    return int(stem) if stem.isdigit() else stem
+
+
+def exercise_key(chapter_key, index):
+    """Clave del cuerpo de un ejercicio dentro del paquete: 'capitulo_05/ejercicio_000'."""
+    return f"{chapter_key}/ejercicio_{index:03d}"
+
+
+def split_chapter(chapter_key, data):
+    """
+    Separa el capítulo en un esqueleto liviano y los cuerpos de sus ejercicios.
+
+    El esqueleto conserva metadatos, teoría y el enunciado de cada ejercicio; la
+    `solucion_markdown` se reemplaza por `solucion_ref`, la clave con la que se
+    obtiene el cuerpo solo cuando el usuario abre el ejercicio.
+    """
+    bodies = []
+    skeleton = dict(data)
+    skeleton['secciones'] = []
+    for section in data.get('secciones', []):
+        section = dict(section)
+        if section.get('tipo') == 'ejercicios':
+            ejercicios = []
+            for ejercicio in section.get('ejercicios', []):
+                ejercicio = dict(ejercicio)
+                key = exercise_key(chapter_key, len(bodies))
+                bodies.append((key, {'solucion_markdown': ejercicio.pop('solucion_markdown', '')}))
+                ejercicio['solucion_ref'] = key
+                ejercicios.append(ejercicio)
+            section['ejercicios'] = ejercicios
+        skeleton['secciones'].append(section)
+    return skeleton, bodies
+
+
+def build_catalog(chapters):
+    """
+    Arma el catálogo de navegación a partir de los metadatos de cada capítulo.
+
+    `chapters` es una lista de (clave, data, error) en orden de archivo. El resultado
+    es una lista de libros {'libro', 'volumen', 'partes'}, cada parte con sus
+    capítulos {'key', 'capitulo_id', 'titulo'} ordenados por `capitulo_id`; libros y
+    partes aparecen en el orden de su primer capítulo.
+    """
+    books = {}
+    for key, data, error in chapters:
+        if data is None:
+            book_id = (DEFAULT_LIBRO, DEFAULT_VOLUMEN)
+            part_name = PARTE_CON_ERRORES
+            entry = {'key': key, 'capitulo_id': _chapter_label(f"{key}.json"), 'titulo': f"{key} (no se pudo leer)"}
+        else:
+            book_id = (data.get('libro', DEFAULT_LIBRO), data.get('volumen', DEFAULT_VOLUMEN))
+            part_name = data.get('parte', 'General')
+            entry = {'key': key, 'capitulo_id': data.get('capitulo_id'), 'titulo': data.get('titulo', key)}
+        books.setdefault(book_id, {}).setdefault(part_name, []).append(entry)
+
+    def order(entry):
+        chapter_id = entry['capitulo_id']
+        return (0, chapter_id, '') if isinstance(chapter_id, int) else (1, 0, str(chapter_id))
+
+    catalog = []
+    for (libro, volumen), parts in books.items():
+        partes = [{'nombre': name, 'capitulos': sorted(entries, key=order)} for name, entries in parts.items()]
+        # La parte de errores va siempre al final
+        partes.sort(key=lambda p: (p['nombre'] == PARTE_CON_ERRORES, order(p['capitulos'][0])))
+        catalog.append({'libro': libro, 'volumen': volumen, 'partes': partes})
+    return catalog
+
+
+def _source_stamp(file_path):
+    stat = os.stat(file_path)
+    return {"sha256": file_sha256(file_path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def sources_changed(sources, input_dir=INPUT_DIR):
+    """
+    Indica si los JSON de `input_dir` difieren de las marcas `sources` (ver `_source_stamp`).
+    Se compara primero tamaño y mtime; solo si difieren se recalcula el hash,
+    así un `git checkout` que toca mtimes sin cambiar contenido no fuerza recompilar.
+    """
+    filenames = list_chapter_files(input_dir)
+    if set(filenames) != set(sources):
+        return True
+    for filename in filenames:
+        stamp = sources[filename]
+        stat = os.stat(os.path.join(input_dir, filename))
+        if stat.st_size == stamp["size"] and stat.st_mtime_ns == stamp["mtime_ns"]:
+            continue
+        if file_sha256(os.path.join(input_dir, filename)) != stamp["sha256"]:
+            return True
+    return False
+
+
+def build_bundle(input_dir=INPUT_DIR, bundle_path=BUNDLE_PATH):
+    """
+    Compila todos los JSON de capítulo en un único archivo binario con índice de offsets.
+
+    Cada capítulo se guarda como la tupla (data, error) ya serializada con pickle, de modo
+    que la app no vuelve a parsear JSON; las soluciones van en entradas aparte (ver
+    `split_chapter`) y la cabecera incluye el catálogo de navegación (ver
+    `build_catalog`), así la barra lateral no necesita leer ningún capítulo.
+
+    La escritura es atómica (archivo temporal + rename) para que varias réplicas
+    puedan reconstruir el paquete a la vez sin leer archivos a medias.
+    """
+    payloads = []
+    sources = {}
+    chapters = []
+    for filename in list_chapter_files(input_dir):
+        file_path = os.path.join(input_dir, filename)
+        sources[filename] = _source_stamp(file_path)
+        chapter_key = filename[:-len('.json')]
+        data, error = load_chapter_json(file_path, _chapter_label(filename))
+        chapters.append((chapter_key, data, error))
+        bodies = []
+        if data is not None:
+            data, bodies = split_chapter(chapter_key, data)
+        payloads.append((chapter_key, pickle.dumps((data, error), protocol=pickle.HIGHEST_PROTOCOL)))
+        for key, body in bodies:
+            payloads.append((key, pickle.dumps(body, protocol=pickle.HIGHEST_PROTOCOL)))
+
+    # El índice guarda offsets relativos al final de la cabecera; se conocen antes de escribir.
+    index = {}
+    offset = 0
+    for key, blob in payloads:
+        index[key] = (offset, len(blob))
+        offset += len(blob)
+
+    header = pickle.dumps({"version": BUNDLE_VERSION, "sources": sources, "index": index,
+                           "catalog": build_catalog(chapters)},
+                          protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.makedirs(os.path.dirname(bundle_path) or '.', exist_ok=True)
+    tmp_path = f"{bundle_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(BUNDLE_MAGIC, BUNDLE_VERSION, len(header)))
+        f.write(header)
+        for _, blob in payloads:
+            f.write(blob)
+    os.replace(tmp_path, bundle_path)
+    return len(payloads)
+
+
+class ChapterBundle:
+    """Lector de solo lectura sobre el paquete mapeado en memoria."""
+
+    def __init__(self, bundle_path=BUNDLE_PATH):
+        self.path = bundle_path
+        with open(bundle_path, 'rb') as f:
+            # El mapa sigue siendo válido tras cerrar el archivo; las páginas se comparten
+            # entre todos los procesos que abren el mismo paquete.
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = HEADER.unpack_from(self._mm, 0)
+        if magic != BUNDLE_MAGIC or version != BUNDLE_VERSION:
+            self._mm.close()
+            raise ValueError(f"Paquete de capítulos incompatible: {bundle_path}")
+
+        header = pickle.loads(self._mm[HEADER.size:HEADER.size + header_len])
+        self.sources = header["sources"]
+        self.index = header["index"]
+        self.catalog = header["catalog"]
+        self._data_start = HEADER.size + header_len
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def keys(self):
+        return self.index.keys()
+
+    def get(self, key):
+        """Devuelve la entrada deserializada para `key` (p. ej. 'capitulo_05' o 'capitulo_05/ejercicio_000') o None."""
+        location = self.index.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        start = self._data_start + offset
+        return pickle.loads(self._mm[start:start + length])
+
+    def is_stale(self, input_dir=INPUT_DIR):
+        """Indica si algún JSON de origen cambió desde la compilación (ver `sources_changed`)."""
+        return sources_changed(self.sources, input_dir)
+
+    def close(self):
+        self._mm.close()
+
+
+def open_bundle(input_dir=INPUT_DIR, bundle_path=BUNDLE_PATH):
+    """Abre el paquete, recompilándolo antes si falta, es incompatible o está desactualizado."""
+    try:
+        bundle = ChapterBundle(bundle_path)
+    except (OSError, ValueError, pickle.UnpicklingError, struct.error):
+        bundle = None
+
+    if bundle is not None and not bundle.is_stale(input_dir):
+        return bundle
+
+    if bundle is not None:
+        bundle.close()
+    build_bundle(input_dir, bundle_path)
+    return ChapterBundle(bundle_path)
+
+
+if __name__ == "__main__":
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+    else:
+        try:
+            current = ChapterBundle(BUNDLE_PATH)
+            stale = current.is_stale(INPUT_DIR)
+            current.close()
+        except (OSError, ValueError, pickle.UnpicklingError, struct.error):
+            stale = True
+
+        if stale:
+            total = build_bundle(INPUT_DIR, BUNDLE_PATH)
+            print(f"✅ Paquete compilado con {total} entradas en '{BUNDLE_PATH}'.")
+        else:
+            print(f"☑️ El paquete '{BUNDLE_PATH}' está al día. Nada que compilar.")
@@ -0,0 +1,134 @@
+import json
+import os
+
+from chapter_bundle import list_chapter_files
+
+# --- CONFIGURACIÓN ---
+BASE_PATH = "json_capitulos"
+# ---------------------
+
+# Capa de escritura compartida por las herramientas que corrigen json_capitulos en el lugar.
+#
+# `ChapterStore` lee y parsea cada capítulo una sola vez (cuando se lo pide), los
+# correctores modifican los datos en memoria y `commit` escribe de una vez los capítulos
+# que quedaron distintos: varios correctores seguidos cuestan una lectura y una escritura
+# por capítulo modificado, no una por herramienta.
+#
+# La escritura es en dos fases: primero todos los temporales (junto a cada archivo) y
+# después un os.replace por capítulo. Un lector (la app, el watcher, el pipeline) ve la
+# versión anterior o la nueva completa, nunca un archivo a medio escribir. Si algún
+# capítulo cambió en disco desde que se leyó (otro proceso lo editó), no se escribe nada.
+# El formato es el de siempre: indent=2, UTF-8 sin escapes, conservando el salto de línea
+# final si el archivo lo tenía.
+
+
+class ChapterStore:
+    """Capítulos de `base_path` cargados bajo demanda, editados en memoria y escritos en lote."""
+
+    def __init__(self, base_path=BASE_PATH):
+        self.base_path = base_path
+        self._chapters = {}  # archivo -> (data, texto original, (tamaño, mtime_ns))
+        self._dirty = set()
+
+    def filenames(self):
+        """Nombres de los JSON de capítulo, ordenados."""
+        return list_chapter_files(self.base_path)
+
+    def path(self, filename):
+        return os.path.join(self.base_path, filename)
+
+    def load(self, filename):
+        """
+        Datos del capítulo (el mismo objeto en cada llamada: editarlo es editar el capítulo).
+        Lanza json.JSONDecodeError si el archivo no es JSON válido.
+        """
+        entry = self._chapters.get(filename)
+        if entry is None:
+            path = self.path(filename)
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                stat = os.fstat(f.fileno())
+                text = f.read()
+            entry = self._chapters[filename] = (json.loads(text), text, (stat.st_size, stat.st_mtime_ns))
+        return entry[0]
+
+    def mark_dirty(self, filename):
+        """Marca un capítulo cargado como modificado."""
+        if filename not in self._chapters:
+            raise ValueError(f"El capítulo '{filename}' no está cargado.")
+        self._dirty.add(filename)
+
+    def apply(self, fixer, filenames=None):
+        """
+        Aplica `fixer(data) -> bool` (True si modificó algo) a cada capítulo y marca los
+        modificados. Devuelve la lista de (archivo, modificado, error); un capítulo que no
+        se puede leer o en el que el corrector falla no se marca y se informa con su error.
+        """
+        results = []
+        for filename in (filenames if filenames is not None else self.filenames()):
+            try:
+                data = self.load(filename)
+            except (OSError, json.JSONDecodeError) as e:
+                results.append((filename, False, e))
+                continue
+            try:
+                modified = bool(fixer(data))
+            except Exception as e:
+                # Un capítulo con estructura inesperada no frena a los demás
+                results.append((filename, False, e))
+                continue
+            if modified:
+                self._dirty.add(filename)
+            results.append((filename, modified, None))
+        return results
+
+    def _serialize(self, filename):
+        data, original, _ = self._chapters[filename]
+        text = json.dumps(data, indent=2, ensure_ascii=False)
+        return text + '\n' if original.endswith('\n') else text
+
+    def commit(self):
+        """
+        Escribe en lote los capítulos modificados cuyo contenido realmente cambió.
+        Devuelve la lista de archivos escritos. Lanza RuntimeError, sin escribir ninguno,
+        si alguno cambió en disco desde que se cargó.
+        """
+        pending = []
+        for filename in sorted(self._dirty):
+            text = self._serialize(filename)
+            if text != self._chapters[filename][1]:
+                pending.append((filename, text))
+
+        conflicts = []
+        for filename, _ in pending:
+            try:
+                stat = os.stat(self.path(filename))
+                current = (stat.st_size, stat.st_mtime_ns)
+            except FileNotFoundError:
+                current = None
+            if current != self._chapters[filename][2]:
+                conflicts.append(filename)
+        if conflicts:
+            raise RuntimeError(f"Capítulos modificados en disco desde que se leyeron: {', '.join(conflicts)}. No se escribió ninguno.")
+
+        tmp_paths = []
+        try:
+            for filename, text in pending:
+                tmp_path = f"{self.path(filename)}.{os.getpid()}.tmp"
+                tmp_paths.append(tmp_path)
+                with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                    f.write(text)
+        except BaseException:
+            for tmp_path in tmp_paths:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            raise
+
+        written = []
+        for (filename, text), tmp_path in zip(pending, tmp_paths):
+            os.replace(tmp_path, self.path(filename))
+            stat = os.stat(self.path(filename))
+            data = self._chapters[filename][0]
+            self._chapters[filename] = (data, text, (stat.st_size, stat.st_mtime_ns))
+            written.append(filename)
+        self._dirty.clear()
+        return written
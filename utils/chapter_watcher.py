@@ -0,0 +1,164 @@
+import json
+import os
+import pickle
+import threading
+import time
+
+from chapter_bundle import INPUT_DIR, build_catalog, file_sha256, list_chapter_files, split_chapter
+from check_json import check_content, load_schema
+
+# --- CONFIGURACIÓN ---
+# Cada cuántos segundos, como máximo, se revisan los mtimes de json_capitulos/
+POLL_INTERVAL = 2.0
+# ---------------------
+
+# Recarga en caliente de los capítulos para la app.
+#
+# `LiveChapters` envuelve el paquete compilado y hace de nivel compartido del caché de
+# contenido (misma interfaz `version`/`get` que `content_cache.BundleTier`). Cada `poll`
+# compara tamaño y mtime de los JSON con la última versión vista; un archivo cambiado se
+# valida con el esquema de check_json ANTES de reemplazar nada:
+#   - válido: su esqueleto y sus soluciones pasan a una capa en memoria que tiene prioridad
+#     sobre el paquete, se recalcula el catálogo y se devuelve su clave para que la app
+#     descarte solo las entradas de ese capítulo;
+#   - inválido (o borrado): se sigue sirviendo la última versión buena y los errores quedan
+#     en `rejected` para mostrarlos.
+# El paquete en disco no se toca: al reiniciar, `open_bundle` lo recompila si hace falta.
+
+
+class LiveChapters:
+    """Capítulos del paquete más los que se editaron desde que se compiló."""
+
+    def __init__(self, bundle, input_dir=INPUT_DIR, poll_interval=POLL_INTERVAL):
+        self.bundle = bundle
+        self.input_dir = input_dir
+        self.poll_interval = poll_interval
+        self.catalog = bundle.catalog
+        # filename -> errores (línea, columna, mensaje) de la última edición rechazada
+        self.rejected = {}
+        # chapter_key -> {'sha256', 'entries': {clave: (valor, tamaño)}}
+        self._overlay = {}
+        # Última versión vista de cada archivo (aceptada o no), para no revalidar en cada poll
+        self._seen = {name: dict(stamp) for name, stamp in bundle.sources.items()}
+        self._schema = None
+        self._last_poll = 0.0
+        self._lock = threading.Lock()
+
+    # --- Nivel compartido del caché de contenido ---
+    def version(self, key):
+        chapter_key = key.split('/', 1)[0]
+        overlay = self._overlay.get(chapter_key)
+        if overlay is not None:
+            return overlay['sha256']
+        stamp = self.bundle.sources.get(f"{chapter_key}.json")
+        return stamp["sha256"] if stamp else ""
+
+    def get(self, key):
+        overlay = self._overlay.get(key.split('/', 1)[0])
+        if overlay is not None:
+            return overlay['entries'].get(key)
+        location = self.bundle.index.get(key)
+        if location is None:
+            return None
+        return self.bundle.get(key), location[1]
+
+    # --- Vigilancia ---
+    def poll(self, force=False):
+        """
+        Revisa json_capitulos/ (como mucho una vez cada `poll_interval` segundos) y aplica
+        los cambios válidos. Devuelve la lista de claves de capítulo recargadas.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_poll < self.poll_interval:
+            return []
+        # Un solo hilo revisa; las demás sesiones siguen con lo que hay
+        if not self._lock.acquire(blocking=False):
+            return []
+        try:
+            self._last_poll = now
+            reloaded = []
+            names = set(list_chapter_files(self.input_dir)) | set(self._seen)
+            for filename in sorted(names):
+                if self._check_file(filename):
+                    reloaded.append(filename[:-len('.json')])
+            if reloaded:
+                self.catalog = self._build_catalog()
+            return reloaded
+        finally:
+            self._lock.release()
+
+    def _check_file(self, filename):
+        """Procesa un archivo si cambió. Devuelve True si se aceptó una versión nueva."""
+        file_path = os.path.join(self.input_dir, filename)
+        seen = self._seen.get(filename)
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            if filename in self.bundle.sources or filename[:-len('.json')] in self._overlay:
+                self.rejected[filename] = [(0, 0, "archivo no encontrado; se sigue mostrando la última versión válida")]
+            else:
+                # Un archivo nuevo que nunca fue válido: no hay nada que seguir mostrando
+                self.rejected.pop(filename, None)
+            # Al reaparecer (checkout, mv) se revisa aunque traiga el mismo contenido de antes
+            self._seen.pop(filename, None)
+            return False
+        if seen and seen['size'] == stat.st_size and seen['mtime_ns'] == stat.st_mtime_ns:
+            return False
+
+        digest = file_sha256(file_path)
+        self._seen[filename] = {"sha256": digest, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+        if seen and seen['sha256'] == digest:
+            # Solo cambió el mtime (p. ej. un checkout): nada que recargar
+            return False
+
+        chapter_key = filename[:-len('.json')]
+        if digest == self.version(chapter_key):
+            # Volvió la versión que ya se está mostrando (p. ej. tras un borrado o una edición rechazada)
+            self.rejected.pop(filename, None)
+            return False
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            self.rejected[filename] = [(0, 0, f"no se pudo leer: {e}")]
+            return False
+
+        if self._schema is None:
+            self._schema = load_schema()
+        errors = check_content(content, file_path, self._schema)
+        if errors:
+            self.rejected[filename] = errors
+            return False
+
+        skeleton, bodies = split_chapter(chapter_key, json.loads(content))
+        entries = {chapter_key: _entry((skeleton, None))}
+        for key, body in bodies:
+            entries[key] = _entry(body)
+        self._overlay[chapter_key] = {'sha256': digest, 'entries': entries}
+        self.rejected.pop(filename, None)
+        _render_chapter(skeleton, bodies)
+        return True
+
+    def _build_catalog(self):
+        chapters = []
+        for filename in sorted(set(self.bundle.sources) | {f"{k}.json" for k in self._overlay}):
+            chapter_key = filename[:-len('.json')]
+            data, error = self.get(chapter_key)[0]
+            chapters.append((chapter_key, data, error))
+        return build_catalog(chapters)
+
+
+def _entry(value):
+    return value, len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _render_chapter(skeleton, bodies):
+    """Pre-renderiza el HTML del capítulo recargado si el renderizador está instalado."""
+    try:
+        from render_cache import iter_chapter_fragments, render_fragments
+        fragments = list(iter_chapter_fragments(skeleton))
+        fragments.extend(body['solucion_markdown'] for _, body in bodies if body.get('solucion_markdown'))
+        render_fragments(fragments)
+    except ImportError:
+        # Sin markdown-it/latex2mathml la app renderiza en el navegador, como antes
+        pass
@@ -0,0 +1,179 @@
+import html
+import re
+from abc import ABC, abstractmethod
+
+# Escritura de capítulos por streaming.
+#
+# `ChapterWriter` recorre el JSON de un capítulo (cabecera, secciones, ejercicios) y emite
+# cada bloque a un `sink` (cualquier objeto con `write`: un archivo, un io.StringIO, la
+# respuesta de un servidor...) a medida que lo visita, sin armar el documento completo en
+# memoria. Las subclases deciden el formato de salida:
+#   MystWriter   MyST para Sphinx (el formato de migrate_to_myst.py)
+#   HtmlWriter   HTML con la matemática en MathML (necesita markdown-it, ver render_cache)
+#   TextWriter   texto plano, p. ej. para indexar o revisar diferencias
+# La limpieza de cada fragmento de markdown es una sola sustitución sobre el texto, que
+# además aplica la sangría de las soluciones, en lugar de reemplazos encadenados seguidos
+# de un split/join por línea.
+
+# Reemplazos de limpieza, en el orden en que se aplicaban antes uno tras otro:
+#   \\n (salto de línea escapado del JSON) -> salto de línea
+#   textm / textcm (comandos LaTeX que perdieron la barra) -> \text{m} / \text{cm}
+#   $$$$ -> $$, \cdot -> " \cdot "
+# Ningún reemplazo genera texto que otro pueda volver a reconocer, así que aplicarlos en
+# una sola pasada da el mismo resultado.
+_CLEANUP_RE = re.compile(r'\\n|\n|textcm|textm|\$\$\$\$|\\cdot')
+_CLEANUP = {
+    'textm': r'\text{m}',
+    'textcm': r'\text{cm}',
+    '$$$$': '$$',
+    '\\cdot': ' \\cdot ',
+}
+# Los mismos saltos que reconoce str.splitlines
+_LINE_BREAK_RE = re.compile(r'\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]')
+
+# Sangría del contenido de una directiva MyST (p. ej. el dropdown de las soluciones)
+DIRECTIVE_INDENT = "   "
+
+
+def clean_markdown_content(markdown_text, indent=""):
+    """
+    Realiza limpieza final: corrige saltos de línea y asegura el formato de ecuaciones.
+    Con `indent`, cada línea del resultado queda con esa sangría (incluida la primera).
+    """
+    if not markdown_text:
+        return indent
+    newline = "\n" + indent
+    content = _CLEANUP_RE.sub(lambda m: _CLEANUP.get(m.group(), newline), markdown_text)
+    return indent + content.strip()
+
+
+def first_line(text):
+    """Primera línea de `text` (como `text.splitlines()[0]`, sin partir todo el texto)."""
+    match = _LINE_BREAK_RE.search(text)
+    return text[:match.start()] if match else text
+
+
+class ChapterWriter(ABC):
+    """Recorre un capítulo y emite sus bloques a `sink`; las subclases dan el formato."""
+
+    def __init__(self, sink):
+        self.sink = sink
+
+    def write_chapter(self, data):
+        self.begin_chapter(data)
+        for section in data.get('secciones', []):
+            section_type = section.get('tipo', 'teoria')
+            self.section(section.get('titulo', 'Sección sin título'))
+            if section_type == 'teoria':
+                self.markdown(section.get('contenido_markdown', ''))
+            elif section_type == 'ejercicios':
+                for i, ejercicio in enumerate(section.get('ejercicios', [])):
+                    self.exercise(
+                        i + 1,
+                        ejercicio.get('enunciado_markdown', f"Problema {i+1} sin enunciado."),
+                        ejercicio.get('solucion_markdown', 'Solución no disponible.'),
+                    )
+        self.end_chapter()
+
+    @abstractmethod
+    def begin_chapter(self, data):
+        pass
+
+    @abstractmethod
+    def section(self, title):
+        pass
+
+    @abstractmethod
+    def markdown(self, markdown_text):
+        pass
+
+    @abstractmethod
+    def exercise(self, number, enunciado, solucion):
+        pass
+
+    def end_chapter(self):
+        pass
+
+
+class MystWriter(ChapterWriter):
+    """MyST para Sphinx: etiqueta del capítulo, títulos y soluciones en un dropdown."""
+
+    def begin_chapter(self, data):
+        write = self.sink.write
+        write(f"(capitulo_{data.get('capitulo_id', 'XX')})=\n")  # Etiqueta MyST para referencias
+        write(f"# {data.get('titulo', 'Título sin nombre')}\n\n")
+        write(f"*Parte: {data.get('parte', 'General')}*\n")
+        write(f"*Fecha: {data.get('fecha_generacion', 'Desconocida')}*\n\n")
+
+    def section(self, title):
+        self.sink.write(f"## {title}\n\n")
+
+    def markdown(self, markdown_text):
+        self.sink.write(clean_markdown_content(markdown_text))
+        self.sink.write("\n\n")
+
+    def exercise(self, number, enunciado, solucion):
+        write = self.sink.write
+        write(f"### Problema {number}: {first_line(enunciado)}\n\n")
+        write(clean_markdown_content(enunciado))
+        write("\n\n")
+        # Solución oculta usando una directiva MyST (Sphinx) para expandir
+        write(".. dropdown:: Mostrar Solución\n\n")
+        write(clean_markdown_content(solucion, DIRECTIVE_INDENT))
+        write("\n\n")
+
+
+class TextWriter(ChapterWriter):
+    """Texto plano: títulos subrayados y el markdown limpio, sin directivas."""
+
+    def _title(self, title, underline):
+        self.sink.write(f"{title}\n{underline * len(title)}\n\n")
+
+    def begin_chapter(self, data):
+        self._title(data.get('titulo', 'Título sin nombre'), '=')
+        self.sink.write(f"Parte: {data.get('parte', 'General')}\n\n")
+
+    def section(self, title):
+        self._title(title, '-')
+
+    def markdown(self, markdown_text):
+        self.sink.write(clean_markdown_content(markdown_text))
+        self.sink.write("\n\n")
+
+    def exercise(self, number, enunciado, solucion):
+        self.sink.write(f"Problema {number}\n\n")
+        self.markdown(enunciado)
+        self.sink.write("Solución:\n\n")
+        self.sink.write(clean_markdown_content(solucion, DIRECTIVE_INDENT))
+        self.sink.write("\n\n")
+
+
+class HtmlWriter(ChapterWriter):
+    """Fragmento HTML del capítulo; las soluciones van en <details>, como en el sitio estático."""
+
+    def __init__(self, sink):
+        super().__init__(sink)
+        # Import diferido: markdown-it y latex2mathml solo hacen falta para este formato
+        from render_cache import render_markdown_html
+        self._render = render_markdown_html
+
+    def begin_chapter(self, data):
+        self.sink.write(f'<article id="capitulo_{html.escape(str(data.get("capitulo_id", "XX")))}">\n')
+        self.sink.write(f"<h1>{html.escape(data.get('titulo', 'Título sin nombre'))}</h1>\n")
+        self.sink.write(f"<p><em>Parte: {html.escape(data.get('parte', 'General'))}</em></p>\n")
+
+    def section(self, title):
+        self.sink.write(f"<h2>{html.escape(title)}</h2>\n")
+
+    def markdown(self, markdown_text):
+        self.sink.write(self._render(clean_markdown_content(markdown_text)))
+
+    def exercise(self, number, enunciado, solucion):
+        self.sink.write(f"<h3>Problema {number}: {html.escape(first_line(enunciado))}</h3>\n")
+        self.markdown(enunciado)
+        self.sink.write("<details><summary>Mostrar Solución</summary>\n")
+        self.markdown(solucion)
+        self.sink.write("</details>\n")
+
+    def end_chapter(self):
+        self.sink.write("</article>\n")
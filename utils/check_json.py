@@ -1,71 +1,285 @@
+import argparse
+import bisect
 import json
 import os
 import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from json.decoder import scanstring
 
-def clean_and_load_json(file_path, content):
-    """Intenta limpiar caracteres de control JSON inválidos y recarga."""
-    print("   ⚠️ Intentando limpieza automática de caracteres de control...")
-    # Eliminar cualquier carácter de control no válido en JSON (excepto \n, \r, \t)
-    cleaned_content = re.sub(r'[\x00-\x1f]', '', content)
+# --- CONFIGURACIÓN ---
+BASE_PATH = 'json_capitulos'
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'chapter_schema.json')
+# Con pocos archivos es más rápido validar en el proceso actual que levantar un pool
+MIN_FILES_FOR_POOL = 64
+# ---------------------
 
-    try:
-        data = json.loads(cleaned_content)
+# Validador de capítulos: comprueba la sintaxis JSON y el esquema formal de
+# `chapter_schema.json` y reporta TODOS los errores con línea y columna, sin
+# modificar nunca los archivos. Sale con código 1 si encontró algún error.
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_NUMBER = re.compile(r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][-+]?\d+)?')
+_LITERALS = ('true', 'false', 'null')
+
+JSON_TYPES = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'null': lambda v: v is None,
+}
+
+
+# --- 1. POSICIONES DENTRO DEL ARCHIVO ---
+def locate_paths(text):
+    """
+    Recorre un documento JSON ya válido y devuelve {ruta: offset} para cada valor,
+    donde la ruta es una tupla de claves e índices, p. ej. ('secciones', 1, 'ejercicios', 0).
+    Solo se usa cuando hay errores de esquema que ubicar.
+    """
+    positions = {}
+
+    def skip(i):
+        return _WHITESPACE.match(text, i).end()
+
+    def walk(i, path):
+        i = skip(i)
+        positions[path] = i
+        char = text[i]
+        if char == '{':
+            i = skip(i + 1)
+            if text[i] == '}':
+                return i + 1
+            while True:
+                key, i = scanstring(text, i + 1)
+                i = skip(i)  # ':'
+                i = walk(i + 1, path + (key,))
+                i = skip(i)
+                if text[i] == '}':
+                    return i + 1
+                i = skip(i + 1)  # ','
+        if char == '[':
+            i = skip(i + 1)
+            if text[i] == ']':
+                return i + 1
+            index = 0
+            while True:
+                i = walk(i, path + (index,))
+                i = skip(i)
+                if text[i] == ']':
+                    return i + 1
+                i += 1
+                index += 1
+        if char == '"':
+            return scanstring(text, i + 1)[1]
+        for literal in _LITERALS:
+            if text.startswith(literal, i):
+                return i + len(literal)
+        return _NUMBER.match(text, i).end()
+
+    walk(0, ())
+    return positions
+
+
+class LineIndex:
+    """Convierte offsets de caracteres en (línea, columna), ambas desde 1."""
+
+    def __init__(self, text):
+        self.starts = [0] + [m.end() for m in re.finditer('\n', text)]
+
+    def line_col(self, offset):
+        line = bisect.bisect_right(self.starts, offset)
+        return line, offset - self.starts[line - 1] + 1
+
+
+# --- 2. VALIDACIÓN CONTRA EL ESQUEMA ---
+def load_schema(schema_path=SCHEMA_PATH):
+    with open(schema_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _resolve(schema, root):
+    ref = schema.get('$ref')
+    if ref is None:
+        return schema
+    node = root
+    for part in ref.lstrip('#/').split('/'):
+        node = node[part]
+    return node
+
+
+def _describe(path):
+    return ''.join(f'[{p}]' if isinstance(p, int) else (f'.{p}' if i else p) for i, p in enumerate(path)) or '(raíz)'
+
+
+def validate(value, schema, root=None, path=()):
+    """
+    Valida `value` contra un subconjunto de JSON Schema (type, enum, const, required,
+    properties, additionalProperties (false o un esquema), items, minItems, minLength,
+    minimum, pattern, allOf, if/then y $ref locales). Genera tuplas (ruta, mensaje) con todos los errores.
+    """
+    root = root if root is not None else schema
+    schema = _resolve(schema, root)
+
+    expected = schema.get('type')
+    if expected is not None:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(JSON_TYPES[t](value) for t in types):
+            yield path, f"se esperaba {' o '.join(types)}, se encontró {type(value).__name__}"
+            return
+
+    if 'const' in schema and value != schema['const']:
+        yield path, f"debe ser {schema['const']!r}"
+    if 'enum' in schema and value not in schema['enum']:
+        yield path, f"valor {value!r} no permitido (opciones: {', '.join(map(repr, schema['enum']))})"
+
+    if isinstance(value, str):
+        if len(value) < schema.get('minLength', 0):
+            yield path, "no puede estar vacío" if schema['minLength'] == 1 else f"debe tener al menos {schema['minLength']} caracteres"
+        if 'pattern' in schema and not re.search(schema['pattern'], value):
+            yield path, f"{value!r} no tiene el formato esperado ({schema['pattern']})"
 
-        # Sobrescribir el archivo original con el contenido limpio
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if 'minimum' in schema and value < schema['minimum']:
+            yield path, f"debe ser mayor o igual que {schema['minimum']}"
 
-        print(f"   ✅ ¡{os.path.basename(file_path)} limpiado y guardado correctamente!")
-        return True
-    except json.JSONDecodeError:
-        print("   ❌ Fallo la limpieza automática. El error es más complejo.")
-        return False
-    except Exception as e:
-        print(f"   ❌ Fallo la limpieza automática por error desconocido: {e}")
-        return False
+    if isinstance(value, dict):
+        for key in schema.get('required', []):
+            if key not in value:
+                yield path, f"falta el campo obligatorio '{key}'"
+        properties = schema.get('properties', {})
+        additional = schema.get('additionalProperties', True)
+        for key, item in value.items():
+            if key in properties:
+                yield from validate(item, properties[key], root, path + (key,))
+            elif additional is False:
+                yield path + (key,), f"campo no reconocido '{key}'"
+            elif isinstance(additional, dict):
+                yield from validate(item, additional, root, path + (key,))
 
+    if isinstance(value, list):
+        if len(value) < schema.get('minItems', 0):
+            yield path, f"debe tener al menos {schema['minItems']} elemento(s)"
+        if 'items' in schema:
+            for index, item in enumerate(value):
+                yield from validate(item, schema['items'], root, path + (index,))
+
+    for subschema in schema.get('allOf', []):
+        condition = subschema.get('if')
+        if condition is not None:
+            if next(validate(value, condition, root, path), None) is None and 'then' in subschema:
+                yield from validate(value, subschema['then'], root, path)
+        else:
+            yield from validate(value, subschema, root, path)
 
-def check_file(filename):
-    file_path = os.path.join('json_capitulos', filename)
-    print(f"\n--- Comprobando {filename} ---")
 
+# --- 3. COMPROBACIÓN DE UN ARCHIVO ---
+def check_file(file_path, schema=None):
+    """
+    Comprueba un archivo de capítulo. Devuelve una lista de (línea, columna, mensaje);
+    la lista vacía significa que el archivo es válido.
+    """
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
-            data = json.loads(content)
-
-        print(f"✅ ¡{filename} es un archivo JSON válido!")
-        return True
-
     except FileNotFoundError:
-        print(f"❌ Error: Archivo no encontrado en la ruta esperada: {file_path}")
-        return False
+        return [(0, 0, "archivo no encontrado")]
+    except UnicodeDecodeError as e:
+        return [(0, 0, f"el archivo no es UTF-8 válido: {e}")]
+    return check_content(content, file_path, schema)
+
 
+def check_content(content, file_path, schema=None):
+    """
+    Igual que `check_file` pero sobre el texto ya leído; `file_path` solo se usa para
+    comparar el nombre con `capitulo_id`.
+    """
+    schema = schema if schema is not None else load_schema()
+    try:
+        data = json.loads(content)
     except json.JSONDecodeError as e:
-        print(f"❌ ERROR CRÍTICO de sintaxis JSON en {filename}:")
-        print(f"  Mensaje: {e.msg}")
-
-        if e.lineno > 0:
-            lines = content.split('\n')
-            if e.lineno <= len(lines):
-                 error_line = lines[e.lineno - 1]
-                 print(f"  Línea {e.lineno}: {error_line.strip()}")
-                 print("  " + " " * (e.colno - 1) + "^")
-
-        # Llamar a la función de limpieza solo si detectamos un error JSON
-        if clean_and_load_json(file_path, content):
-            return True # Retorna verdadero si la limpieza tuvo éxito
-        else:
-            return False # Si la limpieza falló, retorna falso
+        # La sintaxis rota impide seguir validando: se reporta el primer error de parseo
+        return [(e.lineno, e.colno, f"sintaxis JSON: {e.msg}")]
+
+    problems = list(validate(data, schema))
+
+    # Comprobación semántica: el capítulo debe coincidir con el nombre del archivo (si el id
+    # falta o no es un entero, el esquema ya lo reportó)
+    stem = os.path.basename(file_path)[len('capitulo_'):-len('.json')]
+    chapter_id = data.get('capitulo_id') if isinstance(data, dict) else None
+    if stem.isdigit() and JSON_TYPES['integer'](chapter_id) and chapter_id != int(stem):
+        problems.append((('capitulo_id',), f"capitulo_id {data['capitulo_id']} no coincide con el archivo ({int(stem)})"))
+
+    if not problems:
+        return []
+
+    positions = locate_paths(content)
+    lines = LineIndex(content)
+    errors = []
+    for path, message in problems:
+        # Si la ruta no existe (p. ej. un campo faltante) se usa el objeto que lo contiene
+        located = path
+        while located not in positions:
+            located = located[:-1]
+        line, col = lines.line_col(positions[located])
+        errors.append((line, col, f"{_describe(path)}: {message}"))
+    return sorted(errors)
+
+
+# Esquema de cada proceso del pool (lo carga _init_worker una vez por proceso)
+_worker_schema = None
+
+
+def _init_worker(schema):
+    global _worker_schema
+    _worker_schema = schema
+
+
+def _check_in_worker(file_path):
+    return file_path, check_file(file_path, _worker_schema)
+
+
+def check_files(file_paths, jobs=None):
+    """Comprueba varios archivos (en paralelo si son muchos). Genera (ruta, errores) en orden."""
+    schema = load_schema()
+    if jobs == 1 or (jobs is None and len(file_paths) < MIN_FILES_FOR_POOL):
+        for file_path in file_paths:
+            yield file_path, check_file(file_path, schema)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(schema,)) as executor:
+        yield from executor.map(_check_in_worker, file_paths, chunksize=16)
 
-    except Exception as e:
-        print(f"❌ ERROR desconocido: {e}")
-        return False
 
 if __name__ == "__main__":
-    if not os.path.isdir('json_capitulos'):
-        print("El directorio 'json_capitulos' no existe. Deteniendo.")
-    else:
-        # Nota: El 20 ya está limpio, lo comprobaremos de nuevo
-        check_file('capitulo_20.json')
-        check_file('capitulo_22.json')
+    parser = argparse.ArgumentParser(description="Valida los capítulos JSON contra el esquema, sin modificarlos.")
+    parser.add_argument('files', nargs='*', help=f"Archivos a validar (por defecto, todos los de '{BASE_PATH}').")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help=f"Procesos en paralelo (por defecto, se usa un pool desde {MIN_FILES_FOR_POOL} archivos).")
+    args = parser.parse_args()
+
+    file_paths = args.files
+    if not file_paths:
+        if not os.path.isdir(BASE_PATH):
+            print(f"El directorio '{BASE_PATH}' no existe. Deteniendo.")
+            sys.exit(1)
+        file_paths = [os.path.join(BASE_PATH, f) for f in sorted(os.listdir(BASE_PATH))
+                      if f.startswith('capitulo_') and f.endswith('.json')]
+
+    total_errors = 0
+    invalid_files = 0
+    for file_path, errors in check_files(file_paths, args.jobs):
+        if errors:
+            invalid_files += 1
+            total_errors += len(errors)
+        # Formato archivo:línea:columna, reconocido por editores y por los logs de CI
+        for line, col, message in errors:
+            print(f"{file_path}:{line}:{col}: ❌ {message}")
+
+    if total_errors:
+        print(f"❌ {total_errors} errores en {invalid_files} de {len(file_paths)} archivos.")
+        sys.exit(1)
+    print(f"✅ {len(file_paths)} archivos JSON válidos.")
@@ -0,0 +1,220 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# --- CONFIGURACIÓN ---
+# Presupuesto del nivel en memoria de cada proceso, en MB de objetos ya deserializados
+# (medidos con `object_size`; 0 = sin copia en memoria: cada lectura va directo al nivel
+# compartido). Se puede cambiar por réplica con la variable de entorno GUIA_CACHE_MEMORY_MB.
+MEMORY_MAX_BYTES = int(float(os.environ.get("GUIA_CACHE_MEMORY_MB", "64")) * 1024 * 1024)
+# Backend del nivel en memoria: 'lru' (por defecto) o 'none'. Variable GUIA_CACHE_BACKEND.
+MEMORY_BACKEND = os.environ.get("GUIA_CACHE_BACKEND", "lru")
+# ---------------------
+
+# Caché de contenido en dos niveles para la app:
+#
+#   memoria   LRU por proceso con presupuesto en bytes; guarda el objeto ya deserializado
+#             y lo cobra por lo que ocupa en memoria, no por su tamaño serializado (un
+#             capítulo como dicts y str de Python pesa varias veces su pickle).
+#   compartido   lo que ya está en disco y comparten todos los procesos y réplicas del
+#             mismo volumen: el paquete de capítulos mapeado con mmap (`BundleTier`) o el
+#             directorio de fragmentos pre-renderizados (`FileTier`).
+#
+# Las claves llevan la versión de su origen (el sha256 del JSON del capítulo o el hash del
+# markdown), así que un cambio en los datos nunca devuelve una entrada vieja: la clave nueva
+# falla y la vieja sale del LRU por desuso. Un proceso recién iniciado no calienta nada:
+# lee del nivel compartido, que ya está compilado.
+
+
+def object_size(value):
+    """
+    Bytes que ocupa `value` en memoria: sys.getsizeof recorriendo dicts, listas, tuplas y
+    sets. Un objeto compartido (p. ej. una cadena internada) se cuenta una sola vez.
+    """
+    seen = set()
+    pending = [value]
+    total = 0
+    while pending:
+        item = pending.pop()
+        if id(item) in seen:
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pending.extend(item.keys())
+            pending.extend(item.values())
+        elif isinstance(item, (list, tuple, set, frozenset)):
+            pending.extend(item)
+    return total
+
+
+def _covers(key, versioned):
+    base = versioned.rsplit('@', 1)[0]
+    return base == key or base.startswith(f"{key}/")
+
+
+class MemoryLRU:
+    """LRU en memoria con presupuesto en bytes; seguro entre hilos (sesiones de Streamlit)."""
+
+    def __init__(self, max_bytes=MEMORY_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Devuelve (valor, tamaño) o None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key, value, size):
+        # Una entrada más grande que todo el presupuesto no se guarda
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def invalidate(self, key):
+        """Descarta todas las versiones de `key` y de las claves bajo `key/` (p. ej. sus ejercicios)."""
+        with self._lock:
+            for versioned in [k for k in self._entries if _covers(key, k)]:
+                self._bytes -= self._entries.pop(versioned)[1]
+
+    def stats(self):
+        with self._lock:
+            return {"entradas": len(self._entries), "bytes": self._bytes, "max_bytes": self.max_bytes,
+                    "aciertos": self.hits, "fallos": self.misses}
+
+
+class NoMemory:
+    """Nivel en memoria nulo: nada queda en el proceso, todo se lee del nivel compartido."""
+
+    max_bytes = 0
+
+    def get(self, key):
+        return None
+
+    def put(self, key, value, size):
+        pass
+
+    def invalidate(self, key):
+        pass
+
+    def stats(self):
+        return {"entradas": 0, "bytes": 0, "max_bytes": 0, "aciertos": 0, "fallos": 0}
+
+
+MEMORY_BACKENDS = {
+    'lru': MemoryLRU,
+    'none': lambda max_bytes=0: NoMemory(),
+}
+
+
+class BundleTier:
+    """Nivel compartido sobre el paquete de capítulos: las páginas del mmap las comparte el SO."""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+
+    def version(self, key):
+        """Hash del JSON de origen de `key` ('capitulo_05' o 'capitulo_05/ejercicio_000')."""
+        stamp = self.bundle.sources.get(f"{key.split('/', 1)[0]}.json")
+        return stamp["sha256"] if stamp else ""
+
+    def get(self, key):
+        location = self.bundle.index.get(key)
+        if location is None:
+            return None
+        return self.bundle.get(key), location[1]
+
+
+class FileTier:
+    """Nivel compartido sobre un directorio de archivos de texto direccionados por hash."""
+
+    def __init__(self, directory, suffix):
+        self.directory = directory
+        self.suffix = suffix
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], f"{key}{self.suffix}")
+
+    def version(self, key):
+        # La clave ya es el hash del contenido
+        return ""
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        return text, len(text.encode('utf-8'))
+
+
+class TieredCache:
+    """Memoria por proceso delante de un nivel compartido de solo lectura."""
+
+    def __init__(self, shared, memory=None):
+        self.shared = shared
+        self.memory = memory if memory is not None else process_memory()
+
+    def get(self, key):
+        """Devuelve el valor de `key` o None si tampoco está en el nivel compartido."""
+        return self.lookup(key)[0]
+
+    def lookup(self, key):
+        """Como `get`, pero devuelve (valor, origen) con origen 'memoria', 'compartido' o None."""
+        versioned = f"{key}@{self.shared.version(key)}"
+        entry = self.memory.get(versioned)
+        if entry is not None:
+            return entry[0], 'memoria'
+        entry = self.shared.get(key)
+        if entry is None:
+            return None, None
+        if self.memory.max_bytes:
+            # El nivel compartido informa el tamaño serializado; en memoria se cobra el real
+            self.memory.put(versioned, entry[0], object_size(entry[0]))
+        return entry[0], 'compartido'
+
+    def invalidate(self, key):
+        self.memory.invalidate(key)
+
+    def stats(self):
+        return self.memory.stats()
+
+
+def make_memory_tier(backend=None, max_bytes=None):
+    """Crea el nivel en memoria configurado (por defecto, desde las variables de entorno)."""
+    backend = backend or MEMORY_BACKEND
+    if backend not in MEMORY_BACKENDS:
+        raise ValueError(f"Backend de caché desconocido: '{backend}' (opciones: {', '.join(sorted(MEMORY_BACKENDS))})")
+    return MEMORY_BACKENDS[backend](MEMORY_MAX_BYTES if max_bytes is None else max_bytes)
+
+
+_process_memory = None
+_process_memory_lock = threading.Lock()
+
+
+def process_memory():
+    """Nivel en memoria único del proceso: capítulos y fragmentos comparten el mismo presupuesto."""
+    global _process_memory
+    with _process_memory_lock:
+        if _process_memory is None:
+            _process_memory = make_memory_tier()
+        return _process_memory
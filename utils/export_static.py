@@ -0,0 +1,203 @@
+import argparse
+import gzip
+import hashlib
+import html
+import json
+import os
+import shutil
+import sys
+
+from chapter_bundle import BUNDLE_PATH, INPUT_DIR, open_bundle
+from render_cache import RENDER_DIR, get_rendered_html, render_markdown_html
+
+# --- CONFIGURACIÓN ---
+EXPORT_DIR = "sitio_estatico"
+CLIENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static_client")
+FRAGMENTS_SUBDIR = "fragmentos"
+PAGES_SUBDIR = "capitulos"
+SITE_TITLE = "Guía de Física: Serway & Jewett"
+# ---------------------
+
+# Exportación estática de la guía, desde el mismo paquete de capítulos que usa la app.
+#
+#   index.html, app.js, estilo.css   cliente liviano (utils/static_client/)
+#   nav.json                         catálogo de la barra lateral y URL del fragmento de cada capítulo
+#   fragmentos/<clave>.<hash>.json.gz              teoría y enunciados de un capítulo (HTML)
+#   fragmentos/<clave>/ejercicio_NNN.<hash>.json.gz   solución de un ejercicio, al abrirla
+#   capitulos/<clave>.html           página completa del capítulo, sin JavaScript
+#
+# Los fragmentos llevan el hash de su contenido en el nombre, así el CDN los puede cachear
+# como inmutables y solo nav.json necesita un TTL corto. Un archivo idéntico no se
+# reescribe (el mtime no cambia y una sincronización incremental no lo vuelve a subir), y
+# los fragmentos de una exportación anterior que ya no se usan se borran.
+
+
+def _write_if_changed(path, data):
+    """Escribe los bytes `data` solo si difieren de lo que ya hay en disco. Devuelve True si escribió."""
+    try:
+        with open(path, 'rb') as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+def _gzip_json(payload):
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # mtime=0: la misma entrada produce siempre los mismos bytes
+    return gzip.compress(raw, compresslevel=9, mtime=0)
+
+
+def _hashed_name(stem, data):
+    return f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}.json.gz"
+
+
+class StaticExporter:
+    """Exporta el paquete de capítulos a `export_dir`; lleva la cuenta de lo escrito."""
+
+    def __init__(self, bundle, export_dir=EXPORT_DIR, render_dir=RENDER_DIR):
+        self.bundle = bundle
+        self.export_dir = export_dir
+        self.render_dir = render_dir
+        self.written = 0
+        self.unchanged = 0
+        self.live_paths = set()
+
+    def _html(self, markdown_text):
+        """HTML del fragmento: del caché de render_cache si está, si no se renderiza ahora."""
+        rendered = get_rendered_html(markdown_text, self.render_dir)
+        return rendered if rendered is not None else render_markdown_html(markdown_text)
+
+    def _emit(self, relative_path, data):
+        path = os.path.join(self.export_dir, relative_path)
+        self.live_paths.add(os.path.normpath(path))
+        if _write_if_changed(path, data):
+            self.written += 1
+        else:
+            self.unchanged += 1
+        return relative_path.replace(os.sep, '/')
+
+    def export_chapter(self, chapter_key, parte):
+        """Escribe los fragmentos y la página del capítulo. Devuelve la URL de su fragmento."""
+        data, error = self.bundle.get(chapter_key)
+        if error:
+            payload = _gzip_json({'key': chapter_key, 'titulo': chapter_key, 'parte': parte, 'error': error})
+            return self._emit(os.path.join(FRAGMENTS_SUBDIR, _hashed_name(chapter_key, payload)), payload)
+
+        teoria = None
+        ejercicios_seccion = None
+        for section in data.get('secciones', []):
+            if section.get('tipo') == 'teoria' and teoria is None:
+                teoria = section
+            elif section.get('tipo') == 'ejercicios' and ejercicios_seccion is None:
+                ejercicios_seccion = section
+
+        ejercicios = []
+        soluciones = []
+        for ejercicio in (ejercicios_seccion or {}).get('ejercicios', []):
+            body = self.bundle.get(ejercicio['solucion_ref']) or {}
+            solucion_html = self._html(body.get('solucion_markdown', ''))
+            soluciones.append(solucion_html)
+            payload = _gzip_json({'html': solucion_html})
+            stem = os.path.join(FRAGMENTS_SUBDIR, *ejercicio['solucion_ref'].split('/'))
+            ejercicios.append({
+                'ejercicio_id': ejercicio.get('ejercicio_id'),
+                # Mismo formato que la app: el enunciado va en negrita
+                'enunciado': self._html(f"**{ejercicio['enunciado']}**"),
+                'solucion': self._emit(_hashed_name(stem, payload), payload),
+            })
+
+        fragment = {
+            'key': chapter_key,
+            'titulo': data['titulo'],
+            'parte': parte,
+            'teoria': {'titulo': teoria['titulo'], 'html': self._html(teoria['contenido_markdown'])} if teoria else None,
+            'ejercicios': {'titulo': ejercicios_seccion['titulo'], 'items': ejercicios} if ejercicios_seccion else None,
+        }
+        self._emit(os.path.join(PAGES_SUBDIR, f"{chapter_key}.html"),
+                   render_chapter_page(fragment, soluciones).encode('utf-8'))
+        payload = _gzip_json(fragment)
+        return self._emit(os.path.join(FRAGMENTS_SUBDIR, _hashed_name(chapter_key, payload)), payload)
+
+    def export(self):
+        """Exporta todo el catálogo, el cliente y nav.json; borra fragmentos huérfanos."""
+        nav = {'titulo': SITE_TITLE, 'libros': []}
+        for libro in self.bundle.catalog:
+            partes = []
+            for parte in libro['partes']:
+                capitulos = []
+                for capitulo in parte['capitulos']:
+                    capitulos.append(dict(capitulo, fragmento=self.export_chapter(capitulo['key'], parte['nombre']),
+                                          pagina=f"{PAGES_SUBDIR}/{capitulo['key']}.html"))
+                partes.append({'nombre': parte['nombre'], 'capitulos': capitulos})
+            nav['libros'].append({'libro': libro['libro'], 'volumen': libro['volumen'], 'partes': partes})
+
+        self._emit('nav.json', json.dumps(nav, ensure_ascii=False, indent=1).encode('utf-8'))
+        for name in sorted(os.listdir(CLIENT_DIR)):
+            with open(os.path.join(CLIENT_DIR, name), 'rb') as f:
+                self._emit(name, f.read())
+
+        removed = 0
+        for subdir in (FRAGMENTS_SUBDIR, PAGES_SUBDIR):
+            for root, _, files in os.walk(os.path.join(self.export_dir, subdir)):
+                for name in files:
+                    path = os.path.normpath(os.path.join(root, name))
+                    if path not in self.live_paths:
+                        os.remove(path)
+                        removed += 1
+        return removed
+
+
+def render_chapter_page(fragment, soluciones):
+    """Página HTML completa de un capítulo (sin JavaScript: las soluciones van en <details>)."""
+    parts = [
+        '<!DOCTYPE html>',
+        '<html lang="es">',
+        '<head>',
+        '<meta charset="utf-8">',
+        '<meta name="viewport" content="width=device-width, initial-scale=1">',
+        f'<title>{html.escape(fragment["titulo"])} · {html.escape(SITE_TITLE)}</title>',
+        '<link rel="stylesheet" href="../estilo.css">',
+        '</head>',
+        '<body class="pagina-capitulo">',
+        '<main>',
+        f'<p><a href="../index.html#{fragment["key"]}">← Volver a la guía</a></p>',
+        f'<h1>{html.escape(fragment["titulo"])}</h1>',
+        f'<h2 class="parte">{html.escape(fragment["parte"])}</h2>',
+    ]
+    if fragment['teoria']:
+        parts.append(f'<section><h2>{html.escape(fragment["teoria"]["titulo"])}</h2>{fragment["teoria"]["html"]}</section>')
+    if fragment['ejercicios']:
+        parts.append(f'<section><h2>{html.escape(fragment["ejercicios"]["titulo"])}</h2>')
+        for ejercicio, solucion in zip(fragment['ejercicios']['items'], soluciones):
+            parts.append('<article class="ejercicio">')
+            parts.append(ejercicio['enunciado'])
+            parts.append(f'<details><summary>✅ Mostrar Solución Detallada</summary>{solucion}</details>')
+            parts.append('</article>')
+        parts.append('</section>')
+    parts += ['</main>', '</body>', '</html>', '']
+    return '\n'.join(parts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta la guía como sitio estático (HTML + fragmentos JSON comprimidos).")
+    parser.add_argument('--out', default=EXPORT_DIR, help=f"Directorio de salida (por defecto '{EXPORT_DIR}').")
+    parser.add_argument('--clean', action='store_true', help="Borra el directorio de salida antes de exportar.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+        sys.exit(1)
+    if args.clean and os.path.isdir(args.out):
+        shutil.rmtree(args.out)
+
+    print("--- 📦 Exportando la guía como sitio estático ---")
+    exporter = StaticExporter(open_bundle(INPUT_DIR, BUNDLE_PATH), args.out)
+    removed = exporter.export()
+    print(f"✅ {exporter.written} archivos escritos, {exporter.unchanged} sin cambios, {removed} huérfanos borrados en '{args.out}'.")
@@ -1,98 +1,311 @@
+import argparse
 import os
 import re
 import json
+import time
+
+from chapter_store import ChapterStore
+from latex_lexer import tokenize
 
 BASE_PATH = "json_capitulos"
 
+# Motor de reparación basado en tokens.
+#
+# En lugar de encadenar reemplazos sobre todo el texto, cada campo se divide con el
+# lexer de delimitadores en segmentos de texto y de math, y cada segmento recibe solo
+# las reparaciones que tienen sentido en su contexto. El resultado es idempotente: una
+# segunda ejecución no cambia nada, y el costo es lineal en el largo del campo.
+
+SI_UNITS = ('mol', 'kg', 'cm', 'cd', 'Hz', 'm', 's', 'A', 'K', 'N', 'J', 'W', 'V', 'C')
+MATH_COMMANDS = {
+    'text', 'mathrm', 'mathbf', 'vec', 'hat', 'frac', 'sqrt', 'sum', 'int', 'Delta', 'delta',
+    'cdot', 'times', 'color', 'implies', 'approx', 'le', 'ge', 'neq', 'mu', 'theta', 'omega', 'Omega',
+    'alpha', 'beta', 'gamma', 'lambda', 'pi', 'rho', 'tau', 'phi', 'sin', 'cos', 'tan', 'left', 'right',
+    'nu', 'nabla',
+}
+_UNITS = '|'.join(SI_UNITS)
+_BRACES = r'(?:\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})'
+
+# Restos de las versiones anteriores de este script, que rompían la estructura de
+# delimitadores: '$$\\frac$${1}{2}' (un '$$' antes y otro después del comando) y
+# '| $$C$$oncepto' (una "unidad" envuelta dentro de una palabra de tabla).
+_LEGACY_ARTIFACTS = re.compile(
+    r'\$\$(?P<cmd>\\\\[A-Za-z]+)\$\$'
+    r'|(?<=\| )\$\$(?P<unit>' + _UNITS + r')\$\$(?=\w)'
+)
+
+# Reparaciones en segmentos de texto (fuera de math)
+_MATH_NAMES = '|'.join(sorted(MATH_COMMANDS, key=len, reverse=True))
+# Subíndices y exponentes pegados a un comando: '\text{m}^2', '\vec{v}_{x}'
+_SCRIPTS = r'(?:[\^_](?:' + _BRACES + r'|\\[A-Za-z]+|-?\d+(?![A-Za-z])|[A-Za-z](?![A-Za-z]))(?![A-Za-z0-9]))*'
+# Después de un '\n' literal (que se convierte en salto de línea) empieza una palabra nueva
+_WORD_START = r'(?:(?<![A-Za-z\\])|(?<=\\n))'
+_TEXT_FIX_RULES = (
+    # Comando de math suelto (con una o dos barras), sus argumentos entre llaves y sus índices
+    r'(?P<cmd>(?<!\\)\\{1,2}(?:' + _MATH_NAMES + r')(?![A-Za-z])(?:\s*' + _BRACES + r')*' + _SCRIPTS + r')'
+    # '\n' literal: salto de línea escapado de más en el JSON
+    r'|(?P<newline>(?<!\\)\\{1,2}n)'
+    # Cualquier otro comando queda como está
+    r'|(?P<other>(?<!\\)\\{1,2}[A-Za-z]+)'
+    # 'text{m}' o 'textm' sin barra: restos de OCR o de correcciones fallidas
+    r'|' + _WORD_START + r'text(?P<targs>' + _BRACES + r')(?P<tscripts>' + _SCRIPTS + r')'
+    r'|' + _WORD_START + r'text?(?P<glued>' + _UNITS + r')\b(?P<gscripts>' + _SCRIPTS + r')'
+    # Celda de tabla que contiene solo una unidad (solo en la tabla de 'Unidades SI')
+    r'|(?<=\|)(?P<pre>[ \t]*)(?P<cell>' + _UNITS + r')(?P<post>[ \t]*)(?=\|)'
+)
+_TABLE_FIXES = re.compile(_TEXT_FIX_RULES)
+# Fuera de esa tabla todas las reglas empiezan con '\' o con 't': la búsqueda salta el
+# resto del texto sin probarlas una por una
+_TEXT_FIXES = re.compile(r'(?=[\\t])(?:' + _TEXT_FIX_RULES + r')')
+_DOUBLE_ESCAPED = re.compile(r'(?<!\\)\\\\(?=[A-Za-z])')
+_CODE_SPAN = re.compile(r'\\[\\`]|`+')
+
+
+def _wrap_inline(latex):
+    return '$' + _DOUBLE_ESCAPED.sub(r'\\', latex) + '$'
+
+
+def _math_piece(match):
+    """LaTeX a envolver en '$...$' para una coincidencia de _TEXT_FIXES, o None."""
+    if match.group('cmd') is not None:
+        return '\\' + match.group('cmd').lstrip('\\')
+    if match.group('targs') is not None:
+        return '\\text' + match.group('targs') + match.group('tscripts')
+    if match.group('glued') is not None:
+        return '\\text{' + match.group('glued') + '}' + match.group('gscripts')
+    if match.group('cell') is not None:
+        return '\\text{' + match.group('cell') + '}'
+    return None
+
+
+def _repair_plain(segment, units_table):
+    """
+    Repara texto sin code spans. Los comandos pegados entre sí (con sus índices) van en un
+    solo '$...$': envolverlos por separado dejaría '$a$$b$', que se lee como un '$$'.
+    """
+    out = []
+    math = []
+    last = 0
+    for match in (_TABLE_FIXES if units_table else _TEXT_FIXES).finditer(segment):
+        latex = _math_piece(match)
+        # La math en línea no cruza líneas: lo que tenga un salto de línea queda como está
+        if latex is not None and '\n' in latex:
+            latex = None
+        if match.start() > last or latex is None:
+            if math:
+                out.append(_wrap_inline(''.join(math)))
+                math = []
+            out.append(segment[last:match.start()])
+        if latex is None:
+            out.append('\n' if match.group('newline') else match.group(0))
+        elif match.group('cell') is not None:
+            out.append(match.group('pre') + _wrap_inline(latex) + match.group('post'))
+        else:
+            math.append(latex)
+        last = match.end()
+    if math:
+        out.append(_wrap_inline(''.join(math)))
+    out.append(segment[last:])
+    return ''.join(out)
+
+
+def _repair_text(segment, units_table):
+    """Repara un segmento de texto; los code spans (`...`) quedan intactos."""
+    parts = []
+    pos = search = 0
+    while True:
+        # Como en el lexer: una racha de backticks sin cierre es texto y se sigue buscando
+        opening = _CODE_SPAN.search(segment, search)
+        if opening is None:
+            parts.append(_repair_plain(segment[pos:], units_table))
+            return ''.join(parts)
+        if opening.group()[0] == '\\':
+            # '\`' es un backtick literal y '\\' una barra: no abren nada
+            search = opening.end()
+            continue
+        closing = re.compile(r'(?<!`)' + opening.group() + r'(?!`)').search(segment, opening.end())
+        if closing is None:
+            search = opening.end()
+            continue
+        parts.append(_repair_plain(segment[pos:opening.start()], units_table))
+        parts.append(segment[opening.start():closing.end()])
+        pos = search = closing.end()
+
+
+def _ends_with_dollar(text):
+    """True si `text` termina en un '$' sin escapar."""
+    stripped = text.rstrip('$')
+    return text.endswith('$') and (len(stripped) - len(stripped.rstrip('\\'))) % 2 == 0
+
+
 def fix_latex_delimiters_in_string(content):
     """
-    Versión para limpiar y envolver unidades, y asegurar el doble escape.
+    Repara un campo de markdown en una pasada por sus tokens. Devuelve el texto reparado.
+
+    - math: colapsa comandos con doble escape ('\\\\text' -> '\\text') y elimina
+      delimitadores vacíos ('$$$$');
+    - texto: envuelve en '$...$' los comandos LaTeX sueltos y las unidades pegadas
+      ('textm'), convierte los '\\n' literales en saltos de línea y, solo en la tabla
+      de 'Unidades SI', envuelve las celdas que contienen una unidad;
+    - las ecuaciones sin cerrar se dejan intactas (lint_latex.py las reporta).
     """
+    content = _LEGACY_ARTIFACTS.sub(lambda m: m.group('cmd') or m.group('unit'), content)
+    units_table = 'Unidades SI' in content
 
-    # 1. Limpieza de residuos comunes de errores de corrección (como 'text' suelto)
-    content = content.replace('\\text{m}', '$$\\text{m}$$')
-    content = content.replace('text{m}', '$$\\text{m}$$')
-
-    # 2. Asegurar que las ecuaciones grandes (frac, Delta, color) sigan envueltas
-    # Usa la versión robusta que funcionó antes
-    latex_commands = ['frac', 'Delta', 'sum', 'int', 'sqrt', 'text', 'color']
-    pattern = r'([^$])(\\\\(?:' + '|'.join(latex_commands) + r')\s*\\{.*?)\\}'
-    content = re.sub(r'([^$])(\\\\(?:frac|Delta|sum|int|sqrt|text|color).*?)', r'\1$$\2$$', content, flags=re.IGNORECASE)
-
-    # 3. Limpiar cualquier resto de 'tex' suelto que no pertenezca a un comando
-    # Esto busca "tex" que no está escapado, asumiendo que es basura de una corrección fallida
-    # Lo reemplazaremos por el correcto \text{unidad} dentro de $$
-    content = re.sub(r'\\tex(m|kg|s|A|K|mol|cd)', r'\\text{\1}', content, flags=re.IGNORECASE) # Arregla \text{m}
-    content = re.sub(r'tex(m|kg|s|A|K|mol|cd)', r'\\text{\1}', content, flags=re.IGNORECASE) # Arregla texm
-
-    # 4. Envolver unidades comunes que se quedaron fuera del paso 2 (solo si parecen estar en una tabla o párrafo)
-    # Buscamos unidades SI comunes que no estén envueltas en $$ y las envolvemos en \text{unit} y $$
-    units_to_wrap = ['m', 'kg', 's', 'A', 'K', 'mol', 'cd', 'cm', 'N', 'J', 'W', 'Hz', 'V', 'C']
-    for unit in units_to_wrap:
-        # Busca la unidad que no esté precedida por $ o \ (para no tocar comandos existentes)
-        # Esto es muy peligroso, lo usaremos solo para el caso exacto de la tabla de SI
-        if 'Unidades SI' in content:
-            content = content.replace(f'| {unit}', f'| $${unit}$$')
-
-    # 5. Limpiar posibles dobles $$ y restos de saltos de línea \\n/\\r
-    content = content.replace('$$$$', '$$')
-    content = content.replace('$$$$$$', '$$')
-    content = content.replace('\\\\n', '\n')
-    content = content.replace('\\\\r', '\r')
-
-    return content
-
-# El resto del script sigue siendo el mismo (process_file_for_latex_fix y __main__)
+    parts = []
+    # Al borrar una ecuación vacía, el texto de ambos lados queda junto y se repara junto
+    # ('\\n$$$$mol' es '\\nmol'); si no, la segunda ejecución encontraría algo nuevo
+    text = []
+    for token in tokenize(content):
+        segment = content[token.start:token.end]
+        if token.kind == 'text':
+            text.append(segment)
+            continue
+        inner = content[token.inner_start:token.inner_end]
+        if token.kind != 'unclosed' and not inner.strip():
+            continue
+        if text:
+            parts.append(_repair_text(''.join(text), units_table))
+            text = []
+        if token.kind == 'unclosed':
+            parts.append(segment)
+        else:
+            opener = content[token.start:token.inner_start]
+            parts.append(opener + _DOUBLE_ESCAPED.sub(r'\\', inner) + opener)
+    if text:
+        parts.append(_repair_text(''.join(text), units_table))
 
-def process_file_for_latex_fix(file_path):
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+    # Dos ecuaciones pegadas ('$a$$b$') se leerían como un delimitador '$$'
+    repaired = []
+    for part in parts:
+        if repaired and _ends_with_dollar(repaired[-1]) and part.startswith('$'):
+            repaired.append(' ')
+        repaired.append(part)
+    return ''.join(repaired)
 
-        modified = False
 
+def iter_corpus_fields(base_path=BASE_PATH):
+    """Todos los campos que repara este script, para el benchmark."""
+    for filename in sorted(os.listdir(base_path)):
+        if not filename.endswith('.json'):
+            continue
+        with open(os.path.join(base_path, filename), 'r', encoding='utf-8') as f:
+            data = json.load(f)
         for section in data.get('secciones', []):
             if 'contenido_markdown' in section:
-                original_content = section['contenido_markdown']
-                new_content = fix_latex_delimiters_in_string(original_content)
-                if original_content != new_content:
-                    section['contenido_markdown'] = new_content
+                yield section['contenido_markdown']
+            for ejercicio in section.get('ejercicios', []):
+                yield ejercicio['solucion_markdown']
+
+
+def run_benchmark(megabytes):
+    """
+    Mide el costo por MB de markdown repitiendo los campos reales del corpus y
+    comprueba la idempotencia: la segunda pasada no debe cambiar nada.
+    """
+    fields = list(iter_corpus_fields())
+    corpus_bytes = sum(len(f.encode('utf-8')) for f in fields)
+    repeats = max(1, int(megabytes * 1024 * 1024 / corpus_bytes))
+    workload = fields * repeats
+    total_mb = corpus_bytes * repeats / (1024 * 1024)
+
+    start = time.perf_counter()
+    first_pass = [fix_latex_delimiters_in_string(field) for field in fields]
+    for field in workload:
+        fix_latex_delimiters_in_string(field)
+    elapsed = time.perf_counter() - start
+
+    second_pass_changes = sum(1 for field in first_pass if fix_latex_delimiters_in_string(field) != field)
+
+    print(f"📏 {total_mb:.2f} MB de markdown ({len(workload)} campos) en {elapsed:.3f} s")
+    print(f"⏱️ {elapsed / total_mb * 1000:.1f} ms por MB")
+    if second_pass_changes:
+        print(f"❌ No idempotente: la segunda pasada cambió {second_pass_changes} campos.")
+    else:
+        print("✅ Idempotente: la segunda pasada no produjo cambios.")
+    return second_pass_changes == 0
+
+def fix_chapter(data):
+    """Repara en memoria los campos de markdown de un capítulo. Devuelve True si cambió algo."""
+    modified = False
+
+    for section in data.get('secciones', []):
+        if 'contenido_markdown' in section:
+            original_content = section['contenido_markdown']
+            new_content = fix_latex_delimiters_in_string(original_content)
+            if original_content != new_content:
+                section['contenido_markdown'] = new_content
+                modified = True
+
+        if section.get('tipo') == 'ejercicios':
+            for ejercicio in section.get('ejercicios', []):
+                original_solucion = ejercicio['solucion_markdown']
+                new_solucion = fix_latex_delimiters_in_string(original_solucion)
+                if original_solucion != new_solucion:
+                    ejercicio['solucion_markdown'] = new_solucion
                     modified = True
 
-            if section.get('tipo') == 'ejercicios':
-                for ejercicio in section.get('ejercicios', []):
-                    original_solucion = ejercicio['solucion_markdown']
-                    new_solucion = fix_latex_delimiters_in_string(original_solucion)
-                    if original_solucion != new_solucion:
-                        ejercicio['solucion_markdown'] = new_solucion
-                        modified = True
-
-        if modified:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return f"✅ Archivo '{os.path.basename(file_path)}' corregido."
-        else:
-            return f"☑️ Archivo '{os.path.basename(file_path)}' sin cambios."
+    return modified
+
+
+def _result_message(filename, modified, error):
+    if isinstance(error, json.JSONDecodeError):
+        return f"❌ ERROR: '{filename}' tiene un error de sintaxis JSON. ¡Corrija esto ANTES de ejecutar el script!"
+    if error is not None:
+        return f"❌ ERROR al procesar '{filename}': {error}"
+    if modified:
+        return f"✅ Archivo '{filename}' corregido."
+    return f"☑️ Archivo '{filename}' sin cambios."
+
+
+def fix_store(store, filenames=None):
+    """
+    Aplica las reparaciones a los capítulos de un ChapterStore, sin escribir: el que
+    llama hace `store.commit()` (así se pueden encadenar otros correctores antes).
+    Devuelve un mensaje por capítulo.
+    """
+    return [_result_message(filename, modified, error) for filename, modified, error in store.apply(fix_chapter, filenames)]
+
 
-    except json.JSONDecodeError:
-        return f"❌ ERROR: '{os.path.basename(file_path)}' tiene un error de sintaxis JSON. ¡Corrija esto ANTES de ejecutar el script!"
+def process_file_for_latex_fix(file_path):
+    """Repara un solo archivo; la escritura es atómica y solo ocurre si hubo cambios."""
+    store = ChapterStore(os.path.dirname(file_path) or '.')
+    filename = os.path.basename(file_path)
+    try:
+        message, = fix_store(store, [filename])
+        store.commit()
     except Exception as e:
-        return f"❌ ERROR al procesar '{os.path.basename(file_path)}': {e}"
+        return f"❌ ERROR al procesar '{filename}': {e}"
+    return message
 
 if __name__ == "__main__":
-    print("--- ⚙️ Iniciando Corrector Automático de LaTeX en JSON (Versión Unidades) ---")
+    parser = argparse.ArgumentParser(description="Repara los delimitadores LaTeX de los capítulos JSON.")
+    parser.add_argument('--bench', type=float, metavar='MB', default=None,
+                        help="No modifica nada: mide el costo por MB sobre MB megabytes de markdown y verifica la idempotencia.")
+    args = parser.parse_args()
+
+    if args.bench is not None:
+        raise SystemExit(0 if run_benchmark(args.bench) else 1)
+
+    print("--- ⚙️ Iniciando Corrector Automático de LaTeX en JSON (Motor por Tokens) ---")
 
     if not os.path.exists(BASE_PATH):
         print(f"❌ ERROR: El directorio '{BASE_PATH}' no fue encontrado.")
     else:
-        file_list = sorted([f for f in os.listdir(BASE_PATH) if f.endswith('.json')])
+        store = ChapterStore(BASE_PATH)
+        file_list = store.filenames()
 
         if not file_list:
             print(f"⚠️ Advertencia: No se encontraron archivos JSON en '{BASE_PATH}'.")
         else:
             print(f"🔎 Se encontraron {len(file_list)} archivos. Iniciando corrección...")
-            for filename in file_list:
-                file_path = os.path.join(BASE_PATH, filename)
-                result = process_file_for_latex_fix(file_path)
+            for result in fix_store(store, file_list):
                 print(result)
-            print("--- Proceso completado. Reinicie Streamlit. ---")
+            # Todos los capítulos corregidos se escriben juntos, cada uno de forma atómica
+            try:
+                written = store.commit()
+            except RuntimeError as e:
+                print(f"❌ ERROR: {e}")
+                raise SystemExit(1)
+            print(f"💾 {len(written)} capítulos escritos.")
+            print("--- Proceso completado. La app recarga sola los capítulos modificados. ---")
@@ -1,5 +1,4 @@
-import fileinput
-import sys
+from rewrite_engine import RewriteEngine
 
 SINTAXIS_ROTA = {
     # Error 1: Vector con componentes (falta el vector, subíndices y delimitadores)
@@ -10,18 +9,21 @@ SINTAXIS_ROTA = {
     'V +V = (V +V ,V +V +,V +V ),': r'$$\vec{V}_1 + \vec{V}_2 = (V_{1x} + V_{2x}, V_{1y} + V_{2y}, V_{1z} + V_{2z})$$'
 }
 
-archivo_a_corregir = 'docs/clase_01_vectores.myst'
+ARCHIVO_A_CORREGIR = 'docs/clase_01_vectores.myst'
 
-try:
-    # Abre el archivo para reemplazar el contenido 'in place' (directamente)
-    with fileinput.FileInput(archivo_a_corregir, inplace=True, encoding='utf-8') as archivo:
-        for linea in archivo:
-            linea_corregida = linea
-            for rota, correcta in SINTAXIS_ROTA.items():
-                linea_corregida = linea_corregida.replace(rota, correcta)
 
-            sys.stdout.write(linea_corregida) # Escribe la línea corregida
+def corregir_archivo(archivo=ARCHIVO_A_CORREGIR):
+    """Todas las reglas en una sola pasada; el archivo solo se reescribe si hubo reemplazos."""
+    return RewriteEngine(SINTAXIS_ROTA).rewrite_file(archivo)
 
-    print(f"✅ ¡Éxito! Sintaxis corregida en: {archivo_a_corregir}")
-except FileNotFoundError:
-    print(f"❌ Error: Archivo {archivo_a_corregir} no encontrado. Mueva el archivo o corrija la ruta.")
+
+if __name__ == "__main__":
+    try:
+        reemplazos = corregir_archivo(ARCHIVO_A_CORREGIR)
+
+        if reemplazos:
+            print(f"✅ ¡Éxito! Sintaxis corregida en: {ARCHIVO_A_CORREGIR} ({reemplazos} reemplazos)")
+        else:
+            print(f"☑️ Sin cambios en: {ARCHIVO_A_CORREGIR}")
+    except FileNotFoundError:
+        print(f"❌ Error: Archivo {ARCHIVO_A_CORREGIR} no encontrado. Mueva el archivo o corrija la ruta.")
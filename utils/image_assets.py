@@ -0,0 +1,221 @@
+import argparse
+import hashlib
+import io
+import json
+import os
+
+# --- CONFIGURACIÓN ---
+# Diagramas fuente: uno por capítulo, con el nombre del capítulo (diagramas/capitulo_05.png)
+DIAGRAMS_DIR = "diagramas"
+SOURCE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+# Derivados: dentro de utils/static/, que Streamlit sirve en /app/static/ con
+# server.enableStaticServing (ver .streamlit/config.toml). Streamlit no agrega Cache-Control
+# a esas respuestas: la caché de larga duración la pone el proxy inverso (ver más abajo).
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static", "diagramas")
+STATIC_URL = "/app/static/diagramas"
+MANIFEST_NAME = "manifest.json"
+# Ancho máximo de cada tamaño, en píxeles (una imagen más chica no se amplía). 'completa'
+# coincide con el ancho máximo que st.image envía sin redimensionar (2 x 730 px).
+SIZES = {'miniatura': 480, 'completa': 1460}
+WEBP_QUALITY = 82
+# Incrementar al cambiar la codificación para forzar la regeneración de todos los derivados.
+ASSETS_VERSION = "1"
+# ---------------------
+
+# Derivados de los diagramas de cada capítulo para la app.
+#
+# De cada fuente se generan los tamaños de SIZES en WebP y en PNG, sin metadatos y con la
+# orientación EXIF ya aplicada. Cada archivo se nombra con el hash de su contenido
+# (capitulo_05.miniatura.1a2b3c4d5e6f.webp): un nombre nunca cambia de contenido y una
+# fuente editada produce nombres nuevos. El manifiesto (manifest.json, junto a los derivados) guarda el
+# sha256 de cada fuente y la configuración: una fuente sin cambios no se vuelve a procesar.
+# Los derivados que ya no figuran en el manifiesto se borran.
+#
+# Necesita Pillow solo para generar; la app lee los archivos ya generados.
+#
+# Streamlit sirve /app/static/ sin Cache-Control (solo ETag y Last-Modified), así que por sí
+# solo el navegador revalida cada derivado. Como los nombres llevan el hash, el proxy inverso
+# delante de la app puede marcarlos como inmutables; por ejemplo, en nginx:
+#
+#     location /app/static/diagramas/ {
+#         proxy_pass http://127.0.0.1:8501;
+#         add_header Cache-Control "public, max-age=31536000, immutable" always;
+#     }
+#
+# El manifiesto no se sirve desde ahí (lo lee la app del disco), así que la regla no lo afecta.
+
+
+def _settings():
+    return {'version': ASSETS_VERSION, 'tamaños': SIZES, 'calidad_webp': WEBP_QUALITY}
+
+
+def list_diagrams(diagrams_dir=DIAGRAMS_DIR):
+    """Devuelve {clave de capítulo: nombre del archivo fuente}."""
+    diagrams = {}
+    if not os.path.isdir(diagrams_dir):
+        return diagrams
+    for filename in sorted(os.listdir(diagrams_dir)):
+        stem, extension = os.path.splitext(filename)
+        if stem.startswith('capitulo_') and extension.lower() in SOURCE_EXTENSIONS:
+            diagrams.setdefault(stem, filename)
+    return diagrams
+
+
+def load_manifest(assets_dir=ASSETS_DIR):
+    """Lee el manifiesto de derivados; si no existe o no se puede leer, lo trata como vacío."""
+    try:
+        with open(os.path.join(assets_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save(image, image_format, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def _encode(image, image_format):
+    if image_format == 'png':
+        return _save(image, 'PNG', optimize=True)
+    # En diagramas de líneas y colores planos el WebP sin pérdida suele pesar menos que el
+    # con pérdida (y que el PNG); en dibujos con degradados, al revés: se queda el menor.
+    return min(_save(image, 'WEBP', quality=WEBP_QUALITY, method=6),
+               _save(image, 'WEBP', lossless=True, quality=100, method=6), key=len)
+
+
+def derive_diagram(chapter_key, source_path):
+    """
+    Genera los derivados de una fuente. Devuelve (entrada del manifiesto, {archivo: bytes}).
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(source_path) as original:
+        image = ImageOps.exif_transpose(original)
+        image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+
+    width, height = image.size
+    files = {}
+    variants = {}
+    for size_name, max_width in SIZES.items():
+        resized = image
+        if width > max_width:
+            resized = image.resize((max_width, max(1, round(height * max_width / width))), Image.LANCZOS)
+        variants[size_name] = {}
+        for image_format in ('webp', 'png'):
+            data = _encode(resized, image_format)
+            filename = f"{chapter_key}.{size_name}.{hashlib.sha256(data).hexdigest()[:12]}.{image_format}"
+            files[filename] = data
+            variants[size_name][image_format] = {
+                'archivo': filename, 'ancho': resized.width, 'alto': resized.height, 'bytes': len(data),
+            }
+    return {'ancho': width, 'alto': height, 'variantes': variants}, files
+
+
+def _write_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_assets(diagrams_dir=DIAGRAMS_DIR, assets_dir=ASSETS_DIR, force=False):
+    """
+    Genera los derivados de las fuentes nuevas o modificadas y reescribe el manifiesto.
+    Devuelve (generados, sin cambios, huérfanos borrados).
+    """
+    previous = load_manifest(assets_dir)
+    reuse = previous.get('config') == _settings() and not force
+    previous_diagrams = previous.get('diagramas', {}) if reuse else {}
+
+    os.makedirs(assets_dir, exist_ok=True)
+    diagrams = {}
+    generated, unchanged = 0, 0
+    for chapter_key, filename in list_diagrams(diagrams_dir).items():
+        source_path = os.path.join(diagrams_dir, filename)
+        with open(source_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+
+        entry = previous_diagrams.get(chapter_key)
+        if (entry and entry['sha256'] == digest and entry['fuente'] == filename
+                and all(os.path.exists(os.path.join(assets_dir, v['archivo']))
+                        for formats in entry['variantes'].values() for v in formats.values())):
+            diagrams[chapter_key] = entry
+            unchanged += 1
+            continue
+
+        entry, files = derive_diagram(chapter_key, source_path)
+        for name, data in files.items():
+            path = os.path.join(assets_dir, name)
+            if not os.path.exists(path):
+                _write_atomic(path, data)
+        diagrams[chapter_key] = {'fuente': filename, 'sha256': digest, **entry}
+        generated += 1
+
+    manifest = {'config': _settings(), 'diagramas': diagrams}
+    _write_atomic(os.path.join(assets_dir, MANIFEST_NAME),
+                  json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+
+    live = {v['archivo'] for entry in diagrams.values() for formats in entry['variantes'].values() for v in formats.values()}
+    removed = 0
+    for name in os.listdir(assets_dir):
+        if name != MANIFEST_NAME and name not in live:
+            os.remove(os.path.join(assets_dir, name))
+            removed += 1
+    return generated, unchanged, removed
+
+
+# --- LECTURA DESDE LA APP ---
+class AssetTier:
+    """Nivel compartido del caché de contenido sobre los derivados (el nombre ya lleva el hash)."""
+
+    def __init__(self, directory=ASSETS_DIR):
+        self.directory = directory
+
+    def version(self, key):
+        return ""
+
+    def get(self, key):
+        try:
+            with open(os.path.join(self.directory, key), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        return data, len(data)
+
+
+class ImageAssets:
+    """Manifiesto de derivados para la app; se relee solo cuando cambia en disco."""
+
+    def __init__(self, assets_dir=ASSETS_DIR):
+        self.assets_dir = assets_dir
+        self._manifest_path = os.path.join(assets_dir, MANIFEST_NAME)
+        self._mtime_ns = None
+        self._diagrams = {}
+
+    def diagram(self, chapter_key):
+        """Entrada del manifiesto del capítulo ('capitulo_05') o None si no tiene diagrama."""
+        try:
+            mtime_ns = os.stat(self._manifest_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime_ns = None
+        if mtime_ns != self._mtime_ns:
+            self._diagrams = load_manifest(self.assets_dir).get('diagramas', {})
+            self._mtime_ns = mtime_ns
+        return self._diagrams.get(chapter_key)
+
+
+def static_url(variants):
+    """URL del formato más liviano de un tamaño, bajo el servicio de estáticos de Streamlit."""
+    return f"{STATIC_URL}/{min(variants.values(), key=lambda v: v['bytes'])['archivo']}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera miniaturas y versiones completas (WebP y PNG) de los diagramas.")
+    parser.add_argument('--force', action='store_true', help="Regenera todos los derivados aunque las fuentes no hayan cambiado.")
+    args = parser.parse_args()
+
+    print(f"--- 🖼️ Generando derivados de '{DIAGRAMS_DIR}' ---")
+    generated, unchanged, removed = build_assets(force=args.force)
+    print(f"✅ {generated} diagramas procesados, {unchanged} sin cambios, {removed} derivados huérfanos borrados ('{ASSETS_DIR}').")
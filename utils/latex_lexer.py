@@ -0,0 +1,78 @@
+import re
+from collections import namedtuple
+
+# Lexer de delimitadores de math para el markdown de los capítulos.
+#
+# Divide un texto en segmentos de texto y de math ('$...$' en línea, '$$...$$' en
+# bloque) con las mismas reglas que usan MyST/dollarmath: '\$' es un dólar literal,
+# los code spans (`...`) no contienen math, la math en línea no cruza un párrafo ni
+# una fila de tabla y '$$' siempre abre o cierra un bloque. Es una sola pasada
+# lineal sobre el texto.
+
+# kind: 'text', 'inline', 'display' o 'unclosed' (math abierta que nunca se cerró)
+# start/end: el segmento completo, con delimitadores; inner_start/inner_end: el contenido
+Token = namedtuple('Token', 'kind start end inner_start inner_end')
+
+_TEXT_EVENTS = re.compile(r'\\[\\$`]|`+|\$\$|\$')
+_INLINE_EVENTS = re.compile(r'\\.|\$|\n[ \t]*\n|\n(?=[ \t]*\|)', re.DOTALL)
+_DISPLAY_EVENTS = re.compile(r'\\.|\$\$', re.DOTALL)
+
+
+def tokenize(text):
+    """Devuelve la lista de Token que cubre `text` completo, en orden."""
+    tokens = []
+    text_start = 0
+    pos = 0
+    length = len(text)
+
+    while pos < length:
+        match = _TEXT_EVENTS.search(text, pos)
+        if match is None:
+            break
+        event = match.group()
+
+        if event[0] == '\\':
+            pos = match.end()
+            continue
+
+        if event[0] == '`':
+            # Code span: se cierra con una racha de backticks de la misma longitud
+            closing = re.compile(r'(?<!`)' + event + r'(?!`)').search(text, match.end())
+            pos = closing.end() if closing else match.end()
+            continue
+
+        if match.start() > text_start:
+            tokens.append(Token('text', text_start, match.start(), text_start, match.start()))
+
+        inner_start = match.end()
+        if event == '$$':
+            kind, inner_end, end = _scan_math(text, inner_start, _DISPLAY_EVENTS, '$$', 'display')
+        else:
+            kind, inner_end, end = _scan_math(text, inner_start, _INLINE_EVENTS, '$', 'inline')
+        tokens.append(Token(kind, match.start(), end, inner_start, inner_end))
+        text_start = pos = end
+
+    if text_start < length:
+        tokens.append(Token('text', text_start, length, text_start, length))
+    return tokens
+
+
+def _scan_math(text, pos, events, closer, kind):
+    """Busca el cierre de un segmento de math. Devuelve (kind, fin_del_contenido, fin)."""
+    while True:
+        match = events.search(text, pos)
+        if match is None:
+            return 'unclosed', len(text), len(text)
+        event = match.group()
+        if event == closer:
+            return kind, match.start(), match.end()
+        if event[0] == '\n':
+            # La math en línea no cruza una línea en blanco ni una fila de tabla: queda sin cerrar
+            return 'unclosed', match.start(), match.start()
+        pos = match.end()
+
+
+def line_col(text, offset):
+    """(línea, columna) desde 1 de un offset dentro de `text`."""
+    line = text.count('\n', 0, offset) + 1
+    return line, offset - (text.rfind('\n', 0, offset) + 1) + 1
@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+from check_json import LineIndex, locate_paths
+from latex_lexer import line_col, tokenize
+
+# --- CONFIGURACIÓN ---
+BASE_PATH = 'json_capitulos'
+LINT_CACHE_PATH = os.path.join('cache', 'lint_cache.json')
+# Incrementar al cambiar las reglas para invalidar los resultados guardados
+LINT_VERSION = '3'
+MARKDOWN_FIELDS = ('contenido_markdown', 'enunciado', 'solucion_markdown')
+# ---------------------
+
+# Linter estático de LaTeX/MathJax: tokeniza cada campo de markdown con el lexer de
+# delimitadores y señala lo que no se va a renderizar bien:
+#   L001  '$' o '$$' sin cerrar
+#   L002  comando LaTeX (p. ej. \text) fuera de math
+#   L003  comando con doble escape ('\\text' se lee como salto de línea + "text")
+#   L004  tabla rota: cantidad de celdas distinta al encabezado o math cortada por '|'
+
+MATH_COMMANDS = {
+    'text', 'mathrm', 'mathbf', 'vec', 'hat', 'frac', 'sqrt', 'sum', 'int', 'Delta', 'delta',
+    'cdot', 'times', 'color', 'implies', 'approx', 'le', 'ge', 'neq', 'mu', 'theta', 'omega',
+    'alpha', 'beta', 'gamma', 'lambda', 'pi', 'rho', 'tau', 'phi', 'sin', 'cos', 'tan', 'left', 'right',
+}
+
+_COMMAND = re.compile(r'(\\+)([A-Za-z]+)')
+_DOUBLE_ESCAPED = re.compile(r'\\\\(?=[A-Za-z])')
+_CELL_SEPARATOR = re.compile(r'(?<!\\)\|')
+
+
+def iter_markdown_fields(data):
+    """Genera (ruta, texto) para cada campo de markdown del capítulo."""
+    for s_index, section in enumerate(data.get('secciones', [])):
+        # La estructura la valida check_json; acá solo se saltea lo que no tiene la forma esperada
+        if not isinstance(section, dict):
+            continue
+        if isinstance(section.get('contenido_markdown'), str):
+            yield ('secciones', s_index, 'contenido_markdown'), section['contenido_markdown']
+        ejercicios = section.get('ejercicios')
+        if not isinstance(ejercicios, list):
+            continue
+        for e_index, ejercicio in enumerate(ejercicios):
+            if not isinstance(ejercicio, dict):
+                continue
+            for field in MARKDOWN_FIELDS[1:]:
+                if isinstance(ejercicio.get(field), str):
+                    yield ('secciones', s_index, 'ejercicios', e_index, field), ejercicio[field]
+
+
+def iter_malformed_exercises(data):
+    """Genera la ruta de cada 'ejercicios' que no es una lista (iter_markdown_fields los saltea)."""
+    for s_index, section in enumerate(data.get('secciones', [])):
+        if isinstance(section, dict) and section.get('ejercicios') is not None \
+                and not isinstance(section['ejercicios'], list):
+            yield ('secciones', s_index, 'ejercicios')
+
+
+def lint_markdown(text):
+    """Devuelve una lista de (offset, código, mensaje) para un campo de markdown."""
+    findings = []
+    tokens = tokenize(text)
+
+    for token in tokens:
+        if token.kind == 'unclosed':
+            delimiter = text[token.start:token.inner_start]
+            findings.append((token.start, 'L001', f"'{delimiter}' sin cerrar"))
+
+        if token.kind == 'text':
+            for match in _COMMAND.finditer(text, token.start, token.end):
+                if match.group(2) in MATH_COMMANDS:
+                    findings.append((match.start(), 'L002', f"'\\{match.group(2)}' fuera de math"))
+        else:
+            for match in _DOUBLE_ESCAPED.finditer(text, token.inner_start, token.inner_end):
+                command = _COMMAND.match(text, match.start()).group(2)
+                findings.append((match.start(), 'L003', f"doble escape en '\\\\{command}' (debería ser '\\{command}')"))
+
+    findings.extend(_lint_tables(text, tokens))
+    return sorted(findings)
+
+
+def _lint_tables(text, tokens):
+    """Revisa las tablas de markdown: celdas por fila y math cortada por separadores."""
+    findings = []
+    math_spans = [(t.start, t.end) for t in tokens if t.kind != 'text']
+
+    header_cells = None
+    offset = 0
+    for line in text.split('\n'):
+        stripped = line.strip()
+        if stripped.startswith('|'):
+            # Las tablas separan celdas por '|' antes de interpretar la math
+            separators = [offset + m.start() for m in _CELL_SEPARATOR.finditer(line)]
+            cells = len(separators) - 1 if stripped.endswith('|') else len(separators)
+            if header_cells is None:
+                header_cells = cells
+            elif cells != header_cells:
+                findings.append((offset, 'L004', f"la fila tiene {cells} celdas y el encabezado {header_cells}"))
+            for start, end in math_spans:
+                # Cada ecuación se revisa en la fila donde empieza
+                if not offset <= start < offset + len(line):
+                    continue
+                if any(start < sep < end - 1 for sep in separators):
+                    findings.append((start, 'L004', "una ecuación contiene '|' y corta la celda (use \\vert o \\mid)"))
+        else:
+            header_cells = None
+        offset += len(line) + 1
+    return findings
+
+
+def lint_file(file_path):
+    """Lintea un archivo de capítulo. Devuelve una lista de (línea, columna, código, mensaje)."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+    except UnicodeDecodeError as e:
+        return [(0, 0, 'L000', f"el archivo no es UTF-8 válido: {e} (ejecute check_json.py)")]
+    try:
+        data = json.loads(content)
+    except json.JSONDecodeError as e:
+        return [(e.lineno, e.colno, 'L000', f"sintaxis JSON: {e.msg} (ejecute check_json.py)")]
+    if not isinstance(data, dict) or not isinstance(data.get('secciones', []), list):
+        return [(1, 1, 'L000', "el capítulo no tiene la estructura esperada (ejecute check_json.py)")]
+
+    results = []
+    positions = None
+    for path in iter_malformed_exercises(data):
+        if positions is None:
+            positions = locate_paths(content)
+            lines = LineIndex(content)
+        file_line, file_col = lines.line_col(positions[path])
+        field = '.'.join(str(p) for p in path)
+        results.append((file_line, file_col, 'L000', f"{field} no es una lista (ejecute check_json.py)"))
+    for path, text in iter_markdown_fields(data):
+        findings = lint_markdown(text)
+        if not findings:
+            continue
+        if positions is None:
+            positions = locate_paths(content)
+            lines = LineIndex(content)
+        file_line, file_col = lines.line_col(positions[path])
+        field = '.'.join(str(p) for p in path)
+        for offset, code, message in findings:
+            line, col = line_col(text, offset)
+            results.append((file_line, file_col, code, f"{field} (línea {line}, col {col}): {message}"))
+    return results
+
+
+# --- CACHÉ INCREMENTAL ---
+def _load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    return cache.get('archivos', {}) if cache.get('version') == LINT_VERSION else {}
+
+
+def _save_cache(cache_path, entries):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': LINT_VERSION, 'archivos': entries}, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+
+def lint_files(file_paths, cache_path=LINT_CACHE_PATH):
+    """
+    Lintea varios archivos reutilizando los resultados de los que no cambiaron.
+    Un archivo se considera igual si coinciden tamaño y mtime o, si no, su hash.
+    Genera (ruta, resultados).
+    """
+    previous = _load_cache(cache_path) if cache_path else {}
+    # Se conservan las entradas de archivos que no se revisan en esta ejecución
+    entries = dict(previous)
+
+    for file_path in file_paths:
+        stat = os.stat(file_path)
+        entry = previous.get(file_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            findings = entry['resultados']
+            digest = entry['sha256']
+        else:
+            with open(file_path, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            if entry and entry['sha256'] == digest:
+                findings = entry['resultados']
+            else:
+                findings = lint_file(file_path)
+
+        entries[file_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                              'sha256': digest, 'resultados': findings}
+        yield file_path, [tuple(f) for f in findings]
+
+    if cache_path and entries != previous:
+        _save_cache(cache_path, entries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Detecta ecuaciones LaTeX que no se van a renderizar en los capítulos.")
+    parser.add_argument('files', nargs='*', help=f"Archivos a revisar (por defecto, todos los de '{BASE_PATH}').")
+    parser.add_argument('--no-cache', action='store_true', help=f"Ignora el caché incremental ('{LINT_CACHE_PATH}').")
+    args = parser.parse_args()
+
+    file_paths = args.files
+    if not file_paths:
+        if not os.path.isdir(BASE_PATH):
+            print(f"❌ ERROR: El directorio '{BASE_PATH}' no existe.")
+            sys.exit(1)
+        file_paths = [os.path.join(BASE_PATH, f) for f in sorted(os.listdir(BASE_PATH))
+                      if f.startswith('capitulo_') and f.endswith('.json')]
+
+    total = files_with_findings = 0
+    for file_path, findings in lint_files(file_paths, None if args.no_cache else LINT_CACHE_PATH):
+        for line, col, code, message in findings:
+            print(f"{file_path}:{line}:{col}: {code} {message}")
+        total += len(findings)
+        files_with_findings += bool(findings)
+
+    if total:
+        print(f"❌ {total} problemas de LaTeX en {files_with_findings} de {len(file_paths)} archivos.")
+        sys.exit(1)
+    print(f"✅ Sin problemas de LaTeX en {len(file_paths)} archivos.")
@@ -0,0 +1,183 @@
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# --- CONFIGURACIÓN ---
+# Todo es opcional y se activa por variables de entorno:
+#   GUIA_DEBUG=1                panel de métricas en la barra lateral (también con ?debug=1)
+#   GUIA_METRICS_FILE=ruta      archivo de texto Prometheus (p. ej. para el textfile collector)
+#   GUIA_METRICS_PORT=9464      endpoint local http://127.0.0.1:PUERTO/metrics
+DEBUG_PANEL = os.environ.get("GUIA_DEBUG", "") == "1"
+METRICS_FILE = os.environ.get("GUIA_METRICS_FILE") or None
+METRICS_PORT = int(os.environ["GUIA_METRICS_PORT"]) if os.environ.get("GUIA_METRICS_PORT") else None
+# Intervalo mínimo entre escrituras del archivo de métricas, en segundos
+METRICS_FILE_INTERVAL = 10.0
+# Límites de los histogramas de duración, en segundos
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# ---------------------
+
+# Instrumentación de la app: cada ejecución del script (rerun) mide sus fases con
+# `RerunTimer.lap` y al terminar vuelca duraciones, aciertos de caché y bytes enviados al
+# registro del proceso, que se exporta en formato de texto de Prometheus.
+
+HELP = {
+    'guia_rerun_segundos': ('histogram', "Duración de cada ejecución completa del script."),
+    'guia_fase_segundos': ('histogram', "Duración de cada fase de una ejecución (recarga, barra_lateral, carga, teoria, ejercicios)."),
+    'guia_cache_consultas_total': ('counter', "Consultas a los cachés por resultado (memoria, compartido, fallo)."),
+    'guia_payload_bytes_total': ('counter', "Bytes de markdown/HTML enviados al navegador, por capítulo."),
+    'guia_cache_memoria_bytes': ('gauge', "Bytes en uso del LRU en memoria del proceso."),
+}
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+class MetricsRegistry:
+    """Contadores, histogramas y gauges del proceso; seguro entre hilos (sesiones)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._gauges = {}
+
+    def inc(self, name, labels=(), amount=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        key = (name, tuple(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['sum'] += value
+            histogram['count'] += 1
+
+    def set_gauge(self, name, value, labels=()):
+        with self._lock:
+            self._gauges[(name, tuple(labels))] = value
+
+    def render(self):
+        """Texto en el formato de exposición de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            series = {}
+            for (name, labels), value in sorted(self._counters.items(), key=repr):
+                series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), value in sorted(self._gauges.items(), key=repr):
+                series.setdefault(name, []).append(f"{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in sorted(self._histograms.items(), key=repr):
+                lines = series.setdefault(name, [])
+                for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', bound),))} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram['sum']:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram['count']}")
+
+        output = []
+        for name in sorted(series):
+            kind, description = HELP.get(name, ('untyped', ''))
+            output.append(f"# HELP {name} {description}")
+            output.append(f"# TYPE {name} {kind}")
+            output.extend(series[name])
+        return '\n'.join(output) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+
+class RerunTimer:
+    """Mediciones de una ejecución del script; `finish` las vuelca al registro."""
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self.chapter = None
+        self.phases = []
+        self.cache = []
+        self.payload_bytes = 0
+        self._start = self._last_lap = time.perf_counter()
+
+    def lap(self, name):
+        """Cierra la fase `name`: el tiempo desde la fase anterior (o desde el inicio)."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last_lap))
+        self._last_lap = now
+
+    def cache_lookup(self, cache_name, origin):
+        """Registra una consulta: `origin` es 'memoria', 'compartido' o None (fallo)."""
+        self.cache.append((cache_name, origin or 'fallo'))
+
+    def payload(self, nbytes):
+        self.payload_bytes += nbytes
+
+    def finish(self):
+        """Cierra la ejecución, actualiza el registro y devuelve el resumen para el panel."""
+        total = time.perf_counter() - self._start
+        chapter = self.chapter or 'ninguno'
+        self.registry.observe('guia_rerun_segundos', total, (('capitulo', chapter),))
+        for name, seconds in self.phases:
+            self.registry.observe('guia_fase_segundos', seconds, (('fase', name), ('capitulo', chapter)))
+        for cache_name, result in self.cache:
+            self.registry.inc('guia_cache_consultas_total', (('cache', cache_name), ('resultado', result)))
+        if self.payload_bytes:
+            self.registry.inc('guia_payload_bytes_total', (('capitulo', chapter),), self.payload_bytes)
+        return {'total': total, 'fases': list(self.phases), 'cache': list(self.cache), 'bytes': self.payload_bytes}
+
+
+# --- EXPORTACIÓN ---
+_last_file_write = 0.0
+_file_lock = threading.Lock()
+
+
+def write_textfile(path=METRICS_FILE, registry=REGISTRY, force=False):
+    """Escribe el registro en `path` (atómico), como mucho cada METRICS_FILE_INTERVAL segundos."""
+    global _last_file_write
+    if not path:
+        return False
+    now = time.monotonic()
+    with _file_lock:
+        if not force and now - _last_file_write < METRICS_FILE_INTERVAL:
+            return False
+        _last_file_write = now
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(registry.render())
+        os.replace(tmp_path, path)
+    return True
+
+
+def start_http_endpoint(port=METRICS_PORT, registry=REGISTRY):
+    """Sirve /metrics en 127.0.0.1:`port` desde un hilo en segundo plano. Devuelve el servidor."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Sin una línea de log por cada scrape
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='guia-metrics', daemon=True).start()
+    return server
@@ -1,93 +1,128 @@
+import argparse
+import hashlib
 import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+
+from chapter_writer import MystWriter
 
 # --- CONFIGURACIÓN ---
 INPUT_DIR = "json_capitulos"
-OUTPUT_DIR = "docs"
+# Borradores para revisar, fuera de docs/ (lo que publica Sphinx, con el índice curado a mano).
+# Es el mismo directorio que MYST_DIR en pipeline.py.
+OUTPUT_DIR = os.path.join("cache", "myst")
+# Manifiesto del modo incremental: hash de cada JSON de entrada y versión del generador.
+MANIFEST_PATH = os.path.join("cache", "migrate_manifest.json")
+# Incrementar al cambiar el formato generado para forzar la regeneración de todos los capítulos.
+GENERATOR_VERSION = "1"
 # ---------------------
 
-def clean_markdown_content(markdown_text):
+def process_chapter(file_path, sink):
     """
-    Realiza limpieza final: corrige saltos de línea y asegura el formato de ecuaciones.
+    Convierte un archivo JSON de capítulo a MyST escribiendo en `sink` a medida que
+    recorre secciones y ejercicios. Devuelve False si el JSON no se pudo leer.
     """
-    if not markdown_text:
-        return ""
-
-    # 1. Asegurar saltos de línea de Markdown (doble salto para párrafo)
-    # Streamlit usa \n, pero Sphinx/MyST prefiere párrafos separados por líneas en blanco.
-    # Reemplazamos todos los \n (salto de línea JSON) que no estén precedidos por otro \n con doble salto.
-    # Sin embargo, evitamos romper el formato interno de tablas y listas.
-
-    # Reemplazar \\n (JSON escaped newline) por \n
-    content = markdown_text.replace('\\n', '\n')
-
-    # 2. Limpieza de comandos Latex incompletos que pudieran quedar
-    content = content.replace('textm', r'\text{m}')
-    content = content.replace('textcm', r'\text{cm}')
-
-    # 3. Eliminar caracteres que Python o JSON pueden haber insertado
-    content = content.replace('$$$$', '$$')
-    content = content.replace('\\cdot', ' \cdot ')
-
-    # 4. Asegurar que las ecuaciones de una línea ($$ecuación$$) no tengan líneas en blanco extra dentro
-    # Esto es complejo, pero simplificamos eliminando saltos de línea alrededor de $$ si no son parte de un bloque
-
-    return content.strip()
-
-def process_chapter(file_path):
-    """Procesa un archivo JSON de capítulo y lo convierte a formato MyST."""
     try:
         with open(file_path, 'r', encoding='utf-8') as f:
             data = json.load(f)
     except json.JSONDecodeError as e:
         print(f"❌ Error de sintaxis JSON en {file_path}: {e}")
-        return None
-
-    capitulo_id = data.get('capitulo_id', 'XX')
-    titulo = data.get('titulo', 'Título sin nombre')
+        return False
 
-    # Cabecera MyST del archivo
-    myst_content = f"({'capitulo_'}{capitulo_id})=\n"  # Etiqueta MyST para referencias
-    myst_content += f"# {titulo}\n\n"
-    myst_content += f"*Parte: {data.get('parte', 'General')}*\n"
-    myst_content += f"*Fecha: {data.get('fecha_generacion', 'Desconocida')}*\n\n"
+    MystWriter(sink).write_chapter(data)
+    return True
 
-    for section in data.get('secciones', []):
-        section_type = section.get('tipo', 'teoria')
-        section_title = section.get('titulo', 'Sección sin título')
+def file_sha256(file_path):
+    """Hash del contenido de un JSON de entrada."""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
 
-        # Título de la sección (Subtítulo h2 o h3)
-        myst_content += f"## {section_title}\n\n"
-
-        if section_type == 'teoria':
-            markdown = section.get('contenido_markdown', '')
-            myst_content += clean_markdown_content(markdown) + "\n\n"
-
-        elif section_type == 'ejercicios':
-            for i, ejercicio in enumerate(section.get('ejercicios', [])):
-                enunciado = ejercicio.get('enunciado_markdown', f"Problema {i+1} sin enunciado.")
-                solucion = ejercicio.get('solucion_markdown', 'Solución no disponible.')
-
-                # Título del ejercicio
-                myst_content += f"### Problema {i + 1}: {enunciado.splitlines()[0]}\n\n"
-
-                # Enunciado (el resto del texto)
-                myst_content += clean_markdown_content(enunciado) + "\n\n"
-
-                # Solución oculta usando una directiva MyST (Sphinx) para expandir
-                # Esto es ideal para una guía interactiva/wiki
-                myst_content += ".. dropdown:: Mostrar Solución\n\n"
-                # Añadir sangría de 3 espacios a la solución para que funcione dentro de dropdown
-                solution_lines = clean_markdown_content(solucion).split('\n')
-                indented_solution = '\n'.join('   ' + line for line in solution_lines)
-
-                myst_content += indented_solution + "\n\n"
-
-    return myst_content
+def write_if_changed(output_path, content):
+    """
+    Escribe `content` solo si difiere de lo que ya hay en disco.
+    Así no se altera el mtime de archivos idénticos y Sphinx no los vuelve a leer.
+    """
+    try:
+        with open(output_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return False
+    except FileNotFoundError:
+        pass
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(content)
+    return True
+
+def _same_content(path_a, path_b, chunk_size=1 << 16):
+    """Compara dos archivos por bloques, sin cargarlos enteros en memoria."""
+    with open(path_a, 'rb') as a, open(path_b, 'rb') as b:
+        if os.fstat(a.fileno()).st_size != os.fstat(b.fileno()).st_size:
+            return False
+        while True:
+            chunk = a.read(chunk_size)
+            if chunk != b.read(chunk_size):
+                return False
+            if not chunk:
+                return True
+
+def replace_if_changed(tmp_path, output_path):
+    """
+    Mueve `tmp_path` a `output_path` solo si el contenido difiere (si no, lo borra).
+    Igual que write_if_changed, pero para una salida que ya se escribió en un temporal.
+    """
+    try:
+        if _same_content(tmp_path, output_path):
+            os.remove(tmp_path)
+            return False
+    except FileNotFoundError:
+        pass
+    os.replace(tmp_path, output_path)
+    return True
+
+def migrate_chapter(filename, output_dir=OUTPUT_DIR):
+    """Migra un capítulo (se ejecuta en un proceso del pool). Devuelve (filename, estado)."""
+    file_path = os.path.join(INPUT_DIR, filename)
+
+    # Nombrar el archivo de salida con el mismo nombre base (.myst)
+    output_path = os.path.join(output_dir, filename.replace('.json', '.myst'))
+
+    # El MyST se escribe por streaming a un temporal junto a la salida y se compara al final
+    tmp_path = f"{output_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as sink:
+            ok = process_chapter(file_path, sink)
+        if not ok:
+            return filename, 'error'
+        return filename, 'escrito' if replace_if_changed(tmp_path, output_path) else 'sin cambios'
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def load_manifest():
+    """Lee el manifiesto; si no existe o es de otra versión del generador, lo trata como vacío."""
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if manifest.get('generator_version') != GENERATOR_VERSION:
+        return {}
+    return manifest.get('capitulos', {})
+
+def save_manifest(chapter_hashes):
+    os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+    with open(MANIFEST_PATH, 'w', encoding='utf-8') as f:
+        json.dump({'generator_version': GENERATOR_VERSION, 'capitulos': chapter_hashes}, f, indent=2)
+
+def migrate(incremental=False, jobs=None):
+    """
+    Función principal para orquestar la migración.
 
-def migrate():
-    """Función principal para orquestar la migración."""
+    En modo incremental solo se regeneran los capítulos cuyo JSON cambió desde la
+    última ejecución (o cuya salida falta). Los capítulos a regenerar se procesan en
+    paralelo y en todos los modos solo se reescriben los archivos cuyo contenido difiere.
+    """
     if not os.path.exists(INPUT_DIR):
         print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe. Asegúrese de que los JSONs están ahí.")
         return
@@ -100,35 +135,50 @@ def migrate():
 
     print(f"🔎 Encontrados {len(json_files)} capítulos JSON para migrar.")
 
-    toc_entries = []
-
-    for filename in json_files:
-        file_path = os.path.join(INPUT_DIR, filename)
-
-        # Procesar el capítulo y obtener el contenido MyST
-        myst_content = process_chapter(file_path)
-
-        if myst_content:
-            # Nombrar el archivo de salida con el mismo nombre base (.myst)
-            output_filename = filename.replace('.json', '.myst')
-            output_path = os.path.join(OUTPUT_DIR, output_filename)
-
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(myst_content)
-
+    current_hashes = {f: file_sha256(os.path.join(INPUT_DIR, f)) for f in json_files}
+    previous_hashes = load_manifest() if incremental else {}
+
+    pending = [
+        f for f in json_files
+        if previous_hashes.get(f) != current_hashes[f]
+        or not os.path.exists(os.path.join(OUTPUT_DIR, f.replace('.json', '.myst')))
+    ]
+    if incremental:
+        print(f"♻️ Modo incremental: {len(json_files) - len(pending)} capítulos sin cambios, {len(pending)} por migrar.")
+
+    # Se conservan en el manifiesto solo los capítulos que quedaron migrados correctamente
+    migrated_hashes = {f: h for f, h in previous_hashes.items() if f in current_hashes and f not in pending}
+
+    if len(pending) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(migrate_chapter, pending))
+    else:
+        results = [migrate_chapter(f) for f in pending]
+
+    for filename, estado in results:
+        output_filename = filename.replace('.json', '.myst')
+        if estado == 'error':
+            continue
+        migrated_hashes[filename] = current_hashes[filename]
+        if estado == 'escrito':
             print(f"✅ Migrado {filename} a {output_filename}")
+        else:
+            print(f"☑️ {output_filename} sin cambios")
 
-            # Preparar la tabla de contenido (toctree)
-            toc_entries.append(output_filename.replace('.myst', ''))
+    # Preparar la tabla de contenido (toctree) con todos los capítulos migrados
+    toc_entries = [f.replace('.json', '') for f in json_files if f in migrated_hashes]
 
     # Crear el archivo principal (index.myst) con el índice de la guía
     create_index_file(toc_entries)
 
+    if incremental:
+        save_manifest(migrated_hashes)
+
     print("\n--- ¡MIGRACIÓN COMPLETADA! ---")
     print(f"Los archivos .myst están en el directorio '{OUTPUT_DIR}'.")
-    print("El siguiente paso es configurar Sphinx y construir la documentación.")
+    print("Revise los borradores y copie a docs/capitulos_guia/ los que estén listos para publicar.")
 
-def create_index_file(toc_entries):
+def create_index_file(toc_entries, output_dir=OUTPUT_DIR):
     """Crea el archivo principal index.myst con la tabla de contenido."""
     index_content = "# Guía Completa de Física y Matemáticas\n\n"
     index_content += "Esta es una guía completa de conceptos y ejercicios resueltos de Física.\n\n"
@@ -140,12 +190,18 @@ def create_index_file(toc_entries):
     for entry in toc_entries:
         index_content += f"   {entry}\n"
 
-    index_path = os.path.join(OUTPUT_DIR, "index.myst")
-    with open(index_path, 'w', encoding='utf-8') as f:
-        f.write(index_content)
-
-    print(f"✅ Creado el índice (index.myst) para la tabla de contenido.")
+    index_path = os.path.join(output_dir, "index.myst")
+    if write_if_changed(index_path, index_content):
+        print(f"✅ Creado el índice (index.myst) para la tabla de contenido.")
+    else:
+        print(f"☑️ El índice (index.myst) no cambió.")
 
 
 if __name__ == "__main__":
-    migrate()
+    parser = argparse.ArgumentParser(description=f"Migra los capítulos JSON a borradores MyST en '{OUTPUT_DIR}'.")
+    parser.add_argument('--incremental', action='store_true',
+                        help=f"Solo regenera los capítulos cuyo JSON cambió (manifiesto en '{MANIFEST_PATH}').")
+    parser.add_argument('--jobs', type=int, default=None,
+                        help="Procesos para migrar capítulos en paralelo (por defecto, uno por CPU).")
+    args = parser.parse_args()
+    migrate(incremental=args.incremental, jobs=args.jobs)
@@ -0,0 +1,92 @@
+import hashlib
+import os
+
+# --- CONFIGURACIÓN ---
+OCR_CACHE_DIR = os.path.join("cache", "ocr")
+OCR_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+# ---------------------
+
+# Caché en disco del texto crudo del OCR, antes de `clean_text`.
+#
+# La clave combina el hash de la imagen rasterizada con el idioma y el motor/versión
+# del OCR, así que ajustar las reglas de limpieza no invalida nada: solo se vuelven
+# a ejecutar las etapas baratas. Cada entrada es un archivo de texto; el mtime hace
+# de marca de último uso para el desalojo LRU cuando se supera el tamaño máximo.
+
+
+def image_digest(image):
+    """Hash del contenido de una imagen PIL (modo, tamaño y píxeles)."""
+    digest = hashlib.sha256()
+    digest.update(f"{image.mode}:{image.size[0]}x{image.size[1]}\0".encode('ascii'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+def cache_key(digest, lang, engine_name, engine_version):
+    return hashlib.sha256(f"{digest}\0{lang}\0{engine_name}\0{engine_version}".encode('utf-8')).hexdigest()
+
+
+class OCRCache:
+    """Caché de resultados de OCR direccionado por contenido."""
+
+    def __init__(self, cache_dir=OCR_CACHE_DIR, max_bytes=OCR_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.txt")
+
+    def get(self, key):
+        """Devuelve el texto guardado para `key` o None; un acierto renueva su marca de uso."""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return text
+
+    def put(self, key, text):
+        """Guarda el texto de forma atómica (varios procesos pueden escribir a la vez)."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+
+    def evict(self):
+        """
+        Borra las entradas usadas hace más tiempo hasta quedar bajo `max_bytes`.
+        Devuelve (entradas_borradas, bytes_en_uso).
+        """
+        entries = []
+        total = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith('.txt'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, path))
+                total += stat.st_size
+
+        removed = 0
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed, total
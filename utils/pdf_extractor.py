@@ -1,13 +1,24 @@
-import pytesseract
-from PIL import Image
-import pdfplumber
+import argparse
+import itertools
 import os
-import io
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pdfplumber
+
+from ocr_cache import OCR_CACHE_DIR, OCR_CACHE_MAX_BYTES, OCRCache, cache_key, image_digest
 
 # Rutas
 PDF_SOURCE_DIR = "pdfs_fuente"
 OUTPUT_DIR = "docs_limpios"
-PDF_TO_PROCESS = "clase_01_vectores.pdf" # Solo para probar
+
+# OCR
+OCR_LANG = 'spa'
+RASTER_RESOLUTION = 300  # DPI al rasterizar cada página para el OCR
+
+# Capa de texto: una página se extrae sin OCR si su texto embebido parece legible
+MIN_TEXT_LAYER_CHARS = 40       # menos que esto suele ser solo un número de página o un encabezado
+MIN_TEXT_LAYER_ALNUM_RATIO = 0.6  # proporción de letras/dígitos entre los caracteres no blancos
 
 # 1. Función de limpieza de errores de LaTeX más comunes
 def clean_text(text):
@@ -17,55 +28,233 @@ def clean_text(text):
     text = text.replace('textm', '\text{m}')
     return text
 
-def extract_and_structure_pdf_ocr():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
+# 2. Motores de OCR intercambiables
+class TesseractOCR:
+    """OCR real con Tesseract (requiere el binario `tesseract` y el idioma instalado)."""
+    name = 'tesseract'
 
-    pdf_path = os.path.join(PDF_SOURCE_DIR, PDF_TO_PROCESS)
+    def __init__(self):
+        import pytesseract
+        self._pytesseract = pytesseract
 
-    if not os.path.exists(pdf_path):
-        print(f"❌ ERROR: No se encontró el archivo PDF: {pdf_path}")
-        return
+    def version(self):
+        return str(self._pytesseract.get_tesseract_version())
 
-    chapter_name = PDF_TO_PROCESS.replace(".pdf", "")
-    output_file_path = os.path.join(OUTPUT_DIR, f"{chapter_name}_ocr.myst")
+    def image_to_string(self, image, lang):
+        return self._pytesseract.image_to_string(image, lang=lang)
 
-    full_text_ocr = ""
 
-    try:
-        with pdfplumber.open(pdf_path) as pdf:
-            print(f"   -> Procesando {len(pdf.pages)} páginas con OCR...")
+class FakeOCR:
+    """
+    Sustituto local y determinista de Tesseract para pruebas: no necesita binarios
+    externos y devuelve un texto que depende solo del tamaño de la imagen.
+    """
+    name = 'fake'
+
+    def version(self):
+        return 'fake-1'
+
+    def image_to_string(self, image, lang):
+        width, height = image.size
+        return f"Texto simulado de una página de {width}x{height} px ({lang}).\n"
+
+
+OCR_BACKENDS = {
+    'tesseract': TesseractOCR,
+    'fake': FakeOCR,
+}
+
+# 3. Detección de la capa de texto
+def text_layer_is_usable(text):
+    """
+    Decide si el texto embebido de una página sirve tal cual.
+    Los escaneos no tienen texto (o solo unos pocos caracteres) y los PDFs con fuentes
+    sin mapa Unicode devuelven glifos '(cid:NN)'; en ambos casos hace falta OCR.
+    """
+    if not text:
+        return False
+    visible = [c for c in text if not c.isspace()]
+    if len(visible) < MIN_TEXT_LAYER_CHARS or '(cid:' in text:
+        return False
+    alnum = sum(1 for c in visible if c.isalnum())
+    return alnum / len(visible) >= MIN_TEXT_LAYER_ALNUM_RATIO
+
+# 4. Trabajo por página (se ejecuta en los procesos del pool)
+# Cada proceso crea su motor de OCR una sola vez (y solo si alguna página lo necesita)
+# y mantiene abierto el último PDF que usó.
+_worker = {}
+
+def _init_worker(backend_name, lang, resolution, force_ocr=False, cache_dir=OCR_CACHE_DIR):
+    _worker['backend_name'] = backend_name
+    _worker['backend'] = None
+    _worker['backend_version'] = None
+    _worker['cache'] = OCRCache(cache_dir) if cache_dir else None
+    _worker['force_ocr'] = force_ocr
+    _worker['lang'] = lang
+    _worker['resolution'] = resolution
+    _worker['pdf_path'] = None
+    _worker['pdf'] = None
+
+def _get_backend():
+    if _worker['backend'] is None:
+        _worker['backend'] = OCR_BACKENDS[_worker['backend_name']]()
+        # Se consulta una sola vez: para Tesseract implica lanzar el binario
+        _worker['backend_version'] = _worker['backend'].version()
+    return _worker['backend']
 
+def _ocr_image(image):
+    """Aplica OCR pasando por el caché. Devuelve (método, texto crudo)."""
+    backend = _get_backend()
+    cache = _worker['cache']
+    if cache is None:
+        return 'ocr', backend.image_to_string(image, _worker['lang'])
+
+    key = cache_key(image_digest(image), _worker['lang'], backend.name, _worker['backend_version'])
+    text = cache.get(key)
+    if text is not None:
+        return 'caché', text
+
+    text = backend.image_to_string(image, _worker['lang'])
+    cache.put(key, text)
+    return 'ocr', text
+
+def _open_pdf(pdf_path):
+    if _worker['pdf_path'] != pdf_path:
+        if _worker['pdf'] is not None:
+            _worker['pdf'].close()
+        _worker['pdf'] = pdfplumber.open(pdf_path)
+        _worker['pdf_path'] = pdf_path
+    return _worker['pdf']
+
+def extract_page(task):
+    """
+    Extrae una página: usa la capa de texto si es legible y, si no, la rasteriza
+    (recién aquí, no antes) y le aplica OCR. Devuelve (página, método, texto).
+    """
+    pdf_path, page_number = task
+    page = _open_pdf(pdf_path).pages[page_number]
+
+    text = None if _worker['force_ocr'] else page.extract_text()
+    if text is not None and text_layer_is_usable(text):
+        method = 'texto'
+    else:
+        image = page.to_image(resolution=_worker['resolution']).original
+        method, text = _ocr_image(image)
+
+    # Liberar la página rasterizada y el caché interno de pdfplumber antes de la siguiente
+    page.close()
+    return page_number, method, text
+
+# 5. Pipeline por documento
+def iter_page_texts(pdf_path, executor, window):
+    """
+    Genera (número_de_página, método, texto) en orden de página.
+
+    Como mucho `window` páginas están en proceso a la vez, así que la memoria no crece
+    con el tamaño del documento aunque los trabajadores terminen fuera de orden.
+    """
+    with pdfplumber.open(pdf_path) as pdf:
+        total_pages = len(pdf.pages)
+
+    pages = iter(range(total_pages))
+    pending = deque(executor.submit(extract_page, (pdf_path, n)) for n in itertools.islice(pages, window))
+
+    while pending:
+        page_number, method, text = pending.popleft().result()
+        next_page = next(pages, None)
+        if next_page is not None:
+            pending.append(executor.submit(extract_page, (pdf_path, next_page)))
+        yield page_number, method, text
+
+def extract_pdf(pdf_path, executor, window, output_dir=OUTPUT_DIR):
+    """Extrae un PDF y escribe el texto limpio en su `.myst` a medida que llegan las páginas."""
+    chapter_name = os.path.splitext(os.path.basename(pdf_path))[0]
+    output_file_path = os.path.join(output_dir, f"{chapter_name}_ocr.myst")
+    tmp_path = f"{output_file_path}.tmp"
+
+    total_chars = 0
+    methods = {'texto': 0, 'ocr': 0, 'caché': 0}
+    try:
+        with open(tmp_path, "w", encoding="utf-8") as f:
             # Agregar el título
-            full_text_ocr += f"# {chapter_name.replace('_', ' ').title()}\n\n"
+            f.write(f"# {chapter_name.replace('_', ' ').title()}\n\n")
+
+            for page_number, method, page_text in iter_page_texts(pdf_path, executor, window):
+                cleaned = clean_text(page_text).strip()
+                if cleaned:
+                    f.write(cleaned + "\n\n")
+                    total_chars += len(cleaned)
+                methods[method] += 1
+                print(f"   -> {chapter_name}: página {page_number + 1} lista ({method})")
+    except BaseException:
+        # No dejar salidas a medio escribir si falla alguna página
+        os.remove(tmp_path)
+        raise
 
-            for page in pdf.pages:
-                # Extraer la imagen de la página (esto requiere una librería PDF adicional si el PDFplumber falla)
-                # Si esto falla, necesitamos otra librería como PyMuPDF, pero intentemos con Tesseract primero
+    print(f"   📊 {chapter_name}: {methods['texto']} páginas por capa de texto, {methods['ocr']} por OCR, {methods['caché']} desde el caché de OCR")
 
-                # Para Tesseract, el método más robusto es convertir el PDF a una imagen temporal
-                # PERO: Simplificamos usando la conversión directa de Tesseract (pdf_to_text) si es un PDF limpio.
-                # Si el PDF es un escaneo, esto es lo que funciona mejor:
+    if not total_chars:
+        os.remove(tmp_path)
+        print(f"❌ ERROR: No se pudo extraer texto de {pdf_path}. El PDF está muy dañado o vacío.")
+        return None
 
-                # Tesseract PDF a texto (usa OCR)
-                page_text = pytesseract.image_to_string(pdf_path, lang='spa')
+    os.replace(tmp_path, output_file_path)
+    print(f"   ✅ Texto guardado en: {output_file_path}")
+    return output_file_path
 
-                # Si el texto se obtiene (significa que Tesseract procesó todo el archivo):
-                if page_text:
-                    full_text_ocr += clean_text(page_text)
-                    break # Salimos del loop de páginas si Tesseract procesa el PDF completo de golpe
+def extract_directory(pdf_paths, backend_name='tesseract', jobs=None, lang=OCR_LANG,
+                      resolution=RASTER_RESOLUTION, output_dir=OUTPUT_DIR, force_ocr=False,
+                      cache_dir=OCR_CACHE_DIR, cache_max_bytes=OCR_CACHE_MAX_BYTES):
+    """
+    Procesa todos los PDFs compartiendo un único pool de procesos de extracción.
+    Con `cache_dir=None` el OCR no usa caché.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = jobs or os.cpu_count() or 1
+    # Dos páginas por trabajador mantienen el pool ocupado sin acumular imágenes en memoria
+    window = jobs * 2
 
-            if not full_text_ocr:
-                print("❌ ERROR: Tesseract no pudo extraer el texto. El PDF está muy dañado o es solo imagen.")
-                return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(backend_name, lang, resolution, force_ocr, cache_dir)) as executor:
+        for pdf_path in pdf_paths:
+            print(f"📄 Procesando {pdf_path} (OCR: {backend_name}, {jobs} procesos)...")
+            try:
+                extract_pdf(pdf_path, executor, window, output_dir)
+            except Exception as e:
+                print(f"❌ Ocurrió un error procesando {pdf_path}: {e}")
 
-            with open(output_file_path, "w", encoding="utf-8") as f:
-                f.write(full_text_ocr)
+    # El desalojo se hace una vez al final, desde un solo proceso, para no competir con los trabajadores
+    if cache_dir:
+        removed, used = OCRCache(cache_dir, cache_max_bytes).evict()
+        print(f"🗄️ Caché de OCR: {used / (1024 * 1024):.1f} MB en uso, {removed} entradas desalojadas.")
 
-            print(f"   ✅ Texto (OCR) guardado en: {output_file_path}")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Extrae el texto de los PDFs fuente (capa de texto u OCR) en paralelo.")
+    parser.add_argument('pdfs', nargs='*',
+                        help=f"PDFs a procesar (por defecto, todos los de '{PDF_SOURCE_DIR}').")
+    parser.add_argument('--backend', choices=sorted(OCR_BACKENDS), default='tesseract',
+                        help="Motor de OCR; 'fake' no requiere Tesseract y sirve para pruebas.")
+    parser.add_argument('--jobs', type=int, default=None, help="Procesos de OCR (por defecto, uno por CPU).")
+    parser.add_argument('--lang', default=OCR_LANG, help="Idioma de Tesseract.")
+    parser.add_argument('--force-ocr', action='store_true',
+                        help="Ignora la capa de texto y aplica OCR a todas las páginas.")
+    parser.add_argument('--no-cache', action='store_true',
+                        help=f"No usa el caché de resultados de OCR ('{OCR_CACHE_DIR}').")
+    parser.add_argument('--cache-max-mb', type=int, default=OCR_CACHE_MAX_BYTES // (1024 * 1024),
+                        help="Tamaño máximo del caché de OCR en MB.")
+    args = parser.parse_args()
 
-    except Exception as e:
-        print(f"❌ Ocurrió un error (Tesseract): {e}")
+    pdf_paths = args.pdfs
+    if not pdf_paths:
+        if not os.path.isdir(PDF_SOURCE_DIR):
+            print(f"❌ ERROR: No se encontró el directorio de PDFs: {PDF_SOURCE_DIR}")
+            raise SystemExit(1)
+        pdf_paths = [os.path.join(PDF_SOURCE_DIR, f) for f in sorted(os.listdir(PDF_SOURCE_DIR)) if f.lower().endswith('.pdf')]
 
-# Ejecutar el proceso
-extract_and_structure_pdf_ocr()
+    if not pdf_paths:
+        print(f"⚠️ Advertencia: No se encontraron PDFs en '{PDF_SOURCE_DIR}'.")
+    else:
+        extract_directory(pdf_paths, backend_name=args.backend, jobs=args.jobs, lang=args.lang,
+                          force_ocr=args.force_ocr,
+                          cache_dir=None if args.no_cache else OCR_CACHE_DIR,
+                          cache_max_bytes=args.cache_max_mb * 1024 * 1024)
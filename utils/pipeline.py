@@ -0,0 +1,572 @@
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import stat
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+
+from chapter_bundle import list_chapter_files
+
+# --- CONFIGURACIÓN ---
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(UTILS_DIR)
+# Estado entre ejecuciones: huellas de las entradas y salidas de cada unidad ya construida
+STATE_PATH = os.path.join("cache", "pipeline.json")
+STATE_VERSION = 1
+CHAPTERS_DIR = "json_capitulos"
+DOCS_DIR = "docs"
+# Borradores de migrate_to_myst: fuera de docs/, que Sphinx publica. Los capítulos publicados
+# son los de docs/capitulos_guia/, mantenidos a mano (ver fix_all_chapters.py).
+# Es el mismo directorio que OUTPUT_DIR en migrate_to_myst.py.
+MYST_DIR = os.path.join("cache", "myst")
+# Las mismas rutas que pdf_extractor.py (que no se importa acá: necesita pdfplumber)
+PDF_SOURCE_DIR = "pdfs_fuente"
+OCR_OUTPUT_DIR = "docs_limpios"
+SPHINX_BUILD_DIR = "_build"
+SPHINX_DOCTREES_DIR = "_doctrees"
+OCR_BACKEND = 'tesseract'
+# ---------------------
+
+# Pipeline de contenido con dependencias: PDF -> JSON -> MyST, docs/ -> Sphinx, más los
+# derivados de la app (paquete de capítulos, índice de búsqueda, HTML pre-renderizado).
+# El MyST que genera migrate_to_myst queda en MYST_DIR como borrador para revisar: Sphinx
+# publica solo docs/, donde están los capítulos curados y su índice.
+#
+# Cada etapa declara sus unidades de trabajo (un capítulo, un PDF, un archivo MyST, o una
+# sola unidad que agrega todo), los archivos que lee y escribe cada unidad, y las etapas que
+# deben terminar antes. El código de la etapa cuenta como entrada: cambiar el script
+# reconstruye todo lo suyo. Una unidad se vuelve a ejecutar solo si cambió el contenido
+# (sha256) de alguna entrada o falta o cambió alguna salida respecto de la última
+# ejecución; el hash no se recalcula si el tamaño y el mtime siguen iguales. Como las
+# salidas se reescriben solo cuando su contenido cambia, una edición que no altera el
+# resultado de una etapa corta la propagación ahí.
+#
+# Entre etapas de la misma clase de unidad la dependencia es capítulo a capítulo: el
+# capítulo 5 puede estar migrándose mientras el 6 todavía se valida. Las unidades listas
+# corren en un pool de procesos; las etapas que ya paralelizan por su cuenta (OCR, Sphinx)
+# corren de a una en el proceso principal.
+#
+# Un capítulo que falla bloquea lo que depende de él, pero las etapas que agregan todos los
+# capítulos corren igual (ya saben tratar capítulos con errores).
+#
+# Las etapas que corrigen MyST en el lugar (fix_all_chapters, fix_latex_myst) tienen reglas
+# que no son idempotentes: la primera vez que corren registran los archivos existentes como
+# ya corregidos en lugar de reescribirlos, y desde ahí solo procesan los archivos nuevos o
+# modificados.
+
+AGGREGATE = '*'
+
+
+class Stage:
+    """
+    Una etapa del pipeline.
+
+    `units` devuelve la lista de unidades (solo para etapas con `domain`); sin `domain` la
+    etapa es una única unidad AGGREGATE. `inputs(unit)` y `outputs(unit)` devuelven rutas;
+    `run(unit)` hace el trabajo y lanza una excepción si falla (ImportError: dependencia
+    opcional ausente, la unidad se omite).
+    """
+
+    def __init__(self, name, run, inputs, outputs=None, domain=None, units=None, after=(), code=(),
+                 in_process=False, adopt_existing=False):
+        self.name = name
+        self.run = run
+        self.inputs = inputs
+        self.outputs = outputs or (lambda unit: [])
+        self.domain = domain
+        self.units = units or (lambda: [AGGREGATE])
+        self.after = tuple(after)
+        self.code = [os.path.relpath(os.path.join(REPO_DIR, path)) for path in code]
+        self.in_process = in_process
+        self.adopt_existing = adopt_existing
+
+
+# --- 1. UNIDADES Y RUTAS ---
+def list_chapters():
+    return [f[:-len('.json')] for f in list_chapter_files(CHAPTERS_DIR)] if os.path.isdir(CHAPTERS_DIR) else []
+
+
+def chapter_json(unit):
+    return os.path.join(CHAPTERS_DIR, f"{unit}.json")
+
+
+def all_chapter_jsons(unit=None):
+    return [chapter_json(chapter) for chapter in list_chapters()]
+
+
+def chapter_myst(unit):
+    return os.path.join(MYST_DIR, f"{unit}.myst")
+
+
+def list_pdfs():
+    if not os.path.isdir(PDF_SOURCE_DIR):
+        return []
+    return sorted(f[:-len('.pdf')] for f in os.listdir(PDF_SOURCE_DIR) if f.endswith('.pdf'))
+
+
+def list_guide_myst():
+    _import_repo_root()
+    from fix_all_chapters import DIRECTORIOS_A_PROCESAR
+    return [os.path.join(directory, f) for directory in DIRECTORIOS_A_PROCESAR if os.path.isdir(directory)
+            for f in sorted(os.listdir(directory)) if f.endswith('.myst')]
+
+
+def list_fix_latex_myst():
+    from fix_latex_myst import ARCHIVO_A_CORREGIR
+    return [ARCHIVO_A_CORREGIR] if os.path.exists(ARCHIVO_A_CORREGIR) else []
+
+
+def docs_sources(unit=None):
+    paths = []
+    for directory, subdirs, files in os.walk(DOCS_DIR):
+        subdirs[:] = sorted(d for d in subdirs if d != '__pycache__')
+        paths.extend(os.path.join(directory, f) for f in sorted(files) if not f.endswith('.tmp'))
+    return paths
+
+
+def _import_repo_root():
+    # fix_all_chapters.py vive en la raíz del repositorio, no en utils/
+    if REPO_DIR not in sys.path:
+        sys.path.insert(0, REPO_DIR)
+
+
+# --- 2. TRABAJO DE CADA ETAPA ---
+def run_pdf_extractor(unit):
+    from pdf_extractor import extract_directory
+    output_path = os.path.join(OCR_OUTPUT_DIR, f"{unit}_ocr.myst")
+    before = os.stat(output_path).st_mtime_ns if os.path.exists(output_path) else None
+    extract_directory([os.path.join(PDF_SOURCE_DIR, f"{unit}.pdf")], backend_name=OCR_BACKEND)
+    # extract_directory informa los errores por consola: la salida tiene que ser nueva
+    if not os.path.exists(output_path) or os.stat(output_path).st_mtime_ns == before:
+        raise RuntimeError(f"no se pudo extraer el texto de {unit}.pdf")
+
+
+def run_fix_latex(unit):
+    from fix_latex import process_file_for_latex_fix
+    message = process_file_for_latex_fix(chapter_json(unit))
+    if message.startswith('❌'):
+        raise RuntimeError(message)
+
+
+def run_check_json(unit):
+    from check_json import check_file
+    errors = check_file(chapter_json(unit))
+    if errors:
+        raise RuntimeError('\n'.join(f"{chapter_json(unit)}:{line}:{col}: {message}" for line, col, message in errors))
+
+
+def run_verify_solutions(unit):
+    from verify_solutions import verify_files
+    findings, _ = verify_files([chapter_json(chapter) for chapter in list_chapters()])
+    if findings:
+        raise RuntimeError('\n'.join(f"{finding.location}: {finding.text}: {finding.message}" for finding in findings))
+
+
+def run_migrate_to_myst(unit):
+    from migrate_to_myst import migrate_chapter
+    os.makedirs(MYST_DIR, exist_ok=True)
+    _, estado = migrate_chapter(f"{unit}.json", MYST_DIR)
+    if estado == 'error':
+        raise RuntimeError(f"no se pudo migrar {unit}.json")
+
+
+def run_myst_index(unit):
+    from migrate_to_myst import create_index_file
+    create_index_file([chapter for chapter in list_chapters() if os.path.exists(chapter_myst(chapter))], MYST_DIR)
+
+
+def run_fix_all_chapters(unit):
+    _import_repo_root()
+    from fix_all_chapters import SINTAXIS_ROTA
+    from rewrite_engine import RewriteEngine
+    RewriteEngine(SINTAXIS_ROTA).rewrite_file(unit)
+
+
+def run_fix_latex_myst(unit):
+    from fix_latex_myst import corregir_archivo
+    corregir_archivo(unit)
+
+
+def run_chapter_bundle(unit):
+    from chapter_bundle import BUNDLE_PATH, build_bundle
+    build_bundle(CHAPTERS_DIR, BUNDLE_PATH)
+
+
+def run_search_index(unit):
+    from search_index import SEARCH_INDEX_PATH, build_search_index
+    build_search_index(CHAPTERS_DIR, SEARCH_INDEX_PATH)
+
+
+def run_render_cache(unit):
+    from render_cache import RENDER_DIR, render_all
+    render_all(CHAPTERS_DIR, RENDER_DIR)
+
+
+def run_sphinx(unit):
+    import sphinx  # noqa: F401 (sin Sphinx la etapa se omite)
+    result = subprocess.run(
+        [sys.executable, '-m', 'sphinx', '-j', 'auto', '-b', 'html', '-d', SPHINX_DOCTREES_DIR, DOCS_DIR, SPHINX_BUILD_DIR],
+        capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip()[-2000:] or f"sphinx-build terminó con código {result.returncode}")
+
+
+# En orden topológico: cada etapa aparece después de las que figuran en su `after`
+STAGES = {stage.name: stage for stage in [
+    Stage('pdf_extractor', run_pdf_extractor, domain='pdfs', units=list_pdfs,
+          inputs=lambda unit: [os.path.join(PDF_SOURCE_DIR, f"{unit}.pdf")],
+          outputs=lambda unit: [os.path.join(OCR_OUTPUT_DIR, f"{unit}_ocr.myst")],
+          code=['utils/pdf_extractor.py', 'utils/ocr_cache.py'], in_process=True),
+    Stage('fix_latex', run_fix_latex, domain='capitulos', units=list_chapters,
+          inputs=lambda unit: [chapter_json(unit)], outputs=lambda unit: [chapter_json(unit)],
+          code=['utils/fix_latex.py', 'utils/latex_lexer.py']),
+    Stage('check_json', run_check_json, domain='capitulos', units=list_chapters, after=['fix_latex'],
+          inputs=lambda unit: [chapter_json(unit)],
+          code=['utils/check_json.py', 'utils/chapter_schema.json']),
+    Stage('verify_solutions', run_verify_solutions, after=['check_json'], inputs=all_chapter_jsons,
+          code=['utils/verify_solutions.py', 'utils/latex_lexer.py', 'utils/fix_latex.py']),
+    Stage('migrate_to_myst', run_migrate_to_myst, domain='capitulos', units=list_chapters, after=['check_json'],
+          inputs=lambda unit: [chapter_json(unit)], outputs=lambda unit: [chapter_myst(unit)],
+          code=['utils/migrate_to_myst.py', 'utils/chapter_writer.py']),
+    Stage('myst_index', run_myst_index, after=['migrate_to_myst'],
+          inputs=lambda unit: [chapter_myst(chapter) for chapter in list_chapters() if os.path.exists(chapter_myst(chapter))],
+          outputs=lambda unit: [os.path.join(MYST_DIR, 'index.myst')],
+          code=['utils/migrate_to_myst.py']),
+    Stage('fix_all_chapters', run_fix_all_chapters, domain='myst', units=list_guide_myst,
+          inputs=lambda unit: [unit], outputs=lambda unit: [unit],
+          code=['fix_all_chapters.py', 'utils/rewrite_engine.py'], adopt_existing=True),
+    Stage('fix_latex_myst', run_fix_latex_myst, domain='myst', units=list_fix_latex_myst,
+          inputs=lambda unit: [unit], outputs=lambda unit: [unit],
+          code=['utils/fix_latex_myst.py', 'utils/rewrite_engine.py'], adopt_existing=True),
+    Stage('chapter_bundle', run_chapter_bundle, after=['check_json'], inputs=all_chapter_jsons,
+          outputs=lambda unit: [os.path.join('cache', 'capitulos.bundle')],
+          code=['utils/chapter_bundle.py']),
+    Stage('search_index', run_search_index, after=['check_json'], inputs=all_chapter_jsons,
+          outputs=lambda unit: [os.path.join('cache', 'busqueda.index')],
+          code=['utils/search_index.py']),
+    Stage('render_cache', run_render_cache, after=['check_json'], inputs=all_chapter_jsons,
+          outputs=lambda unit: [os.path.join('cache', 'render')],
+          code=['utils/render_cache.py']),
+    Stage('sphinx', run_sphinx, after=['fix_all_chapters', 'fix_latex_myst'],
+          inputs=docs_sources, outputs=lambda unit: [os.path.join(SPHINX_BUILD_DIR, 'index.html')],
+          code=['utils/render_cache.py'], in_process=True),
+]}
+
+
+# --- 3. ESTADO Y HUELLAS ---
+def load_state(state_path=STATE_PATH):
+    """Lee el estado; si no existe, no se puede leer o es de otra versión, lo trata como vacío."""
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if state.get('version') != STATE_VERSION:
+        return {}
+    return state.get('etapas', {})
+
+
+def save_state(records, state_path=STATE_PATH):
+    os.makedirs(os.path.dirname(state_path) or '.', exist_ok=True)
+    tmp_path = f"{state_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': STATE_VERSION, 'etapas': records}, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, state_path)
+
+
+class FileHasher:
+    """
+    Huellas [tamaño, mtime_ns, sha256]; reutiliza el hash si tamaño y mtime no cambiaron.
+    La de un directorio resume su listado (ruta, tamaño y mtime de cada archivo): cambia si
+    se borra, agrega o modifica cualquiera.
+    """
+
+    def __init__(self, records):
+        self._known = {}
+        for units in records.values():
+            for record in units.values():
+                for group in ('entradas', 'salidas'):
+                    for path, stamp in record.get(group, {}).items():
+                        if stamp:
+                            self._known[(path, stamp[0], stamp[1])] = stamp[2]
+
+    def stamp(self, path):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        if stat.S_ISDIR(st.st_mode):
+            return self._directory_stamp(path)
+        key = (path, st.st_size, st.st_mtime_ns)
+        digest = self._known.get(key)
+        if digest is None:
+            sha = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1 << 16), b''):
+                    sha.update(chunk)
+            digest = self._known[key] = sha.hexdigest()
+        return [st.st_size, st.st_mtime_ns, digest]
+
+    def _directory_stamp(self, path):
+        sha = hashlib.sha256()
+        total, newest = 0, 0
+        for directory, subdirs, files in os.walk(path):
+            subdirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(directory, name)
+                try:
+                    st = os.stat(file_path)
+                except FileNotFoundError:
+                    continue
+                total += st.st_size
+                newest = max(newest, st.st_mtime_ns)
+                sha.update(f"{os.path.relpath(file_path, path)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode('utf-8'))
+        return [total, newest, sha.hexdigest()]
+
+    def stamps(self, paths):
+        return {path: self.stamp(path) for path in paths}
+
+
+def _digest(stamp):
+    return stamp[2] if stamp else None
+
+
+def _changed(previous, current):
+    """True si cambió el conjunto de archivos o el contenido de alguno."""
+    return previous.keys() != current.keys() or any(_digest(previous[p]) != _digest(s) for p, s in current.items())
+
+
+# --- 4. EJECUCIÓN ---
+def _run_unit(stage_name, unit, capture):
+    """Corre una unidad (en un proceso del pool o en el principal). Devuelve (estado, mensaje, salida, segundos)."""
+    stage = STAGES[stage_name]
+    output = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(output) if capture else contextlib.nullcontext():
+            stage.run(unit)
+    except ImportError as e:
+        return 'omitida', f"dependencia opcional ausente ({e.name or e})", output.getvalue(), time.perf_counter() - start
+    except Exception as e:
+        return 'fallida', str(e) or type(e).__name__, output.getvalue(), time.perf_counter() - start
+    return 'ejecutada', '', output.getvalue(), time.perf_counter() - start
+
+
+def with_upstream(stage_names):
+    """Las etapas pedidas más todas las que deben correr antes."""
+    selected = set()
+    pending = list(stage_names)
+    while pending:
+        name = pending.pop()
+        if name not in selected:
+            selected.add(name)
+            pending.extend(STAGES[name].after)
+    return [name for name in STAGES if name in selected]
+
+
+def _label(stage_name, unit):
+    return f"[{stage_name}]" if unit == AGGREGATE else f"[{stage_name}] {unit}"
+
+
+def run_pipeline(stage_names=None, jobs=None, force=False, dry_run=False, verbose=False, state_path=STATE_PATH):
+    """
+    Ejecuta las etapas pedidas (por defecto, todas) y las que necesitan antes, reconstruyendo
+    solo las unidades desactualizadas. Devuelve {etapa: resumen} con los estados y tiempos.
+    """
+    selected = with_upstream(stage_names or list(STAGES))
+    records = load_state(state_path)
+    hasher = FileHasher(records)
+    # Etapas que corrigen en el lugar y nunca corrieron: adoptan los archivos existentes
+    adopting = {name for name in selected if STAGES[name].adopt_existing and not records.get(name) and not force}
+
+    # Grafo de unidades: (etapa, unidad) -> dependencias, en orden topológico
+    graph = {}
+    units_by_stage = {}
+    for name in selected:
+        stage = STAGES[name]
+        units_by_stage[name] = stage.units()
+        for unit in units_by_stage[name]:
+            deps = []
+            for upstream in stage.after:
+                if upstream not in units_by_stage:
+                    continue
+                if stage.domain is not None and STAGES[upstream].domain == stage.domain:
+                    if unit in units_by_stage[upstream]:
+                        deps.append((upstream, unit))
+                else:
+                    deps.extend((upstream, u) for u in units_by_stage[upstream])
+            graph[(name, unit)] = deps
+
+    summary = {name: {'unidades': len(units_by_stage[name]), 'estados': {}, 'segundos': 0.0, 'inicio': None, 'fin': None}
+               for name in selected}
+    status = {}
+    running = {}
+    started = {}
+    pool = local = None
+
+    def finish(node, estado, message='', seconds=0.0):
+        name, unit = node
+        status[node] = estado
+        stage_summary = summary[name]
+        stage_summary['estados'][estado] = stage_summary['estados'].get(estado, 0) + 1
+        stage_summary['segundos'] += seconds
+        if node in started:
+            if stage_summary['inicio'] is None or started[node] < stage_summary['inicio']:
+                stage_summary['inicio'] = started[node]
+            stage_summary['fin'] = time.perf_counter()
+        # Lo que está al día o se adopta solo se lista con --verbose
+        icon = {'ejecutada': '✅', 'fallida': '❌', 'bloqueada': '⛔', 'omitida': '⚠️',
+                'pendiente': '🕒'}.get(estado, '☑️')
+        if verbose or icon != '☑️':
+            timing = f" ({seconds:.2f} s)" if estado == 'ejecutada' else ''
+            print(f"{icon} {_label(name, unit)} {estado}{timing}{': ' + message if message else ''}")
+
+    def record_unit(node):
+        stage = STAGES[node[0]]
+        records.setdefault(node[0], {})[node[1]] = {
+            'entradas': hasher.stamps(stage.inputs(node[1]) + stage.code),
+            'salidas': hasher.stamps(stage.outputs(node[1])),
+        }
+
+    pending = dict(graph)
+    wall_start = time.perf_counter()
+    try:
+        while pending or running:
+            for node in list(pending):
+                deps = pending[node]
+                if any(dep not in status for dep in deps):
+                    continue
+                del pending[node]
+                name, unit = node
+                stage = STAGES[name]
+
+                # Un capítulo fallido bloquea lo suyo; las etapas agregadas solo se bloquean por otra agregada
+                broken = [dep for dep in deps if status[dep] in ('fallida', 'bloqueada')
+                          and (stage.domain is not None or STAGES[dep[0]].domain is None)]
+                if broken:
+                    finish(node, 'bloqueada', f"falló {_label(*broken[0])}")
+                    continue
+                if dry_run and any(status[dep] == 'pendiente' for dep in deps):
+                    finish(node, 'pendiente')
+                    continue
+
+                previous = records.get(name, {}).get(unit)
+                inputs = hasher.stamps(stage.inputs(unit) + stage.code)
+                outputs = hasher.stamps(stage.outputs(unit))
+                stale = (force or previous is None or _changed(previous['entradas'], inputs)
+                         or any(stamp is None for stamp in outputs.values())
+                         or _changed(previous['salidas'], outputs))
+                if not stale:
+                    finish(node, 'al día')
+                    continue
+                if name in adopting:
+                    if not dry_run:
+                        record_unit(node)
+                    finish(node, 'adoptada')
+                    continue
+                if dry_run:
+                    finish(node, 'pendiente')
+                    continue
+
+                if stage.in_process:
+                    local = local or ThreadPoolExecutor(max_workers=1)
+                    executor = local
+                else:
+                    pool = pool or ProcessPoolExecutor(max_workers=jobs)
+                    executor = pool
+                started[node] = time.perf_counter()
+                running[executor.submit(_run_unit, name, unit, not stage.in_process)] = node
+
+            if not running:
+                # Nada en curso: lo que quede pendiente depende de unidades que no existen
+                for node in pending:
+                    finish(node, 'bloqueada', "dependencias incompletas")
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                node = running.pop(future)
+                try:
+                    estado, message, output, seconds = future.result()
+                except Exception as e:
+                    estado, message, output, seconds = 'fallida', str(e) or type(e).__name__, '', 0.0
+                missing = [path for path in STAGES[node[0]].outputs(node[1]) if not os.path.exists(path)]
+                if estado == 'ejecutada' and missing:
+                    estado, message = 'fallida', f"no generó {', '.join(missing)}"
+                if estado == 'ejecutada':
+                    record_unit(node)
+                else:
+                    records.get(node[0], {}).pop(node[1], None)
+                if output and (verbose or estado == 'fallida'):
+                    print(output.rstrip())
+                finish(node, estado, message, seconds)
+    finally:
+        if pool:
+            pool.shutdown()
+        if local:
+            local.shutdown()
+        if not dry_run:
+            save_state(records, state_path)
+
+    for stage_summary in summary.values():
+        stage_summary['pared'] = (stage_summary['fin'] - stage_summary['inicio']) if stage_summary['inicio'] else 0.0
+        del stage_summary['inicio'], stage_summary['fin']
+    summary['total'] = time.perf_counter() - wall_start
+    return summary
+
+
+def print_summary(summary):
+    print(f"\n{'Etapa':18} {'unidades':>8} {'ejecutadas':>10} {'al día':>7} {'otras':>6} {'tiempo':>9} {'pared':>9}")
+    notes = []
+    for name, stage_summary in summary.items():
+        if name == 'total':
+            continue
+        estados = stage_summary['estados']
+        others = {k: v for k, v in estados.items() if k not in ('ejecutada', 'al día')}
+        print(f"{name:18} {stage_summary['unidades']:8} {estados.get('ejecutada', 0):10} {estados.get('al día', 0):7} "
+              f"{sum(others.values()):6} {stage_summary['segundos']:8.2f}s {stage_summary['pared']:8.2f}s")
+        if others:
+            notes.append(f"   {name}: " + ', '.join(f"{v} {k}" for k, v in sorted(others.items())))
+    for note in notes:
+        print(note)
+    print(f"⏱️ Total: {summary['total']:.2f} s de pared.")
+
+
+def pipeline_failed(summary):
+    return any(stage_summary['estados'].get(estado) for name, stage_summary in summary.items() if name != 'total'
+               for estado in ('fallida', 'bloqueada'))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ejecuta el pipeline de contenido (PDF -> JSON -> MyST -> Sphinx) reconstruyendo solo lo desactualizado.")
+    parser.add_argument('stages', nargs='*', metavar='ETAPA',
+                        help=f"Etapas a ejecutar, junto con las que necesitan antes (por defecto, todas: {', '.join(STAGES)}).")
+    parser.add_argument('--jobs', type=int, default=None, help="Procesos para las unidades en paralelo (por defecto, uno por CPU).")
+    parser.add_argument('--force', action='store_true',
+                        help="Ejecuta todas las unidades aunque estén al día; los correctores de MyST vuelven a "
+                             "procesar todos los archivos en lugar de adoptar los existentes.")
+    parser.add_argument('--dry-run', action='store_true', help="Solo muestra qué se ejecutaría, sin modificar nada.")
+    parser.add_argument('--ocr-backend', default=OCR_BACKEND,
+                        help="Motor de OCR de pdf_extractor.py ('fake' no requiere Tesseract).")
+    parser.add_argument('--verbose', action='store_true', help="Muestra cada unidad ejecutada y la salida de los scripts.")
+    parser.add_argument('--state', default=STATE_PATH, help="Archivo de estado entre ejecuciones.")
+    args = parser.parse_args()
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"etapas desconocidas: {', '.join(unknown)}")
+
+    OCR_BACKEND = args.ocr_backend
+    print("--- ⚙️ Pipeline de contenido ---")
+    summary = run_pipeline(args.stages, jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+                           verbose=args.verbose, state_path=args.state)
+    print_summary(summary)
+    if pipeline_failed(summary):
+        print("❌ Hubo unidades fallidas o bloqueadas.")
+        sys.exit(1)
+    print("✅ Pipeline completado." if not args.dry_run else "☑️ Simulación completada; no se modificó nada.")
@@ -0,0 +1,132 @@
+import hashlib
+import html
+import os
+import re
+
+from chapter_bundle import INPUT_DIR, list_chapter_files, load_chapter_json
+from content_cache import FileTier, TieredCache
+
+# --- CONFIGURACIÓN ---
+RENDER_DIR = os.path.join("cache", "render")
+# Cambiar esta versión invalida todo el HTML renderizado (p. ej. al cambiar el motor de math).
+RENDER_VERSION = "1"
+# ---------------------
+
+# Renderizador compartido por las llamadas sueltas a `render_markdown_html`.
+_renderer = None
+
+# Caché de lectura por directorio: LRU del proceso delante de los archivos HTML compartidos.
+_rendered_caches = {}
+
+# Restos de doble escape dentro de math: '\\text' debería ser '\text'.
+DOUBLE_ESCAPED_COMMAND = re.compile(r'\\\\(?=[A-Za-z])')
+
+
+def content_hash(markdown_text):
+    """Clave del caché: hash del markdown junto con la versión del renderizador."""
+    return hashlib.sha256(f"{RENDER_VERSION}\0{markdown_text}".encode('utf-8')).hexdigest()
+
+
+def _render_tier(render_dir=RENDER_DIR):
+    return FileTier(render_dir, ".html")
+
+
+def render_math(latex, display_mode):
+    """Convierte LaTeX a MathML en el servidor; el navegador ya no tiene que tipografiarlo."""
+    from latex2mathml.converter import convert
+
+    latex = DOUBLE_ESCAPED_COMMAND.sub(r'\\', latex)
+    try:
+        return convert(latex, display="block" if display_mode else "inline")
+    except Exception:
+        # Ecuación que no se pudo interpretar: se muestra el código fuente en lugar de romper la página
+        return f'<code class="math-error">{html.escape(latex)}</code>'
+
+
+def _build_markdown_renderer():
+    from markdown_it import MarkdownIt
+    from mdit_py_plugins.dollarmath import dollarmath_plugin
+
+    md = MarkdownIt("commonmark", {"html": False}).enable("table").enable("strikethrough")
+    # double_inline: el contenido usa '$$...$$' también en medio de una línea
+    md.use(dollarmath_plugin, double_inline=True,
+           renderer=lambda content, options: render_math(content, options.get("display_mode", False)))
+    return md
+
+
+def render_markdown_html(markdown_text):
+    """Renderiza un bloque de markdown con su math a HTML estático."""
+    global _renderer
+    if _renderer is None:
+        _renderer = _build_markdown_renderer()
+    return _renderer.render(markdown_text)
+
+
+def get_rendered_html(markdown_text, render_dir=RENDER_DIR):
+    """Devuelve el HTML precalculado para `markdown_text`, o None si no está en el caché."""
+    return lookup_rendered_html(markdown_text, render_dir)[0]
+
+
+def lookup_rendered_html(markdown_text, render_dir=RENDER_DIR):
+    """Como `get_rendered_html`, pero devuelve (html, origen); ver `TieredCache.lookup`."""
+    cache = _rendered_caches.get(render_dir)
+    if cache is None:
+        cache = _rendered_caches.setdefault(render_dir, TieredCache(_render_tier(render_dir)))
+    return cache.lookup(content_hash(markdown_text))
+
+
+def iter_chapter_fragments(data):
+    """Recorre los bloques de markdown de un capítulo que la app renderiza."""
+    for section in data.get('secciones', []):
+        if section.get('contenido_markdown'):
+            yield section['contenido_markdown']
+        if section.get('tipo') == 'ejercicios':
+            for ejercicio in section.get('ejercicios', []):
+                if ejercicio.get('solucion_markdown'):
+                    yield ejercicio['solucion_markdown']
+
+
+def render_fragments(fragments, render_dir=RENDER_DIR, md=None):
+    """Renderiza los fragmentos que aún no estén en el caché. Devuelve (renderizados, omitidos)."""
+    md = md or _build_markdown_renderer()
+    tier = _render_tier(render_dir)
+    rendered, skipped = 0, 0
+    for fragment in fragments:
+        path = tier.path(content_hash(fragment))
+        if os.path.exists(path):
+            skipped += 1
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(md.render(fragment))
+        os.replace(tmp_path, path)
+        rendered += 1
+    return rendered, skipped
+
+
+def render_all(input_dir=INPUT_DIR, render_dir=RENDER_DIR):
+    """Renderiza todas las secciones y soluciones que aún no estén en el caché."""
+    md = _build_markdown_renderer()
+    rendered, skipped = 0, 0
+
+    for filename in list_chapter_files(input_dir):
+        data, error = load_chapter_json(os.path.join(input_dir, filename), filename)
+        if error:
+            print(f"❌ {error}")
+            continue
+
+        done, cached = render_fragments(iter_chapter_fragments(data), render_dir, md)
+        rendered += done
+        skipped += cached
+
+    return rendered, skipped
+
+
+if __name__ == "__main__":
+    print("--- ⚙️ Pre-renderizando markdown y ecuaciones a HTML ---")
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+    else:
+        rendered, skipped = render_all(INPUT_DIR, RENDER_DIR)
+        print(f"✅ {rendered} fragmentos renderizados, {skipped} ya estaban en caché ('{RENDER_DIR}').")
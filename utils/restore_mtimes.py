@@ -0,0 +1,93 @@
+import argparse
+import os
+import subprocess
+import sys
+
+# Restaura el mtime de cada archivo versionado a la fecha de su último commit.
+#
+# Un checkout nuevo (como el de CI) deja todos los archivos con la fecha actual, y Sphinx
+# decide qué documentos releer comparando ese mtime con el de su caché: sin esto, el caché
+# del entorno restaurado entre builds no sirve y se relee todo. Con esto, solo los
+# documentos que cambiaron desde el build anterior parecen modificados.
+#
+# La fecha es la del commit con el que el cambio llegó a la rama (`--first-parent`): la de
+# un commit de una rama de PR puede ser anterior al build cacheado. Además, con `--stamp`
+# (archivo con el commit del build cacheado) los archivos que difieren entre ese commit y
+# HEAD se marcan con la fecha actual, así se releen aunque sus fechas de commit engañen.
+# Necesita el historial del repositorio (en GitHub Actions, `fetch-depth: 0`).
+
+
+def last_commit_times(paths):
+    """Devuelve {archivo: timestamp del último commit que lo tocó} con un solo `git log`."""
+    output = subprocess.run(
+        ['git', 'log', '--first-parent', '--format=%x00%ct', '--name-only', '--no-renames', '--', *paths],
+        check=True, capture_output=True, text=True,
+    ).stdout
+
+    times = {}
+    timestamp = None
+    for line in output.splitlines():
+        if line.startswith('\0'):
+            timestamp = int(line[1:])
+        elif line and timestamp is not None:
+            # El log va del commit más nuevo al más viejo: la primera aparición es la última modificación
+            times.setdefault(line, timestamp)
+    return times
+
+
+def read_stamp(stamp_path):
+    """Commit guardado en `stamp_path`, o None si no existe o no está en el historial."""
+    try:
+        with open(stamp_path, 'r', encoding='utf-8') as f:
+            commit = f.read().strip()
+    except FileNotFoundError:
+        return None
+    known = subprocess.run(['git', 'cat-file', '-e', f"{commit}^{{commit}}"], capture_output=True)
+    return commit if commit and known.returncode == 0 else None
+
+
+def changed_since(commit, paths):
+    """Archivos (relativos a la raíz del repositorio) que difieren entre `commit` y HEAD."""
+    output = subprocess.run(
+        ['git', 'diff', '--name-only', '--no-renames', commit, 'HEAD', '--', *paths],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return [line for line in output.splitlines() if line]
+
+
+def restore_mtimes(paths, since=None):
+    """
+    Aplica los mtimes a los archivos que existen; los que cambiaron desde el commit `since`
+    quedan con la fecha actual. Devuelve (archivos restaurados, archivos marcados como nuevos).
+    """
+    top = subprocess.run(['git', 'rev-parse', '--show-toplevel'], check=True, capture_output=True, text=True).stdout.strip()
+    changed = set(changed_since(since, paths)) if since else set()
+    restored, touched = 0, 0
+    for relative_path, timestamp in last_commit_times(paths).items():
+        path = os.path.join(top, relative_path)
+        if not os.path.isfile(path):
+            continue
+        if relative_path in changed:
+            os.utime(path)
+            touched += 1
+        else:
+            os.utime(path, (timestamp, timestamp))
+            restored += 1
+    return restored, touched
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Restaura el mtime de los archivos a la fecha de su último commit.")
+    parser.add_argument('paths', nargs='*', default=['docs'], help="Rutas a restaurar (por defecto, 'docs').")
+    parser.add_argument('--stamp', help="Archivo con el commit del build cacheado; lo que cambió desde ese commit se marca como nuevo.")
+    args = parser.parse_args()
+
+    try:
+        since = read_stamp(args.stamp) if args.stamp else None
+        if args.stamp and since is None:
+            print(f"⚠️ '{args.stamp}' no existe o su commit no está en el historial: solo se usan las fechas de commit.")
+        restored, touched = restore_mtimes(args.paths, since)
+    except (OSError, subprocess.CalledProcessError) as e:
+        print(f"❌ ERROR: no se pudo leer el historial de git: {e}")
+        sys.exit(1)
+    print(f"✅ mtime restaurado en {restored} archivos; {touched} cambiados desde el build cacheado.")
@@ -0,0 +1,102 @@
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+# Motor de reemplazos compartido por fix_all_chapters.py y fix_latex_myst.py.
+#
+# La tabla {rota: correcta} se compila en una única expresión regular construida a
+# partir de un trie de las claves: en cada posición del texto el motor avanza por el
+# prefijo común en lugar de probar las reglas una por una, así que agregar miles de
+# correcciones de OCR no multiplica el costo por archivo. Las reglas se aplican en una
+# sola pasada y siempre gana la coincidencia más larga.
+
+
+def _trie_to_pattern(node):
+    """Convierte un nodo del trie en una expresión regular sin grupos de captura."""
+    end = '' in node
+    branches = [re.escape(char) + _trie_to_pattern(child) for char, child in sorted(node.items()) if char != '']
+
+    if not branches:
+        return ''
+    if len(branches) == 1:
+        body = branches[0]
+        grouped = f'(?:{body})' if len(body) > 1 else body
+    else:
+        grouped = '(?:' + '|'.join(branches) + ')'
+    # Si aquí termina una clave, el resto es opcional; '?' es voraz, así que gana la más larga
+    return grouped + '?' if end else (grouped if len(branches) > 1 else branches[0])
+
+
+class RewriteEngine:
+    """Tabla de correcciones compilada una sola vez y aplicada en una pasada."""
+
+    def __init__(self, rules):
+        self.rules = dict(rules)
+        if not self.rules:
+            self.pattern = None
+            return
+
+        trie = {}
+        for key in self.rules:
+            if not key:
+                raise ValueError("Las claves de corrección no pueden estar vacías.")
+            node = trie
+            for char in key:
+                node = node.setdefault(char, {})
+            node[''] = {}
+        self.pattern = re.compile(_trie_to_pattern(trie))
+
+    def apply(self, text):
+        """Devuelve (texto_corregido, cantidad_de_reemplazos)."""
+        if self.pattern is None:
+            return text, 0
+        rules = self.rules
+        return self.pattern.subn(lambda m: rules[m.group(0)], text)
+
+    def rewrite_file(self, file_path):
+        """
+        Aplica las correcciones a un archivo y lo reescribe solo si algo cambió.
+        Devuelve la cantidad de reemplazos realizados.
+        """
+        with open(file_path, 'r', encoding='utf-8', newline='') as f:
+            original = f.read()
+
+        corrected, count = self.apply(original)
+        if count and corrected != original:
+            tmp_path = f"{file_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8', newline='') as f:
+                f.write(corrected)
+            os.replace(tmp_path, file_path)
+        return count
+
+
+# El motor se compila una vez por proceso del pool y se reutiliza para todos sus archivos
+_worker_engine = None
+
+
+def _init_worker(rules):
+    global _worker_engine
+    _worker_engine = RewriteEngine(rules)
+
+
+def _rewrite_in_worker(file_path):
+    try:
+        return file_path, _worker_engine.rewrite_file(file_path), None
+    except Exception as e:
+        return file_path, 0, e
+
+
+def rewrite_files(rules, file_paths, jobs=None):
+    """
+    Aplica `rules` a varios archivos en paralelo.
+    Genera tuplas (ruta, reemplazos, error) en el mismo orden que `file_paths`.
+    """
+    file_paths = list(file_paths)
+    if len(file_paths) <= 1 or jobs == 1:
+        _init_worker(rules)
+        for file_path in file_paths:
+            yield _rewrite_in_worker(file_path)
+        return
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(rules,)) as executor:
+        yield from executor.map(_rewrite_in_worker, file_paths)
@@ -0,0 +1,337 @@
+import argparse
+import math
+import mmap
+import os
+import pickle
+import re
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+from collections import Counter
+
+from chapter_bundle import (INPUT_DIR, _chapter_label, _source_stamp, exercise_key, list_chapter_files,
+                            load_chapter_json, sources_changed)
+from latex_lexer import tokenize
+
+# --- CONFIGURACIÓN ---
+SEARCH_INDEX_PATH = os.path.join("cache", "busqueda.index")
+
+# Misma cabecera fija que el paquete de capítulos: firma, versión y longitud del encabezado.
+# Incrementar SEARCH_VERSION al cambiar la tokenización para forzar la recompilación.
+SEARCH_MAGIC = b"FISSRCH\0"
+SEARCH_VERSION = 1
+HEADER = struct.Struct("<8sIQ")
+
+# Peso de cada campo: sus términos cuentan tantas veces en la frecuencia del documento
+FIELD_WEIGHTS = {'titulo': 3, 'contenido_markdown': 1, 'enunciado': 2, 'solucion_markdown': 1}
+# Parámetros de BM25
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Longitud máxima de los n-gramas de símbolos de math
+MATH_NGRAM = 3
+EXTRACT_CHARS = 90
+# ---------------------
+
+# Índice invertido para el buscador de la app. Cada documento es la teoría de un capítulo
+# o un ejercicio (enunciado + solución). Hay dos clases de términos:
+#   - palabras del texto, en minúsculas, sin tildes y sin plural ("Energías" -> "energia")
+#   - n-gramas de símbolos de cada ecuación, normalizados, con prefijo '$' para no
+#     mezclarse con las palabras: "\frac{1}{2}mv^2" y "\dfrac{1}{2} m \cdot v^{2}" dan los
+#     mismos términos ('$\frac 1 2', '$1 2 m', '$m v ^', ...)
+#
+# En disco: cabecera + encabezado pickle (documentos, diccionario de términos) + un arreglo
+# uint32 con las longitudes de los documentos y, por término, sus ids de documento seguidos
+# de sus frecuencias. La app lo abre con mmap y solo lee las listas de los términos buscados.
+
+STOPWORDS = {
+    'a', 'al', 'ante', 'con', 'como', 'cual', 'cuando', 'de', 'del', 'desde', 'donde', 'e', 'el', 'en',
+    'entre', 'es', 'esta', 'este', 'esto', 'hay', 'la', 'las', 'lo', 'los', 'mas', 'o', 'para', 'pero',
+    'por', 'que', 'se', 'si', 'sin', 'sobre', 'son', 'su', 'sus', 'un', 'una', 'uno', 'unos', 'unas', 'y',
+}
+
+_WORD = re.compile(r'[a-z0-9]+')
+_MATH_ATOM = re.compile(r'\\[A-Za-z]+|\\.|[A-Za-z]|\d+(?:\.\d+)?|[^\s{}]')
+# Comandos equivalentes entre sí
+_MATH_ALIASES = {r'\dfrac': r'\frac', r'\tfrac': r'\frac', r'\le': r'\leq', r'\ge': r'\geq', r'\ne': r'\neq'}
+# Espaciado, tamaño y decoración: no cambian qué ecuación es
+_MATH_IGNORED = {
+    r'\,', r'\;', r'\:', r'\!', r'\ ', r'\quad', r'\qquad', r'\left', r'\right', r'\displaystyle',
+    r'\cdot', r'\text', r'\mathrm', r'\mathbf', r'\boldsymbol', r'\vec', r'\operatorname',
+}
+# Una consulta sin '$' se toma como fórmula si tiene alguno de estos caracteres
+_LOOKS_LIKE_MATH = re.compile(r'[\\^_=]')
+
+
+# --- TOKENIZACIÓN ---
+def fold(text):
+    """Minúsculas y sin tildes ('Energía Cinética' -> 'energia cinetica')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _stem(word):
+    """Quita el plural: 'fuerzas' -> 'fuerza', 'presiones' -> 'presion', 'leyes' -> 'ley'."""
+    if len(word) > 3 and word.endswith('s') and not word[-2].isdigit():
+        word = word[:-1]
+        if len(word) > 3 and word.endswith('e') and word[-2] in 'dlnrjyz':
+            word = word[:-1]
+    return word
+
+
+def text_terms(text):
+    """Términos de palabra de un texto sin math."""
+    return [_stem(w) for w in _WORD.findall(fold(text)) if w not in STOPWORDS]
+
+
+def math_terms(latex):
+    """N-gramas (1..MATH_NGRAM) de símbolos normalizados de una ecuación."""
+    atoms = []
+    for atom in _MATH_ATOM.findall(latex):
+        atom = _MATH_ALIASES.get(atom, atom)
+        if atom not in _MATH_IGNORED:
+            atoms.append(atom)
+    terms = []
+    for n in range(1, MATH_NGRAM + 1):
+        for i in range(len(atoms) - n + 1):
+            terms.append('$' + ' '.join(atoms[i:i + n]))
+    return terms
+
+
+def markdown_terms(markdown):
+    """Términos de un campo de markdown: palabras del texto y n-gramas de cada ecuación."""
+    terms = []
+    for token in tokenize(markdown):
+        fragment = markdown[token.inner_start:token.inner_end]
+        if token.kind == 'text':
+            terms.extend(text_terms(fragment))
+        else:
+            terms.extend(math_terms(fragment))
+    return terms
+
+
+def query_terms(query):
+    """
+    Términos de una consulta. Con '$' se separa como markdown; sin '$', si parece una
+    fórmula ('\\frac{1}{2}mv^2', 'F = ma') se toma entera como math y si no, como texto.
+    """
+    if '$' in query:
+        return markdown_terms(query)
+    if _LOOKS_LIKE_MATH.search(query):
+        return math_terms(query)
+    return text_terms(query)
+
+
+def _extract(markdown):
+    """
+    Resumen corto para la lista de resultados: el texto sin marcas de markdown y las
+    ecuaciones en línea completas (nunca se corta una ecuación a la mitad).
+    """
+    parts = []
+    size = 0
+    for token in tokenize(markdown):
+        if token.kind == 'text':
+            piece = re.sub(r'[*_#`>|]', '', markdown[token.start:token.end])
+        elif token.kind == 'inline':
+            piece = markdown[token.start:token.end]
+        else:
+            piece = '…'
+        if token.kind == 'text' and size + len(piece) > EXTRACT_CHARS:
+            parts.append(piece[:EXTRACT_CHARS - size].rstrip() + '…')
+            break
+        if size + len(piece) > EXTRACT_CHARS:
+            parts.append(' …')
+            break
+        parts.append(piece)
+        size += len(piece)
+    return ' '.join(''.join(parts).split())
+
+
+# --- DOCUMENTOS ---
+def iter_chapter_documents(chapter_key, data):
+    """Genera (documento, términos) para la teoría y cada ejercicio de un capítulo."""
+    base = {
+        'key': chapter_key,
+        'capitulo_id': data.get('capitulo_id'),
+        'titulo': data.get('titulo', chapter_key),
+        'libro': data.get('libro'),
+        'volumen': data.get('volumen'),
+    }
+    exercise_index = 0
+    for section in data.get('secciones', []):
+        if section.get('tipo') == 'ejercicios':
+            for ejercicio in section.get('ejercicios', []) or []:
+                # Misma clave que `split_chapter` usa para el cuerpo del ejercicio
+                ref = exercise_key(chapter_key, exercise_index)
+                exercise_index += 1
+                terms = Counter()
+                for field in ('enunciado', 'solucion_markdown'):
+                    for term in markdown_terms(ejercicio.get(field, '')):
+                        terms[term] += FIELD_WEIGHTS[field]
+                document = dict(base, tipo='ejercicio', ref=ref, ejercicio_id=ejercicio.get('ejercicio_id'),
+                                extracto=_extract(ejercicio.get('enunciado', '')))
+                yield document, terms
+        else:
+            terms = Counter()
+            for term in text_terms(base['titulo']) + text_terms(section.get('titulo', '')):
+                terms[term] += FIELD_WEIGHTS['titulo']
+            for term in markdown_terms(section.get('contenido_markdown', '')):
+                terms[term] += FIELD_WEIGHTS['contenido_markdown']
+            document = dict(base, tipo='teoria', ref=None, ejercicio_id=None,
+                            extracto=_extract(section.get('titulo', '')))
+            yield document, terms
+
+
+# --- COMPILACIÓN ---
+def build_search_index(input_dir=INPUT_DIR, index_path=SEARCH_INDEX_PATH):
+    """
+    Compila el índice invertido de todos los capítulos de `input_dir` en `index_path`.
+    La escritura es atómica (archivo temporal + rename), igual que el paquete de capítulos.
+    Devuelve la cantidad de documentos indexados.
+    """
+    sources = {}
+    documents = []
+    lengths = array('I')
+    postings = {}
+    for filename in list_chapter_files(input_dir):
+        file_path = os.path.join(input_dir, filename)
+        sources[filename] = _source_stamp(file_path)
+        data, error = load_chapter_json(file_path, _chapter_label(filename))
+        if data is None:
+            continue
+        for document, terms in iter_chapter_documents(filename[:-len('.json')], data):
+            doc_id = len(documents)
+            documents.append(document)
+            lengths.append(sum(terms.values()))
+            for term, frequency in terms.items():
+                postings.setdefault(term, []).append((doc_id, frequency))
+
+    # Los ids de documento crecen, así que cada lista de postings ya está ordenada
+    terms = {}
+    blob = array('I')
+    for term, entries in postings.items():
+        terms[term] = (len(lengths) + len(blob), len(entries))
+        blob.extend(doc_id for doc_id, _ in entries)
+        blob.extend(min(frequency, 0xFFFFFFFF) for _, frequency in entries)
+
+    header = pickle.dumps({
+        "version": SEARCH_VERSION,
+        # Los arreglos se guardan en el orden de bytes de la máquina que compila
+        "byteorder": sys.byteorder,
+        "sources": sources,
+        "documents": documents,
+        "terms": terms,
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+    }, protocol=pickle.HIGHEST_PROTOCOL)
+
+    os.makedirs(os.path.dirname(index_path) or '.', exist_ok=True)
+    tmp_path = f"{index_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(SEARCH_MAGIC, SEARCH_VERSION, len(header)))
+        f.write(header)
+        lengths.tofile(f)
+        blob.tofile(f)
+    os.replace(tmp_path, index_path)
+    return len(documents)
+
+
+# --- LECTURA Y CONSULTA ---
+class SearchIndex:
+    """Lector de solo lectura del índice mapeado en memoria."""
+
+    def __init__(self, index_path=SEARCH_INDEX_PATH):
+        self.path = index_path
+        with open(index_path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, header_len = HEADER.unpack_from(self._mm, 0)
+        if magic != SEARCH_MAGIC or version != SEARCH_VERSION:
+            self._mm.close()
+            raise ValueError(f"Índice de búsqueda incompatible: {index_path}")
+
+        header = pickle.loads(self._mm[HEADER.size:HEADER.size + header_len])
+        if header["byteorder"] != sys.byteorder:
+            self._mm.close()
+            raise ValueError(f"Índice de búsqueda compilado en otra arquitectura: {index_path}")
+
+        self.sources = header["sources"]
+        self.documents = header["documents"]
+        self.terms = header["terms"]
+        self.avgdl = header["avgdl"]
+        # Vista uint32 sobre los datos: longitudes de documentos y luego las listas de postings
+        self._data = memoryview(self._mm)[HEADER.size + header_len:].cast('I')
+
+    def __len__(self):
+        return len(self.documents)
+
+    def search(self, query, limit=10):
+        """Devuelve hasta `limit` pares (puntaje, documento) ordenados por BM25."""
+        total = len(self.documents)
+        if not total:
+            return []
+        scores = {}
+        for term, query_frequency in Counter(query_terms(query)).items():
+            entry = self.terms.get(term)
+            if entry is None:
+                continue
+            offset, count = entry
+            idf = math.log(1 + (total - count + 0.5) / (count + 0.5))
+            doc_ids = self._data[offset:offset + count]
+            frequencies = self._data[offset + count:offset + 2 * count]
+            for doc_id, frequency in zip(doc_ids, frequencies):
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._data[doc_id] / self.avgdl)
+                score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                scores[doc_id] = scores.get(doc_id, 0.0) + score * query_frequency
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(score, self.documents[doc_id]) for doc_id, score in best]
+
+    def is_stale(self, input_dir=INPUT_DIR):
+        return sources_changed(self.sources, input_dir)
+
+    def close(self):
+        self._data.release()
+        self._mm.close()
+
+
+def open_search_index(input_dir=INPUT_DIR, index_path=SEARCH_INDEX_PATH):
+    """Abre el índice, recompilándolo antes si falta, es incompatible o está desactualizado."""
+    try:
+        index = SearchIndex(index_path)
+    except (OSError, ValueError, pickle.UnpicklingError, struct.error):
+        index = None
+
+    if index is not None and not index.is_stale(input_dir):
+        return index
+
+    if index is not None:
+        index.close()
+    build_search_index(input_dir, index_path)
+    return SearchIndex(index_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compila el índice de búsqueda de los capítulos y permite probar consultas.")
+    parser.add_argument('query', nargs='*', help="Consulta de prueba (p. ej. '\\frac{1}{2}mv^2' o 'energía cinética').")
+    parser.add_argument('--rebuild', action='store_true', help="Recompila el índice aunque esté al día.")
+    args = parser.parse_args()
+
+    if not os.path.isdir(INPUT_DIR):
+        print(f"❌ ERROR: El directorio '{INPUT_DIR}' no existe.")
+        sys.exit(1)
+
+    if args.rebuild:
+        total = build_search_index(INPUT_DIR, SEARCH_INDEX_PATH)
+        print(f"✅ Índice compilado con {total} documentos en '{SEARCH_INDEX_PATH}'.")
+    index = open_search_index(INPUT_DIR, SEARCH_INDEX_PATH)
+    print(f"☑️ Índice '{SEARCH_INDEX_PATH}': {len(index)} documentos, {len(index.terms)} términos.")
+
+    if args.query:
+        query = ' '.join(args.query)
+        start = time.perf_counter()
+        hits = index.search(query)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"🔎 '{query}': {len(hits)} resultados en {elapsed:.2f} ms")
+        for score, document in hits:
+            destino = f"Ejercicio {document['ejercicio_id']}" if document['tipo'] == 'ejercicio' else "Teoría"
+            print(f"  {score:6.2f}  Cap. {document['capitulo_id']} · {destino}: {document['extracto']}")
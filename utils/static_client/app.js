@@ -0,0 +1,164 @@
+// Cliente liviano del sitio estático (generado por utils/export_static.py).
+//
+// Lee nav.json una vez, arma la barra lateral y, al elegir un capítulo, descarga solo su
+// fragmento; cada solución se descarga recién cuando se abre. Los fragmentos son JSON
+// comprimido con gzip: si el servidor ya los envía con Content-Encoding el navegador los
+// descomprime solo, si no se descomprimen acá.
+
+const cache = new Map();
+
+async function fetchJson(url) {
+  if (!cache.has(url)) {
+    cache.set(url, (async () => {
+      const response = await fetch(url);
+      if (!response.ok) throw new Error(`${url}: HTTP ${response.status}`);
+      let bytes = new Uint8Array(await response.arrayBuffer());
+      if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+        const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+        bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+      }
+      return JSON.parse(new TextDecoder("utf-8").decode(bytes));
+    })());
+    cache.get(url).catch(() => cache.delete(url));
+  }
+  return cache.get(url);
+}
+
+function element(tag, attrs = {}, children = []) {
+  const node = document.createElement(tag);
+  for (const [name, value] of Object.entries(attrs)) {
+    if (name === "html") node.innerHTML = value;
+    else if (name === "text") node.textContent = value;
+    else node.setAttribute(name, value);
+  }
+  for (const child of children) node.append(child);
+  return node;
+}
+
+let capitulos = {};
+
+function buildNavigation(nav) {
+  const container = document.getElementById("navegacion");
+  container.replaceChildren();
+  for (const libro of nav.libros) {
+    if (nav.libros.length > 1) {
+      container.append(element("h2", { text: `${libro.libro}, Volumen ${libro.volumen}` }));
+    }
+    libro.partes.forEach((parte, index) => {
+      const ids = parte.capitulos.map((c) => c.capitulo_id);
+      const rango = ids.length > 1 ? `Caps. ${ids[0]}-${ids[ids.length - 1]}` : `Cap. ${ids[0]}`;
+      const lista = element("ul");
+      for (const capitulo of parte.capitulos) {
+        capitulos[capitulo.key] = { ...capitulo, parte: parte.nombre, libro };
+        lista.append(element("li", {}, [element("a", { href: `#${capitulo.key}`, "data-key": capitulo.key, text: capitulo.titulo })]));
+      }
+      container.append(element("details", { open: "" }, [
+        element("summary", { text: `PARTE ${index + 1}: ${parte.nombre} (${rango})` }),
+        lista,
+      ]));
+    });
+  }
+}
+
+async function showSolution(button, ejercicio) {
+  const destino = button.nextElementSibling;
+  if (!destino.hidden) {
+    destino.hidden = true;
+    button.textContent = "✅ Mostrar Solución Detallada";
+    return;
+  }
+  button.disabled = true;
+  try {
+    const solucion = await fetchJson(ejercicio.solucion);
+    destino.innerHTML = solucion.html;
+    destino.hidden = false;
+    button.textContent = "Ocultar Solución";
+  } catch (error) {
+    destino.textContent = `No se pudo cargar la solución (${error.message}).`;
+    destino.hidden = false;
+  } finally {
+    button.disabled = false;
+  }
+}
+
+function renderView(fragmento, vista) {
+  const cuerpo = document.getElementById("vista");
+  cuerpo.replaceChildren();
+  if (vista === "teoria") {
+    if (!fragmento.teoria) {
+      cuerpo.append(element("p", { class: "aviso", text: "Contenido de teoría no estructurado correctamente en el JSON." }));
+      return;
+    }
+    cuerpo.append(element("h2", { text: fragmento.teoria.titulo }), element("div", { html: fragmento.teoria.html }));
+    return;
+  }
+  if (!fragmento.ejercicios) {
+    cuerpo.append(element("p", { class: "info", text: "Este capítulo no contiene ejercicios resueltos." }));
+    return;
+  }
+  cuerpo.append(element("h2", { text: fragmento.ejercicios.titulo }));
+  for (const ejercicio of fragmento.ejercicios.items) {
+    const boton = element("button", { type: "button", text: "✅ Mostrar Solución Detallada" });
+    const solucion = element("div", { class: "solucion" });
+    solucion.hidden = true;
+    boton.addEventListener("click", () => showSolution(boton, ejercicio));
+    cuerpo.append(element("article", { class: "ejercicio" }, [element("div", { html: ejercicio.enunciado }), boton, solucion]));
+  }
+}
+
+async function showChapter(key) {
+  const capitulo = capitulos[key];
+  const contenido = document.getElementById("contenido");
+  if (!capitulo) return;
+  for (const link of document.querySelectorAll("#navegacion a")) {
+    link.classList.toggle("activo", link.dataset.key === key);
+  }
+  document.getElementById("info-libro").textContent = `⚛️ Guía de Estudio Basada en ${capitulo.libro.libro}, Volumen ${capitulo.libro.volumen}.`;
+  contenido.replaceChildren(element("p", { text: "Cargando…" }));
+
+  let fragmento;
+  try {
+    fragmento = await fetchJson(capitulo.fragmento);
+  } catch (error) {
+    contenido.replaceChildren(element("p", { class: "error", text: `No se pudo cargar el capítulo (${error.message}).` }));
+    return;
+  }
+  if (fragmento.error) {
+    contenido.replaceChildren(element("p", { class: "error", text: fragmento.error }));
+    return;
+  }
+
+  const selector = element("div", { class: "selector-vista" });
+  const vistas = [["teoria", "📘 Teoría y Conceptos Clave"], ["ejercicios", "🧠 Ejercicios Resueltos"]];
+  for (const [vista, etiqueta] of vistas) {
+    const boton = element("button", { type: "button", "data-vista": vista, text: etiqueta });
+    boton.addEventListener("click", () => {
+      selector.querySelectorAll("button").forEach((b) => b.classList.toggle("activo", b === boton));
+      renderView(fragmento, vista);
+    });
+    selector.append(boton);
+  }
+  contenido.replaceChildren(
+    element("h1", { text: fragmento.titulo }),
+    element("h2", { class: "parte", text: fragmento.parte }),
+    element("p", {}, [element("a", { href: capitulo.pagina, text: "Versión para imprimir" })]),
+    selector,
+    element("div", { id: "vista" }),
+  );
+  selector.querySelector("button").click();
+}
+
+async function main() {
+  try {
+    const nav = await fetchJson("nav.json");
+    document.title = nav.titulo;
+    buildNavigation(nav);
+  } catch (error) {
+    document.getElementById("navegacion").textContent = `No se pudo cargar el índice (${error.message}).`;
+    return;
+  }
+  window.addEventListener("hashchange", () => showChapter(location.hash.slice(1)));
+  showChapter(location.hash.slice(1) || Object.keys(capitulos)[0]);
+}
+
+main();
@@ -0,0 +1,656 @@
+import argparse
+import math
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+
+from chapter_bundle import list_chapter_files, load_chapter_json
+from fix_latex import fix_latex_delimiters_in_string
+from latex_lexer import tokenize
+
+# --- CONFIGURACIÓN ---
+BASE_PATH = 'json_capitulos'
+# Tolerancia relativa entre los dos miembros de una igualdad. Un resultado escrito también
+# coincide si está a menos de media unidad de su última cifra: es la cuenta redondeada.
+RELATIVE_TOLERANCE = 0.005
+# ---------------------
+
+# Verificación numérica de las soluciones.
+#
+# De cada solución se toman las igualdades entre expresiones numéricas: en
+# "N = (5.0 \text{ kg}) (9.80 \text{ m/s}^2) = 49.0 \text{ N}" el segundo miembro es la
+# fórmula con los datos sustituidos y el tercero el resultado escrito. Una cadena sigue en
+# la ecuación siguiente si empieza con el mismo miembro ("T = ...", "T = ...", "T = 21 240 N").
+# Los miembros con variables o con LaTeX que no se entiende se saltean (no son errores).
+# Además, cada ejercicio puede declarar en `verificacion` una fórmula en texto plano, sus
+# datos y el resultado esperado; ahí cualquier problema sí es un error.
+#
+# Las unidades se convierten a SI al leerlas y las dimensiones se siguen de forma
+# simbólica: sumar metros con segundos, o igualar una fuerza con una energía, es un
+# error aunque los números coincidan.
+#
+# La evaluación es vectorizada: cada expresión se reduce a una plantilla con los números
+# como parámetros ("(p[0] * p[1])"), las expresiones del corpus se agrupan
+# por plantilla y cada grupo se evalúa con una sola llamada de NumPy sobre la matriz de
+# sus parámetros. NumPy es opcional para el resto de las herramientas y solo se importa acá.
+
+BASE_UNITS = ('m', 'kg', 's', 'A', 'K', 'mol', 'cd')
+DIMENSIONLESS = (Fraction(0),) * len(BASE_UNITS)
+
+# Símbolo -> (factor a SI, dimensiones en unidades base)
+_DERIVED_UNITS = {
+    'cm': (1e-2, 'm'), 'mm': (1e-3, 'm'), 'km': (1e3, 'm'),
+    'g': (1e-3, 'kg'),
+    'ms': (1e-3, 's'), 'min': (60.0, 's'), 'h': (3600.0, 's'),
+    'N': (1.0, 'kg m s^-2'), 'kN': (1e3, 'kg m s^-2'),
+    'J': (1.0, 'kg m^2 s^-2'), 'kJ': (1e3, 'kg m^2 s^-2'), 'eV': (1.602176634e-19, 'kg m^2 s^-2'),
+    'W': (1.0, 'kg m^2 s^-3'), 'kW': (1e3, 'kg m^2 s^-3'),
+    'Pa': (1.0, 'kg m^-1 s^-2'), 'kPa': (1e3, 'kg m^-1 s^-2'), 'atm': (101325.0, 'kg m^-1 s^-2'),
+    'Hz': (1.0, 's^-1'),
+    'C': (1.0, 'A s'), 'V': (1.0, 'kg m^2 s^-3 A^-1'), 'Ω': (1.0, 'kg m^2 s^-3 A^-2'),
+    'L': (1e-3, 'm^3'),
+    'rad': (1.0, ''), '°': (math.pi / 180, ''), 'deg': (math.pi / 180, ''),
+}
+_UNIT_SYMBOL = re.compile(r'([A-Za-zΩ°]+)(?:\^\{?(-?\d+(?:/\d+)?)\}?)?')
+_UNIT_SEPARATORS = re.compile(r'\\cdot|[·*.]')
+
+Quantity = namedtuple('Quantity', 'value ulp scale dims')
+
+
+def _parse_symbols(text, table):
+    scale, dims = 1.0, list(DIMENSIONLESS)
+    for chunk_index, chunk in enumerate(text.split('/')):
+        sign = 1 if chunk_index == 0 else -1
+        chunk = _UNIT_SEPARATORS.sub(' ', chunk)
+        position = 0
+        for match in _UNIT_SYMBOL.finditer(chunk):
+            if chunk[position:match.start()].strip():
+                raise ValueError(f"unidad no reconocida: '{text.strip()}'")
+            position = match.end()
+            symbol_scale, symbol_dims = table(match.group(1))
+            exponent = Fraction(match.group(2) or 1) * sign
+            scale *= symbol_scale ** exponent
+            dims = [d + s * exponent for d, s in zip(dims, symbol_dims)]
+        if chunk[position:].strip():
+            raise ValueError(f"unidad no reconocida: '{text.strip()}'")
+    return scale, tuple(dims)
+
+
+def _base_unit(symbol):
+    if symbol not in BASE_UNITS:
+        raise ValueError(f"unidad base desconocida: {symbol}")
+    return 1.0, tuple(Fraction(int(symbol == base)) for base in BASE_UNITS)
+
+
+UNITS = {symbol: _base_unit(symbol) for symbol in BASE_UNITS}
+UNITS.update({symbol: (scale, _parse_symbols(spec, _base_unit)[1]) for symbol, (scale, spec) in _DERIVED_UNITS.items()})
+
+
+def _unit(symbol):
+    if symbol not in UNITS:
+        raise ValueError(f"unidad desconocida: {symbol}")
+    return UNITS[symbol]
+
+
+@lru_cache(maxsize=None)
+def parse_unit(text):
+    """'m/s^2' -> (factor a SI, dimensiones). Lanza ValueError si hay símbolos desconocidos."""
+    return _parse_symbols(text, _unit)
+
+
+def format_dims(dims):
+    parts = [base if d == 1 else f"{base}^{d}" for base, d in zip(BASE_UNITS, dims) if d]
+    return ' '.join(parts) or 'adimensional'
+
+
+def _number_ulp(text):
+    """Una unidad de la última cifra escrita: '14.7' -> 0.1, '21 240' -> 1, '2.5e3' -> 100."""
+    mantissa, _, exponent = text.lower().partition('e')
+    decimals = len(mantissa.partition('.')[2])
+    return 10.0 ** (int(exponent or 0) - decimals)
+
+
+_QUANTITY = re.compile(r'\s*(-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?)\s*(.*?)\s*$')
+
+
+def parse_quantity(text):
+    """'9.80 m/s^2' -> Quantity en SI. Lanza ValueError si no es un número con unidad."""
+    match = _QUANTITY.match(text)
+    if not match:
+        raise ValueError(f"se esperaba un número con unidad: '{text}'")
+    number, unit_text = match.groups()
+    scale, dims = parse_unit(unit_text) if unit_text else (1.0, DIMENSIONLESS)
+    return Quantity(float(number), _number_ulp(number), scale, dims), bool(unit_text)
+
+
+# --- 1. TOKENS Y PARSER ---
+_TOKEN = re.compile(r'''
+    (?P<skip>\s+|\\[,;:!\ ]|~|\\left|\\right|\\displaystyle|\\color\{[^{}]*\})
+  | (?P<unit>\\(?:text|mathrm|rm|mbox)\s*\{(?P<unit_text>[^{}]*)\})
+  | (?P<number>\d{1,3}(?:(?:\s|\\,|\\\ |~)\d{3})+(?:\.\d+)?(?!\d)|\d+(?:\.\d+)?(?:[eE][-+]?\d+)?|\.\d+)
+  | (?P<command>\\[A-Za-z]+|\\\\)
+  | (?P<name>[A-Za-z][A-Za-z0-9_]*)
+  | (?P<op>\*\*|[-+*/^_(){}\[\]=,;|'])
+  | (?P<other>.)
+''', re.VERBOSE | re.DOTALL)
+_THOUSANDS = re.compile(r'\s|\\,|\\ |~')
+
+Tok = namedtuple('Tok', 'kind text start end')
+
+# Separadores entre ecuaciones de un mismo bloque y entre miembros de una ecuación
+EQUATION_SEPARATORS = {r'\implies', r'\Rightarrow', r'\Longrightarrow', r'\quad', r'\qquad', '\\\\', ',', ';'}
+MEMBER_SEPARATORS = {'=', r'\approx', r'\simeq'}
+FUNCTIONS = {'sqrt', 'sin', 'cos', 'tan'}
+_OPEN, _CLOSE = {'(', '{', '['}, {')', '}', ']'}
+
+
+def lex(text):
+    tokens = []
+    for match in _TOKEN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'skip':
+            continue
+        value = match.group('unit_text') if kind == 'unit' else match.group()
+        tokens.append(Tok(kind, value, match.start(), match.end()))
+    return tokens
+
+
+class NotNumeric(Exception):
+    """La expresión tiene variables o LaTeX que el verificador no interpreta."""
+
+
+class DimensionError(ValueError):
+    pass
+
+
+class _Parser:
+    """
+    Descenso recursivo sobre los tokens de un miembro. Construye un árbol de tuplas:
+    ('num', i) parámetro i, ('unit', factor, dims), ('const', valor), ('add'|'sub'|'mul'|'div', a, b),
+    ('neg', a), ('pow', a, Fraction), ('func', nombre, a).
+
+    Sin `variables` (LaTeX de las soluciones) cualquier variable hace NotNumeric; con
+    `variables` (las anotaciones) cada nombre se reemplaza por su dato.
+    """
+
+    def __init__(self, tokens, variables=None):
+        self.tokens = tokens
+        self.pos = 0
+        self.variables = variables
+        self.values = []
+        self.ulps = []
+
+    def parse(self):
+        if not self.tokens:
+            raise NotNumeric()
+        node = self.expr()
+        if self.pos != len(self.tokens):
+            raise NotNumeric()
+        return node
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else None
+
+    def next(self):
+        token = self.peek()
+        if token is None:
+            raise NotNumeric()
+        self.pos += 1
+        return token
+
+    def expect(self, text):
+        if self.next().text != text:
+            raise NotNumeric()
+
+    def expr(self):
+        token = self.peek()
+        node = None
+        if token is not None and token.text in ('+', '-'):
+            self.pos += 1
+            node = self.term()
+            if token.text == '-':
+                node = ('neg', node)
+        else:
+            node = self.term()
+        while self.peek() is not None and self.peek().text in ('+', '-'):
+            op = self.next().text
+            node = ('add' if op == '+' else 'sub', node, self.term())
+        return node
+
+    def _starts_primary(self, token):
+        return token is not None and (
+            token.kind in ('number', 'unit', 'name')
+            or token.text in _OPEN
+            or (token.kind == 'command' and token.text not in (r'\cdot', r'\times', r'\div')
+                and token.text not in EQUATION_SEPARATORS and token.text not in MEMBER_SEPARATORS)
+        )
+
+    def term(self):
+        node = self.factor()
+        while True:
+            token = self.peek()
+            if token is None:
+                return node
+            if token.text in ('*', r'\cdot', r'\times'):
+                self.pos += 1
+                node = ('mul', node, self.factor())
+            elif token.text in ('/', r'\div'):
+                self.pos += 1
+                node = ('div', node, self.factor())
+            elif self._starts_primary(token):
+                # Multiplicación implícita: "(5.0 kg) (9.80 m/s^2)"
+                node = ('mul', node, self.factor())
+            else:
+                return node
+
+    def factor(self):
+        node = self.primary()
+        while self.peek() is not None and self.peek().text in ('^', '**'):
+            self.pos += 1
+            if self.peek() is not None and self.peek().text == r'\circ':
+                self.pos += 1
+                node = ('mul', node, ('unit',) + UNITS['°'])
+            elif self.peek() is not None and self.peek().text == '{' and self.peek(1) is not None and self.peek(1).text == r'\circ':
+                self.pos += 2
+                self.expect('}')
+                node = ('mul', node, ('unit',) + UNITS['°'])
+            else:
+                node = ('pow', node, self.exponent())
+        return node
+
+    def exponent(self):
+        braced = self.peek() is not None and self.peek().text in ('{', '(')
+        if braced:
+            closing = '}' if self.next().text == '{' else ')'
+        sign = 1
+        if self.peek() is not None and self.peek().text == '-':
+            self.pos += 1
+            sign = -1
+        token = self.next()
+        if token.kind != 'number':
+            raise NotNumeric()
+        value = Fraction(_THOUSANDS.sub('', token.text))
+        if braced and self.peek() is not None and self.peek().text == '/':
+            self.pos += 1
+            denominator = self.next()
+            if denominator.kind != 'number':
+                raise NotNumeric()
+            value /= Fraction(denominator.text)
+        if braced:
+            self.expect(closing)
+        return sign * value
+
+    def literal(self, text, scale=1.0):
+        self.values.append(float(_THOUSANDS.sub('', text)) * scale)
+        self.ulps.append(_number_ulp(_THOUSANDS.sub('', text)) * scale)
+        return ('num', len(self.values) - 1)
+
+    def primary(self):
+        token = self.next()
+        if token.kind == 'number':
+            # "3.00 \times 10^6" es un único valor escrito (su última cifra es la de 3.00)
+            ahead = [self.peek(i) for i in range(3)]
+            if (ahead[2] is not None and ahead[0].text == r'\times' and ahead[1].text == '10' and ahead[2].text == '^'):
+                self.pos += 3
+                return self.literal(token.text, 10.0 ** float(self.exponent()))
+            return self.literal(token.text)
+        if token.kind == 'unit':
+            text = token.text
+            # El exponente de "\text{ m/s}^2" es del último símbolo de la unidad
+            if self.peek() is not None and self.peek().text == '^' and self.peek(1) is not None and self.peek(1).text != r'\circ':
+                self.pos += 1
+                text = f"{text}^{self.exponent()}"
+            try:
+                scale, dims = parse_unit(text)
+            except ValueError:
+                raise NotNumeric()
+            return ('unit', scale, dims)
+        if token.text in _OPEN:
+            node = self.expr()
+            self.expect({'(': ')', '{': '}', '[': ']'}[token.text])
+            return node
+        if token.text in (r'\frac', r'\dfrac', r'\tfrac'):
+            self.expect('{')
+            numerator = self.expr()
+            self.expect('}')
+            self.expect('{')
+            denominator = self.expr()
+            self.expect('}')
+            return ('div', numerator, denominator)
+        if token.text == r'\pi' or (self.variables is not None and token.text == 'pi'):
+            return ('const', math.pi)
+        if token.text.lstrip('\\') in FUNCTIONS and (token.kind == 'command' or self.variables is not None):
+            if token.kind == 'name' and (self.peek() is None or self.peek().text != '('):
+                raise NotNumeric()
+            return ('func', token.text.lstrip('\\'), self.factor())
+        if token.kind == 'name' and self.variables is not None:
+            if token.text not in self.variables:
+                raise ValueError(f"la fórmula usa '{token.text}' pero no está en los datos")
+            quantity = self.variables[token.text]
+            self.values.append(quantity.value * quantity.scale)
+            self.ulps.append(quantity.ulp * quantity.scale)
+            return ('mul', ('num', len(self.values) - 1), ('unit', 1.0, quantity.dims))
+        raise NotNumeric()
+
+
+def _code(node):
+    kind = node[0]
+    if kind == 'num':
+        return f"p[{node[1]}]"
+    if kind == 'unit':
+        return repr(node[1])
+    if kind == 'const':
+        return repr(node[1])
+    if kind in ('mul', 'div') and node[2][0] == 'unit' and node[2][1] == 1.0:
+        # Las unidades SI no cambian el valor: "(5.0 kg) (9.80 m/s^2)" y "(1500 kg) (25 m/s)"
+        # comparten la plantilla "(p[0] * p[1])"
+        return _code(node[1])
+    if kind == 'neg':
+        return f"(-{_code(node[1])})"
+    if kind == 'pow':
+        return f"({_code(node[1])} ** {float(node[2])!r})"
+    if kind == 'func':
+        return f"np.{node[1]}({_code(node[2])})"
+    op = {'add': '+', 'sub': '-', 'mul': '*', 'div': '/'}[kind]
+    return f"({_code(node[1])} {op} {_code(node[2])})"
+
+
+@lru_cache(maxsize=None)
+def _dims(node):
+    """(dimensiones, tiene unidades) del nodo; lanza DimensionError si no son coherentes."""
+    kind = node[0]
+    if kind in ('num', 'const'):
+        return DIMENSIONLESS, False
+    if kind == 'unit':
+        return node[2], True
+    if kind == 'neg':
+        return _dims(node[1])
+    if kind == 'pow':
+        dims, has_units = _dims(node[1])
+        return tuple(d * node[2] for d in dims), has_units
+    if kind == 'func':
+        dims, has_units = _dims(node[2])
+        if node[1] == 'sqrt':
+            return tuple(d / 2 for d in dims), has_units
+        if dims != DIMENSIONLESS:
+            raise DimensionError(f"el argumento de {node[1]} tiene dimensiones ({format_dims(dims)})")
+        return DIMENSIONLESS, False
+    (left, left_units), (right, right_units) = _dims(node[1]), _dims(node[2])
+    if kind in ('add', 'sub'):
+        if left_units and right_units and left != right:
+            raise DimensionError(f"suma de magnitudes distintas ({format_dims(left)} y {format_dims(right)})")
+        return (left if left_units else right), left_units or right_units
+    if kind == 'mul':
+        return tuple(a + b for a, b in zip(left, right)), left_units or right_units
+    return tuple(a - b for a, b in zip(left, right)), left_units or right_units
+
+
+def _unit_scale(node):
+    """Factor a SI si el nodo es solo unidades (kg, m/s, m^2/s^2); si no, None."""
+    kind = node[0]
+    if kind == 'unit':
+        return node[1]
+    if kind == 'pow':
+        scale = _unit_scale(node[1])
+        return None if scale is None else scale ** float(node[2])
+    if kind in ('mul', 'div'):
+        left, right = _unit_scale(node[1]), _unit_scale(node[2])
+        if left is None or right is None:
+            return None
+        return left * right if kind == 'mul' else left / right
+    return None
+
+
+def _literal(node, ulps):
+    """
+    Si el miembro es un valor escrito ("49.0 N", "3.00 \\times 10^6 cm^2"), devuelve
+    (unidad de la última cifra en SI, factor de su unidad); si es una cuenta, None.
+    """
+    kind = node[0]
+    if kind == 'num':
+        return ulps[node[1]], 1.0
+    if kind == 'neg':
+        return _literal(node[1], ulps)
+    if kind in ('mul', 'div'):
+        inner, scale = _literal(node[1], ulps), _unit_scale(node[2])
+        if inner is None or scale is None:
+            return None
+        ulp, unit_scale = inner
+        return (ulp * scale, unit_scale * scale) if kind == 'mul' else (ulp / scale, unit_scale / scale)
+    return None
+
+
+# Un miembro numérico ya analizado, listo para evaluar
+Member = namedtuple('Member', 'text code values dims has_units ulp display_scale')
+
+
+def build_member(tokens, text, variables=None):
+    """Analiza un miembro. Lanza NotNumeric si no es una expresión numérica, DimensionError si es incoherente."""
+    parser = _Parser(tokens, variables)
+    node = parser.parse()
+    dims, has_units = _dims(node)
+    ulp, display_scale = _literal(node, parser.ulps) or (0.0, 1.0)
+    return Member(text, _code(node), tuple(parser.values), dims, has_units, ulp, display_scale)
+
+
+# --- 2. EXTRACCIÓN DE LAS SOLUCIONES ---
+def _split(tokens, separators):
+    """Divide los tokens en los separadores que están fuera de paréntesis y llaves."""
+    groups, current, depth = [], [], 0
+    for token in tokens:
+        if token.text in _OPEN:
+            depth += 1
+        elif token.text in _CLOSE:
+            depth -= 1
+        if depth == 0 and token.text in separators:
+            groups.append(current)
+            current = []
+        else:
+            current.append(token)
+    groups.append(current)
+    return groups
+
+
+def _text(source, tokens):
+    return ' '.join(source[tokens[0].start:tokens[-1].end].split()) if tokens else ''
+
+
+Check = namedtuple('Check', 'location left right tolerance')
+Finding = namedtuple('Finding', 'location text message')
+
+
+def iter_math(markdown):
+    """Contenido de cada ecuación ($...$ o $$...$$) del markdown, ya reparado."""
+    text = fix_latex_delimiters_in_string(markdown)
+    for token in tokenize(text):
+        if token.kind in ('inline', 'display'):
+            yield text[token.inner_start:token.inner_end]
+
+
+def extract_checks(location, markdown, checks, findings, tolerance=RELATIVE_TOLERANCE):
+    """
+    Agrega a `checks` las igualdades numéricas de una solución y a `findings` los miembros
+    con dimensiones incoherentes. Devuelve la cantidad de ecuaciones que no se pudieron verificar.
+    """
+    skipped = 0
+    chain, chain_key = [], None
+    for math_text in iter_math(markdown):
+        for equation in _split(lex(math_text), EQUATION_SEPARATORS):
+            members = [m for m in _split(equation, MEMBER_SEPARATORS) if m]
+            if len(members) < 2:
+                continue
+            key = _text(math_text, members[0]).replace(' ', '')
+            # "T = ..." seguido de "T = ...": la misma cadena de igualdades
+            if key == chain_key:
+                members = members[1:]
+            else:
+                chain, chain_key = [], key
+            numeric = False
+            for tokens in members:
+                member_text = _text(math_text, tokens)
+                try:
+                    member = build_member(tokens, member_text)
+                except NotNumeric:
+                    continue
+                except DimensionError as e:
+                    findings.append(Finding(location, member_text, f"dimensiones incoherentes: {e}"))
+                    continue
+                numeric = True
+                if chain:
+                    checks.append(Check(location, chain[-1], member, tolerance))
+                chain.append(member)
+            if not numeric:
+                skipped += 1
+    return skipped
+
+
+def annotation_checks(location, annotations, checks, findings):
+    """Agrega las verificaciones declaradas en `verificacion`; sus errores son hallazgos."""
+    for index, annotation in enumerate(annotations):
+        label = f"{location} (verificación {index + 1})"
+        try:
+            variables = {name: parse_quantity(text)[0] for name, text in annotation['datos'].items()}
+            left = build_member(lex(annotation['formula']), annotation['formula'], variables)
+            result, has_units = parse_quantity(annotation['resultado'])
+        except NotNumeric:
+            findings.append(Finding(label, annotation['formula'], "la fórmula no se pudo interpretar"))
+            continue
+        except DimensionError as e:
+            findings.append(Finding(label, annotation['formula'], f"dimensiones incoherentes: {e}"))
+            continue
+        except ValueError as e:
+            findings.append(Finding(label, annotation['formula'], str(e)))
+            continue
+        right = Member(annotation['resultado'], 'p[0]', (result.value * result.scale,), result.dims, has_units,
+                       result.ulp * result.scale, result.scale)
+        checks.append(Check(label, left, right, annotation.get('tolerancia', RELATIVE_TOLERANCE)))
+
+
+def collect(file_paths):
+    """Recorre los capítulos. Devuelve (checks, findings, ejercicios, ecuaciones sin verificar)."""
+    checks, findings = [], []
+    exercises, skipped = 0, 0
+    for file_path in file_paths:
+        data, error = load_chapter_json(file_path, os.path.basename(file_path))
+        if data is None:
+            findings.append(Finding(file_path, '', error))
+            continue
+        for section in data.get('secciones', []):
+            for index, ejercicio in enumerate(section.get('ejercicios', [])):
+                exercises += 1
+                location = f"{file_path}: ejercicio {ejercicio.get('ejercicio_id', index + 1)}"
+                skipped += extract_checks(location, ejercicio.get('solucion_markdown', ''), checks, findings)
+                annotation_checks(location, ejercicio.get('verificacion', []), checks, findings)
+    return checks, findings, exercises, skipped
+
+
+# --- 3. EVALUACIÓN VECTORIZADA ---
+@lru_cache(maxsize=None)
+def _compile(code):
+    import numpy as np
+    # El código lo genera _code a partir del árbol: solo números, operadores y np.<función>
+    return eval(f"lambda p: {code}", {'np': np, '__builtins__': {}})
+
+
+def evaluate(members):
+    """Valor en SI de cada miembro: una llamada de NumPy por plantilla."""
+    import numpy as np
+
+    groups = {}
+    for index, member in enumerate(members):
+        groups.setdefault(member.code, []).append(index)
+
+    values = np.empty(len(members))
+    with np.errstate(all='ignore'):
+        for code, indices in groups.items():
+            parameters = np.array([members[i].values for i in indices], dtype=float).reshape(len(indices), -1)
+            values[indices] = np.broadcast_to(_compile(code)(parameters.T), (len(indices),))
+    return values
+
+
+def verify(checks):
+    """Compara todas las igualdades de una vez. Devuelve la lista de hallazgos."""
+    import numpy as np
+
+    findings = []
+    numeric = []
+    for check in checks:
+        left, right = check.left, check.right
+        if left.has_units and right.has_units and left.dims != right.dims:
+            findings.append(Finding(check.location, f"{left.text} = {right.text}",
+                                    f"dimensiones distintas: {format_dims(left.dims)} y {format_dims(right.dims)}"))
+        else:
+            numeric.append(check)
+    if not numeric:
+        return findings
+
+    # Cada miembro se evalúa una sola vez aunque participe en dos igualdades de la cadena
+    members, positions = [], {}
+    for check in numeric:
+        for member in (check.left, check.right):
+            if id(member) not in positions:
+                positions[id(member)] = len(members)
+                members.append(member)
+    values = evaluate(members)
+
+    left = values[[positions[id(c.left)] for c in numeric]]
+    right = values[[positions[id(c.right)] for c in numeric]]
+    ulp = np.array([max(c.left.ulp, c.right.ulp) for c in numeric])
+    relative = np.array([c.tolerance for c in numeric])
+    with np.errstate(all='ignore'):
+        difference = np.abs(left - right)
+        agrees = (difference < 0.5 * ulp) | (difference <= relative * np.abs(right))
+
+    for i in np.flatnonzero(~agrees):
+        check = numeric[i]
+        scale = check.right.display_scale or 1.0
+        findings.append(Finding(check.location, f"{check.left.text} = {check.right.text}",
+                                f"la cuenta da {left[i] / scale:.6g}, no {right[i] / scale:.6g}"))
+    return findings
+
+
+def verify_files(file_paths):
+    """Verifica los capítulos. Devuelve (hallazgos, resumen)."""
+    start = time.perf_counter()
+    checks, findings, exercises, skipped = collect(file_paths)
+    findings.extend(verify(checks))
+    findings.sort(key=lambda finding: finding.location)
+    summary = {'ejercicios': exercises, 'igualdades': len(checks), 'sin_verificar': skipped,
+               'segundos': time.perf_counter() - start}
+    return findings, summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verifica que las cuentas de las soluciones den los resultados escritos.")
+    parser.add_argument('files', nargs='*', help=f"Archivos a verificar (por defecto, todos los de '{BASE_PATH}').")
+    args = parser.parse_args()
+
+    file_paths = args.files
+    if not file_paths:
+        if not os.path.isdir(BASE_PATH):
+            print(f"❌ ERROR: El directorio '{BASE_PATH}' no existe.")
+            sys.exit(1)
+        file_paths = [os.path.join(BASE_PATH, f) for f in list_chapter_files(BASE_PATH)]
+
+    try:
+        findings, summary = verify_files(file_paths)
+    except ImportError:
+        print("❌ ERROR: la verificación numérica necesita NumPy (pip install numpy).")
+        sys.exit(1)
+
+    for finding in findings:
+        print(f"{finding.location}: ❌ {finding.message}")
+        if finding.text:
+            print(f"    {finding.text}")
+
+    print(f"📏 {summary['igualdades']} igualdades de {summary['ejercicios']} ejercicios verificadas en "
+          f"{summary['segundos'] * 1000:.1f} ms ({summary['sin_verificar']} ecuaciones sin valores numéricos).")
+    if findings:
+        print(f"❌ {len(findings)} resultados no coinciden con sus cuentas.")
+        sys.exit(1)
+    print("✅ Todas las cuentas coinciden con los resultados escritos.")